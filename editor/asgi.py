@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "editor.settings")
+# Pod ASGI obsługujemy SSE natywnie w asyncio (patrz routes/sse.py).
+os.environ.setdefault("SSE_ASYNC", "1")
 
 application = get_asgi_application()
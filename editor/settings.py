@@ -72,6 +72,7 @@ TAILWIND_APP_NAME = "theme"
 
 # --- Middleware ----------------------------------------------------------
 MIDDLEWARE = [
+    "routes.metrics.MetricsMiddleware",  # no-op bez METRICS_ENABLED
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -105,6 +106,18 @@ WSGI_APPLICATION = "editor.wsgi.application"
 # --- Baza danych ---------------------------------------------------------
 # Domyślnie SQLite (pliku w repo nie wersjonujemy). Produkcja: ustaw DATABASE_URL.
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Trwałe połączenia: worker trzyma połączenie do DB_CONN_MAX_AGE s (0 – nowe
+# na każde żądanie) i przed ponownym użyciem sprawdza, czy żyje.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+# "1" – pula połączeń psycopg 3 (pakiet psycopg[pool]) zamiast trwałych
+# połączeń; zalecana pod ASGI, gdzie połączenie nie przeżywa żądania.
+# Rozmiary – na proces, więc workery × DB_POOL_MAX_SIZE < max_connections.
+DB_POOL = os.getenv("DB_POOL", "0") in {"1", "true", "True"}
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# statement_timeout PostgreSQL w ms (0 – bez limitu); długie migracje
+# i generate_data uruchamiaj z DB_STATEMENT_TIMEOUT=0.
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "0"))
 if DATABASE_URL:
     try:
         import dj_database_url
@@ -114,7 +127,19 @@ if DATABASE_URL:
             "Dodaj go do requirements.txt lub usuń zmienną."
         ) from e
 
-    DATABASES = {"default": dj_database_url.parse(DATABASE_URL)}
+    DATABASES = {
+        "default": dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,   # pula wyklucza trwałe połączenia
+            conn_health_checks=not DB_POOL,
+        )
+    }
+    if DATABASES["default"]["ENGINE"].endswith(("postgresql", "postgis")):
+        db_options = DATABASES["default"].setdefault("OPTIONS", {})
+        if DB_POOL:
+            db_options["pool"] = {"min_size": DB_POOL_MIN_SIZE, "max_size": DB_POOL_MAX_SIZE}
+        if DB_STATEMENT_TIMEOUT:
+            db_options["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
 else:
     DATABASES = {
         "default": {
@@ -159,6 +184,80 @@ REST_FRAMEWORK = {
     ],
      "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
+# Stronicowanie kursorem /api/boards/ i /api/routes/ (routes.pagination);
+# klient może zmienić rozmiar strony ?page_size= do API_MAX_PAGE_SIZE.
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+
+# --- SSE -----------------------------------------------------------------
+# Asynchroniczny strumień /sse/notifications/ (bez wątku na klienta).
+# editor/asgi.py włącza go domyślnie; pod WSGI zostaje wersja wątkowa.
+SSE_ASYNC = os.getenv("SSE_ASYNC", "0") in {"1", "true", "True"}
+# Połączenie z Redis i listener startują leniwie (pierwszy strumień lub
+# publikacja).  "1" – start już w AppConfig.ready; ustawiać tylko dla
+# serwera aplikacji, nie dla manage.py.
+SSE_AUTOSTART = os.getenv("SSE_AUTOSTART", "0") in {"1", "true", "True"}
+
+# --- Plansze ---------------------------------------------------------------
+# "1" – zapis planszy (API) wymaga, żeby routes.solver nie udowodnił braku
+# rozwiązania; wynik "unknown" (przekroczony czas) przepuszczamy.
+BOARD_REQUIRE_SOLVABLE = os.getenv("BOARD_REQUIRE_SOLVABLE", "0") in {"1", "true", "True"}
+# Limit czasu solvera w sekundach (walidacja i /api/boards/<id>/solve/).
+BOARD_SOLVE_TIMEOUT = float(os.getenv("BOARD_SOLVE_TIMEOUT", "0.5"))
+# Cache-Control: max-age (s) publicznych odczytów planszy – CDN / proxy;
+# po nim rewalidacja ETag-iem (304 bez czytania kropek).
+BOARD_CACHE_MAX_AGE = int(os.getenv("BOARD_CACHE_MAX_AGE", "60"))
+# Najwięcej plansz w jednym POST /api/boards/bulk/.
+BOARD_BULK_LIMIT = int(os.getenv("BOARD_BULK_LIMIT", "1000"))
+# Limity POST /api/boards/import/ (NDJSON): linie, bajty linii, bajty ciała.
+BOARD_IMPORT_MAX_LINES = int(os.getenv("BOARD_IMPORT_MAX_LINES", "100000"))
+BOARD_IMPORT_MAX_LINE_BYTES = int(os.getenv("BOARD_IMPORT_MAX_LINE_BYTES", str(64 * 1024)))
+BOARD_IMPORT_MAX_BYTES = int(os.getenv("BOARD_IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# --- Metryki ---------------------------------------------------------------
+# routes.metrics: histogramy czasu, zapytań SQL, serializerów i rozmiaru
+# odpowiedzi per widok, wystawione pod /metrics (Prometheus).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") in {"1", "true", "True"}
+# Odsetek mierzonych żądań; na produkcji 0.01–0.05 (narzut < 1 %).
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+# Scrape bez sesji: nagłówek "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# --- Cache -----------------------------------------------------------------
+# Profil produkcyjny (DATABASE_URL) to wiele workerów: bez jawnych
+# SOLVER_CACHE_URL / BOARD_JSON_CACHE_URL oba cache trafiają do REDIS_URL
+# (jeśli ustawiony) zamiast LocMem osobno w każdym procesie.  Pusta
+# wartość zmiennej wymusza LocMem.
+_SHARED_CACHE_URL = os.getenv("REDIS_URL") if DATABASE_URL else None
+# "solver" – wyniki routes.solver pod kanonicznym odciskiem planszy.
+# Domyślnie LocMem (LRU w obrębie procesu); SOLVER_CACHE_URL=redis://… –
+# wspólny cache dla wszystkich workerów (Redis z maxmemory-policy allkeys-lru).
+SOLVER_CACHE_URL = os.getenv("SOLVER_CACHE_URL", _SHARED_CACHE_URL)
+SOLVER_CACHE_TTL = int(os.getenv("SOLVER_CACHE_TTL", str(7 * 24 * 3600)))
+# "boards" – gotowy JSON plansz (routes.board_cache) pod kluczem z ``modified``,
+# więc zapis w jednym workerze nie zostawi starej kopii w pozostałych;
+# BOARD_JSON_CACHE_URL=redis://… – jeden cache (i jedno renderowanie) dla wszystkich.
+BOARD_JSON_CACHE_URL = os.getenv("BOARD_JSON_CACHE_URL", _SHARED_CACHE_URL)
+BOARD_JSON_CACHE_TTL = int(os.getenv("BOARD_JSON_CACHE_TTL", str(24 * 3600)))
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "solver": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache"
+        if SOLVER_CACHE_URL else "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": SOLVER_CACHE_URL or "solver",
+        "TIMEOUT": SOLVER_CACHE_TTL,
+        "KEY_PREFIX": "solver",
+        "OPTIONS": {} if SOLVER_CACHE_URL else {"MAX_ENTRIES": 10_000},
+    },
+    "boards": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache"
+        if BOARD_JSON_CACHE_URL else "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": BOARD_JSON_CACHE_URL or "boards",
+        "TIMEOUT": BOARD_JSON_CACHE_TTL,
+        "KEY_PREFIX": "boards",
+        "OPTIONS": {} if BOARD_JSON_CACHE_URL else {"MAX_ENTRIES": 5_000},
+    },
+}
 
 # --- Auth redirects ------------------------------------------------------
 LOGIN_URL = "login"
@@ -21,9 +21,12 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from routes.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("routes.api_urls")),
     path("accounts/", include("django.contrib.auth.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("", include("routes.urls")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
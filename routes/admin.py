@@ -1,6 +1,17 @@
 from django.contrib import admin
-from .models import Route, RoutePoint, GameBoard
+from .models import BoardSolution, Route, GameBoard
 
-admin.site.register(Route)
-admin.site.register(RoutePoint)
+
+@admin.register(Route)
+class RouteAdmin(admin.ModelAdmin):
+    """Geometria (``Route.coords``) tylko do podglądu – zapis przez API sprawdza ją z planszą."""
+    list_display = ("name", "owner", "background", "created")
+    readonly_fields = ("background", "points")
+
+    @admin.display(description="Punkty (x, y)")
+    def points(self, route):
+        return ", ".join(f"({x}, {y})" for x, y in route.coords)
+
+
+admin.site.register(BoardSolution)
 admin.site.register(GameBoard)
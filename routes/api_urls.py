@@ -1,12 +1,16 @@
 from django.urls import path
 from rest_framework_nested import routers
-from .api_views import RouteViewSet, RoutePointViewSet, GameBoardViewSet, PublicBoardView, RoutePointBulkView
+from .api_views import (
+    BoardSolutionViewSet, RouteViewSet, RoutePointViewSet, GameBoardViewSet, PublicBoardView,
+    RoutePointBulkView,
+)
 from rest_framework.authtoken.views import obtain_auth_token
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 router = routers.DefaultRouter()
 router.register("routes", RouteViewSet, basename="route")
 router.register("boards", GameBoardViewSet, basename="board")
+router.register("solutions", BoardSolutionViewSet, basename="solution")
 
 points_router = routers.NestedSimpleRouter(router, "routes", lookup="route")
 points_router.register("points", RoutePointViewSet, basename="route-point")
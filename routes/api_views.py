@@ -1,19 +1,32 @@
 # routes/api_views.py
 
-from django.shortcuts    import get_object_or_404
-from django.db.models    import Max
+from django.conf         import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db           import transaction
+from django.http         import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 
-from rest_framework      import viewsets, mixins, permissions, authentication, status
+from rest_framework      import viewsets, permissions, authentication, status
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models             import Route, RoutePoint, GameBoard
-from .serializers        import RouteSerializer, RoutePointSerializer, GameBoardSerializer
+from .models             import BoardSolution, Route, GameBoard
+from .serializers        import (
+    BoardSolutionSerializer, RouteSerializer, RoutePointSerializer, RoutePointOpSerializer,
+    GameBoardSerializer, point_dicts,
+)
 
-from .permissions        import IsRouteOwner
+from .pagination         import BoardCursorPagination, RouteCursorPagination
+from .permissions        import IsRouteOwner, owned_route
+from .                   import batch, board_cache, conditional, ndjson, solver, sse, validation
 
 
 
@@ -23,11 +36,77 @@ class IsOwner(permissions.BasePermission):
         return obj.owner == request.user
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+def _cached_board(request, pk, fields=None):
     """
-    API dla tras – tylko trasy właściciela.
+    Pełny JSON planszy z ``routes.board_cache`` – bez SELECT-a ``dots``
+    i serializacji; ``modified`` bierzemy z walidatora ETag (to samo żądanie).
+    ``None``, gdy odpowiedź musi przejść przez DRF (``?fields=``, inny format).
+    """
+    if fields is not None or request.accepted_renderer.format != "json":
+        return None
+    modified = conditional.board_modified(request, pk)
+    data = board_cache.board_json(int(pk), modified) if modified is not None else None
+    if data is None:
+        raise NotFound()
+    return HttpResponse(data, content_type="application/json")
+
+
+FIELD_PARAMETERS = [
+    OpenApiParameter("fields", OpenApiTypes.STR, description="pola odpowiedzi po przecinku, np. id,title"),
+    OpenApiParameter("summary", OpenApiTypes.BOOL, description="1 – bez ciężkich pól (dots / points)"),
+]
+
+
+class FieldSelectionMixin:
+    """
+    ``?fields=id,title`` – tylko wybrane pola; ``?summary=1`` – wszystkie
+    poza ``summary_exclude``.  Pominięte kolumny nie wychodzą z bazy
+    (``.only()``); dotyczy tylko GET listy i szczegółów.
+    """
+    summary_exclude: tuple[str, ...] = ()
+    field_sources: dict[str, str] = {}    # pole serializera → kolumna, gdy inna
+    always_load: tuple[str, ...] = ()     # kolumny potrzebne kursorowi
+
+    def selected_fields(self) -> list[str] | None:
+        if self.action not in ("list", "retrieve"):
+            return None
+        names = self.get_serializer_class().Meta.fields
+        params = self.request.query_params
+        if params.get("fields"):
+            chosen = [name.strip() for name in params["fields"].split(",") if name.strip()]
+            unknown = set(chosen) - set(names)
+            if unknown:
+                raise ValidationError({"fields": f"Nieznane pola: {', '.join(sorted(unknown))}."})
+            return chosen
+        if params.get("summary", "0") in {"1", "true", "True"}:
+            return [name for name in names if name not in self.summary_exclude]
+        return None
+
+    def select_columns(self, queryset):
+        fields = self.selected_fields()
+        if fields is None:
+            return queryset
+        return queryset.only("id", *self.always_load, *(self.field_sources.get(f, f) for f in fields))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.selected_fields()
+        if fields is not None:
+            context["fields"] = fields
+        return context
+
+
+@extend_schema_view(list=extend_schema(parameters=FIELD_PARAMETERS),
+                    retrieve=extend_schema(parameters=FIELD_PARAMETERS))
+class RouteViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
+    """
+    API dla tras – tylko trasy właściciela, stronicowane kursorem.
     """
     serializer_class   = RouteSerializer
+    pagination_class   = RouteCursorPagination
+    summary_exclude    = ("points",)
+    field_sources      = {"points": "packed_points"}
+    always_load        = ("created",)
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [
         TokenAuthentication,
@@ -36,26 +115,63 @@ class RouteViewSet(viewsets.ModelViewSet):
     http_method_names  = ["get", "post", "patch", "delete", "put"]
 
     def get_queryset(self):
-        return (
+        routes = (
             Route.objects
-            .filter(owner=self.request.user)
-            .prefetch_related("points")    # jeden SELECT na punkty
+            .filter(owner=self.request.user)   # punkty są w packed_points
             .order_by("-created")
         )
+        if self.action == "status":
+            routes = routes.select_related("background")
+        return self.select_columns(routes)
+
+    @method_decorator(conditional.private_route)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class RoutePointViewSet(
-    mixins.CreateModelMixin,
-    mixins.ListModelMixin,
-    mixins.RetrieveModelMixin,
-    mixins.UpdateModelMixin,
-    mixins.DestroyModelMixin,
-    viewsets.GenericViewSet
-):
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    @action(detail=True, methods=["get"])
+    def status(self, request, pk=None):
+        """
+        Stan ukończenia trasy jednym zapytaniem:
+        {"status": "empty" | "building" | "finished" | "invalid", "color", "cells", "points"}
+        """
+        route = self.get_object()
+        coords = route.coords
+        try:
+            data = validation.check_route(validation.board_map(route.background), coords).as_dict()
+        except validation.RouteError as exc:
+            data = {"status": "invalid", "error": str(exc), "index": exc.index}
+        return Response({**data, "points": len(coords)})
+
+class BoardSolutionViewSet(viewsets.ModelViewSet):
+    """
+    /api/solutions/        – moje pełne rozwiązania (wszystkie ścieżki planszy)
+    /api/solutions/<id>/   – CRUD; jedno rozwiązanie gracza na planszę
+    """
+    serializer_class   = BoardSolutionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [
+        TokenAuthentication,
+        SessionAuthentication
+    ]
+
+    def get_queryset(self):
+        return (
+            BoardSolution.objects
+            .filter(owner=self.request.user)
+            .select_related("board")           # report potrzebuje kropek planszy
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+class RoutePointViewSet(viewsets.GenericViewSet):
     """
     API dla punktów danej trasy – tylko punkty tras właściciela.
+    Punkty są widokiem na ``Route.coords``; ``pk`` to ``order`` (1…n).
     """
     serializer_class   = RoutePointSerializer
     permission_classes = [permissions.IsAuthenticated, IsRouteOwner]
@@ -65,52 +181,130 @@ class RoutePointViewSet(
     ]
     http_method_names  = ["get", "post", "patch", "delete"]
 
-    def get_queryset(self):
-        return RoutePoint.objects.filter(
-            route__owner=self.request.user,
-            route_id=self.kwargs["route_pk"]
-        ).order_by("order")
+    def _route(self, lock=False):
+        return _owned_route(self.request, self.kwargs["route_pk"], lock)
 
-    def perform_create(self, serializer):
-        # upewniamy się, że trasa należy do request.user
-        route = get_object_or_404(
-            Route,
-            pk=self.kwargs["route_pk"],
-            owner=self.request.user
-        )
-        # obliczamy kolejny order
-        last = (
-            RoutePoint.objects.filter(route=route)
-            .aggregate(max_order=Max("order"))["max_order"]
-            or 0
-        )
-        serializer.save(route=route, order=last + 1)
+    def _index(self, coords):
+        order = int(self.kwargs["pk"]) if self.kwargs["pk"].isdigit() else 0
+        if not 1 <= order <= len(coords):
+            raise NotFound()
+        return order - 1
+
+    def list(self, request, route_pk=None):
+        return Response(self.get_serializer(point_dicts(self._route().coords), many=True).data)
+
+    def retrieve(self, request, route_pk=None, pk=None):
+        coords = self._route().coords
+        return Response(self.get_serializer(point_dicts(coords)[self._index(coords)]).data)
+
+    def create(self, request, route_pk=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            route = self._route(lock=True)
+            coords = route.coords
+            coords.append((serializer.validated_data["x"], serializer.validated_data["y"]))
+            _save_coords(route, coords)
+        return Response(point_dicts(coords)[-1], status=status.HTTP_201_CREATED)
+
+    def partial_update(self, request, route_pk=None, pk=None):
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            route = self._route(lock=True)
+            coords = route.coords
+            idx = self._index(coords)
+            x, y = coords[idx]
+            coords[idx] = (serializer.validated_data.get("x", x), serializer.validated_data.get("y", y))
+            _save_coords(route, coords)
+        return Response(point_dicts(coords)[idx])
+
+    def destroy(self, request, route_pk=None, pk=None):
+        with transaction.atomic():
+            route = self._route(lock=True)
+            coords = route.coords
+            del coords[self._index(coords)]
+            _save_coords(route, coords)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class RoutePointBulkView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsRouteOwner]
     authentication_classes = [TokenAuthentication, SessionAuthentication]
 
     def put(self, request, route_pk):
-        route = get_object_or_404(Route, pk=route_pk, owner=request.user)
-        RoutePoint.objects.filter(route=route).delete()
-        points = request.data
-        objs = []
-        for idx, pt in enumerate(points):
-            objs.append(RoutePoint(
-                route=route,
-                x=pt.get("x"),
-                y=pt.get("y"),
-                order=idx + 1
-            ))
-        RoutePoint.objects.bulk_create(objs)
-        return Response({"status": "ok", "count": len(objs)}, status=status.HTTP_200_OK)
-
-class GameBoardViewSet(viewsets.ModelViewSet):
-    """
-    /api/boards/        – lista tylko moich plansz
+        points = RoutePointSerializer(data=request.data, many=True)
+        points.is_valid(raise_exception=True)
+        route = _owned_route(request, route_pk)
+        coords = [(pt["x"], pt["y"]) for pt in points.validated_data]
+        _save_coords(route, coords)
+        return Response({"status": "ok", "count": len(coords)}, status=status.HTTP_200_OK)
+
+    def patch(self, request, route_pk):
+        """
+        Przyrostowa edycja – lista operacji ``RoutePointOpSerializer``
+        wykonana w jednej transakcji: SELECT … FOR UPDATE trasy i jeden
+        UPDATE upakowanej geometrii (≤ 2 B na punkt), niezależnie od liczby
+        operacji.
+        """
+        ops = RoutePointOpSerializer(data=request.data, many=True)
+        ops.is_valid(raise_exception=True)
+        with transaction.atomic():
+            # blokada wiersza trasy szereguje równoległe edycje
+            route = _owned_route(request, route_pk, lock=True)
+            coords = route.coords
+            for i, op in enumerate(ops.validated_data):
+                new = [(pt["x"], pt["y"]) for pt in op["points"]]
+                if op["op"] == "append":
+                    coords.extend(new)
+                elif op["op"] == "truncate":
+                    del coords[op["after"]:]
+                else:
+                    if op["end"] > len(coords) + 1:
+                        raise ValidationError({i: f"Zakres poza trasą ({len(coords)} punktów)."})
+                    coords[op["start"] - 1:op["end"] - 1] = new
+            _save_coords(route, coords)
+        return Response({"status": "ok", "count": len(coords)}, status=status.HTTP_200_OK)
+
+
+def _owned_route(request, route_pk, lock=False):
+    """
+    Trasa zalogowanego użytkownika razem z planszą do walidacji – bez
+    blokady ta sama, którą wczytał ``IsRouteOwner``; ``lock`` – świeży odczyt
+    FOR UPDATE tylko wiersza trasy (403, gdy w międzyczasie zniknęła).
+    """
+    route = owned_route(request, route_pk, lock)
+    if route is None:
+        raise PermissionDenied()
+    return route
+
+
+def _save_coords(route, coords):
+    """Zapis geometrii – wyłącznie ścieżki zgodnej z regułami planszy."""
+    try:
+        validation.check_route(validation.board_map(route.background), coords)
+        route.coords = coords
+    except validation.RouteError as exc:
+        raise ValidationError({"points": [f"Punkt {exc.index + 1}: {exc}"]})
+    except ValueError as exc:
+        raise ValidationError(str(exc))
+    route.save(update_fields=["packed_points"])
+
+
+@extend_schema_view(list=extend_schema(parameters=FIELD_PARAMETERS),
+                    retrieve=extend_schema(parameters=FIELD_PARAMETERS))
+class GameBoardViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
+    """
+    /api/boards/        – lista plansz, stronicowana kursorem
     /api/boards/<id>/   – CRUD na mojej planszy
+    /api/boards/<id>/solve/ – rozwiązanie planszy (publiczne jak GET)
+    /api/boards/bulk/       – wiele plansz jednym żądaniem
+    /api/boards/import/     – strumień NDJSON → moje plansze
+    /api/boards/export/     – moje plansze jako strumień NDJSON
     """
     serializer_class      = GameBoardSerializer
+    pagination_class      = BoardCursorPagination
+    summary_exclude       = ("dots",)
+    always_load           = ("modified",)
     authentication_classes = [
         authentication.TokenAuthentication,   # lub JWT
         authentication.SessionAuthentication
@@ -118,22 +312,113 @@ class GameBoardViewSet(viewsets.ModelViewSet):
     permission_classes     = [permissions.IsAuthenticated, IsOwner]
 
     def get_permissions(self):
-        if self.action in ("retrieve",):                     # GET /api/boards/<id>/
+        if self.action in ("retrieve", "solve"):             # GET /api/boards/<id>/
             return [permissions.AllowAny()]
         if self.action in ("list",):                         # GET /api/boards/
             return [permissions.IsAuthenticated()]
         return [permissions.IsAuthenticated(), IsOwner()]
 
     def get_queryset(self):
-        return GameBoard.objects.all()
+        return self.select_columns(GameBoard.objects.all())
+
+    @method_decorator(conditional.revalidated_board)
+    def retrieve(self, request, *args, pk=None, **kwargs):
+        return _cached_board(request, pk, self.selected_fields()) or super().retrieve(request, *args, pk=pk, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @extend_schema(
+        parameters=[OpenApiParameter(
+            "fill", OpenApiTypes.BOOL,
+            description="1 – ścieżki muszą pokryć całą planszę (reguła Flow Free)",
+        )],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=True, methods=["get"])
+    def solve(self, request, pk=None):
+        """
+        {"status": "solved" | "unsolvable" | "unknown", "solvable": bool | null,
+         "paths": {kolor: [[row, col], …]}, "nodes": …, "elapsed_ms": …}
+
+        Plansza większa niż ``solver.MAX_CELLS`` – od razu "unknown";
+        zapisane kropki niezgodne z siatką – 400 ze statusem "invalid".
+        """
+        board = self.get_object()
+        fill = request.query_params.get("fill", "0") in {"1", "true", "True"}
+        result = solver.solve_board(board, fill=fill, timeout=settings.BOARD_SOLVE_TIMEOUT)
+        code = status.HTTP_400_BAD_REQUEST if result.status == solver.INVALID else status.HTTP_200_OK
+        return Response(result.as_dict(), status=code)
+
+    @extend_schema(request=GameBoardSerializer(many=True), responses=OpenApiTypes.OBJECT)
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Lista plansz → walidacja całej partii (routes.batch) i jeden bulk_create.
+        Poprawne plansze są zapisywane, błędne opisane w ``errors`` pod swoim
+        indeksem; 201, jeśli cokolwiek utworzono, inaczej 400.
+        """
+        boards = request.data
+        if not isinstance(boards, list):
+            raise ValidationError("Oczekiwano listy plansz.")
+        if len(boards) > settings.BOARD_BULK_LIMIT:
+            raise ValidationError(f"Najwyżej {settings.BOARD_BULK_LIMIT} plansz w jednym żądaniu.")
+        with transaction.atomic():
+            created, reports = batch.create_boards(request.user, boards)
+            sse.boards_imported(request.user, len(created))
+        errors = {str(i): report for i, report in enumerate(reports) if report}
+        return Response(
+            {"created": [board.pk for board in created], "errors": errors},
+            status=status.HTTP_201_CREATED if created or not boards else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @extend_schema(request={ndjson.CONTENT_TYPE: OpenApiTypes.STR}, responses=OpenApiTypes.OBJECT)
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[ndjson.NDJSONParser])
+    def import_ndjson(self, request):
+        """
+        Ciało: jedna plansza (JSON) na linię.  Odpowiedź – podsumowanie
+        {"lines", "created", "invalid", "errors": {"nr linii": [opis, …]}}.
+        Ponad limity BOARD_IMPORT_MAX_* – 413; z ``Content-Length`` od razu,
+        w trakcie strumienia – z podsumowaniem tego, co zapisano, i ``aborted``.
+        """
+        length = request.META.get("CONTENT_LENGTH") or ""
+        if length.isdigit() and int(length) > settings.BOARD_IMPORT_MAX_BYTES:
+            return Response(
+                {"detail": f"Import większy niż {settings.BOARD_IMPORT_MAX_BYTES} B."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        lines = ndjson.limited_lines(
+            request.data,
+            max_line_bytes=settings.BOARD_IMPORT_MAX_LINE_BYTES,
+            max_bytes=settings.BOARD_IMPORT_MAX_BYTES,
+        ) if hasattr(request.data, "readline") else ()
+        summary = ndjson.import_boards(request.user, lines, max_lines=settings.BOARD_IMPORT_MAX_LINES)
+        code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if summary.aborted else status.HTTP_200_OK
+        return Response(summary.as_dict(), status=code)
+
+    @extend_schema(responses={(200, ndjson.CONTENT_TYPE): OpenApiTypes.STR})
+    @action(
+        detail=False, methods=["get"], url_path="export",
+        renderer_classes=[ndjson.NDJSONRenderer, JSONRenderer],
+    )
+    def export_ndjson(self, request):
+        """Moje plansze, jedna na linię, strumieniowo (pod ASGI – iterator asynchroniczny)."""
+        export = ndjson.aexport_boards if isinstance(request._request, ASGIRequest) else ndjson.export_boards
+        response = StreamingHttpResponse(
+            export(GameBoard.objects.filter(owner=request.user)),
+            content_type=ndjson.CONTENT_TYPE,
+        )
+        response["Content-Disposition"] = 'attachment; filename="boards.ndjson"'
+        return response
+
 class PublicBoardView(RetrieveAPIView):
     """
-    /api/public-boards/<id>/   – anon GET
+    /api/public-boards/<id>/   – anon GET (JSON z routes.board_cache)
     """
     queryset           = GameBoard.objects.all()
     serializer_class   = GameBoardSerializer
-    permission_classes = [AllowAny]
\ No newline at end of file
+    permission_classes = [AllowAny]
+
+    @method_decorator(conditional.public_board)
+    def get(self, request, *args, pk=None, **kwargs):
+        return _cached_board(request, pk) or super().get(request, *args, pk=pk, **kwargs)
\ No newline at end of file
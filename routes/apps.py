@@ -1,6 +1,7 @@
 # routes/apps.py
 
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class RoutesConfig(AppConfig):
@@ -8,4 +9,8 @@ class RoutesConfig(AppConfig):
     name = "routes"
 
     def ready(self):
-        from . import sse  # noqa – rejestruje sygnały
+        from . import metrics, sse  # noqa – rejestrują sygnały
+
+        if settings.SSE_AUTOSTART:
+            # Rozgrzewka workera: połączenie z Redis przed pierwszym żądaniem.
+            sse.start(listener=not settings.SSE_ASYNC)
@@ -0,0 +1,208 @@
+# routes/batch.py
+"""Walidacja kropek wielu plansz naraz (bulk API, nocny import).
+
+Reguły są te same co w ``GameBoardSerializer.validate``:
+
+• kropka ma ``row``/``col`` (liczby całkowite) i ``color`` (tekst),
+• kropki mieszczą się w siatce,
+• brak dwóch kropek na jednym polu,
+• każdy kolor dokładnie 2×.
+
+:func:`check_dots` sprawdza jedną planszę w Pythonie.  :func:`validate_boards`
+najpierw rozkłada kropki wszystkich plansz na płaskie tablice NumPy
+(plansza, wiersz, kolumna, kod koloru), a potem liczy zakres, duplikaty
+pól (``lexsort`` + porównanie sąsiadów) i liczności kolorów (``unique``
+z ``return_counts``) jedną operacją dla całej partii.  NumPy jest
+opcjonalny – bez niego ``validate_boards`` woła :func:`check_dots` dla
+każdej planszy i zwraca te same raporty.
+
+:func:`create_boards` dokłada (z ``BOARD_REQUIRE_SOLVABLE``) sprawdzenie
+rozwiązywalności i zapisuje poprawne plansze przez ``bulk_create`` – bez
+sygnałów ``post_save``, więc bez zdarzeń SSE dla pojedynczych plansz.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from operator import itemgetter
+from typing import Sequence
+
+from django.conf import settings
+
+from . import solver
+from .models import GameBoard
+
+try:
+    import numpy as np
+except ImportError:  # opcjonalna zależność
+    np = None
+
+MAX_SIZE = 32767       # PositiveSmallIntegerField
+MAX_TITLE = 50
+BATCH_SIZE = 500       # wierszy na jedno INSERT w bulk_create
+
+_FIELDS = itemgetter("row", "col", "color")
+
+OUT_OF_RANGE = "Kropka poza zakresem planszy."
+DUPLICATE = "Podwójna kropka w tej samej komórce."
+MALFORMED = "Kropka musi mieć pola row, col (liczby całkowite) i color (tekst)."
+
+
+def wrong_colors(colors) -> str:
+    return f"Kolory {', '.join(colors)} występują nie dokładnie 2 razy."
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _columns(dots) -> tuple[tuple, tuple, tuple] | None:
+    """
+    Kropki → ``(wiersze, kolumny, kolory)``; ``None``, jeśli któraś jest źle
+    zbudowana.  Typy sprawdzamy przez ``set(map(type, …))`` – pętla w C,
+    a dla JSON-a to to samo co ``isinstance`` (``bool`` odpada).
+    """
+    if not isinstance(dots, list) or not set(map(type, dots)) <= {dict}:
+        return None
+    try:
+        rows, cols, colors = tuple(zip(*map(_FIELDS, dots))) or ((), (), ())
+    except KeyError:
+        return None
+    if not set(map(type, rows)) | set(map(type, cols)) <= {int} or not set(map(type, colors)) <= {str}:
+        return None
+    return rows, cols, colors
+
+
+def check_dots(rows: int, cols: int, dots) -> list[str]:
+    """Błędy kropek jednej planszy (pusta lista – w porządku)."""
+    columns = _columns(dots)
+    if columns is None:
+        return [MALFORMED]
+    errors = []
+    rs, cs, colors = columns
+    if rs and (min(rs) < 0 or max(rs) >= rows or min(cs) < 0 or max(cs) >= cols):
+        errors.append(OUT_OF_RANGE)
+    if len(set(zip(rs, cs))) != len(rs):
+        errors.append(DUPLICATE)
+    counts = Counter(colors)
+    wrong = [color for color, n in counts.items() if n != 2]
+    if wrong:
+        errors.append(wrong_colors(wrong))
+    return errors
+
+
+def _check_header(board) -> list[str]:
+    """Pola planszy poza kropkami – tanie, zawsze w Pythonie."""
+    if not isinstance(board, dict):
+        return ["Plansza musi być obiektem JSON."]
+    errors = []
+    title = board.get("title")
+    if not isinstance(title, str) or not title.strip() or len(title) > MAX_TITLE:
+        errors.append(f"Tytuł jest wymagany (najwyżej {MAX_TITLE} znaków).")
+    for field in ("rows", "cols"):
+        value = board.get(field, 5)
+        if not _is_int(value) or not 0 <= value <= MAX_SIZE:
+            errors.append(f"Pole {field} musi być liczbą 0…{MAX_SIZE}.")
+    if not isinstance(board.get("dots", []), list):
+        errors.append(MALFORMED)
+    return errors
+
+
+def validate_boards(boards: Sequence[dict], *, vectorized: bool | None = None) -> list[list[str]]:
+    """
+    Raport dla każdej planszy (ta sama kolejność): lista błędów, pusta = OK.
+    ``vectorized=None`` – NumPy, jeśli jest zainstalowany.
+    """
+    reports = [_check_header(board) for board in boards]
+    use_numpy = np is not None if vectorized is None else vectorized
+    if not use_numpy:
+        for report, board in zip(reports, boards):
+            if not report:
+                report.extend(check_dots(board.get("rows", 5), board.get("cols", 5), board.get("dots", [])))
+        return reports
+
+    # 1. spłaszczenie kropek poprawnych nagłówkowo plansz do kolumn
+    indexes, sizes, lengths = [], [], []
+    flat_rows, flat_cols, flat_colors = [], [], []
+    for index, (report, board) in enumerate(zip(reports, boards)):
+        if report:
+            continue
+        columns = _columns(board.get("dots", []))
+        if columns is None:
+            report.append(MALFORMED)
+            continue
+        indexes.append(index)
+        sizes.append((board.get("rows", 5), board.get("cols", 5)))
+        lengths.append(len(columns[0]))
+        flat_rows.extend(columns[0])
+        flat_cols.extend(columns[1])
+        flat_colors.extend(columns[2])
+    if not flat_rows:
+        return reports
+
+    board = np.repeat(np.arange(len(indexes)), lengths)   # pozycja planszy w ``indexes``
+    bounds = np.asarray(sizes, dtype=np.int64)
+    r = np.asarray(flat_rows, dtype=np.int64)
+    c = np.asarray(flat_cols, dtype=np.int64)
+    # kody kolorów przez słownik (map w C) – np.unique na napisach jest wolniejszy
+    lookup = {name: code for code, name in enumerate(dict.fromkeys(flat_colors))}
+    codes = list(lookup)
+    color = np.fromiter(map(lookup.__getitem__, flat_colors), dtype=np.int64, count=len(flat_colors))
+
+    def flag(positions, message):
+        for position in np.unique(positions).tolist():
+            reports[indexes[position]].append(message)
+
+    # 2. zakres
+    R, C = bounds[board, 0], bounds[board, 1]
+    outside = (r < 0) | (r >= R) | (c < 0) | (c >= C)
+    flag(board[outside], OUT_OF_RANGE)
+
+    # 3. duplikaty pól: pola w siatce numerujemy wspólnie dla całej partii
+    #    (przesunięcie planszy + r·cols + c); po sortowaniu duplikat to dwa
+    #    równe sąsiednie klucze.  Plansze z kropkami poza siatką – w Pythonie.
+    area = bounds[:, 0] * bounds[:, 1]
+    offsets = np.cumsum(area) - area
+    inside = ~outside
+    keys = np.sort(offsets[board[inside]] + r[inside] * C[inside] + c[inside])
+    twins = keys[1:][keys[1:] == keys[:-1]]
+    duplicated = set(np.searchsorted(offsets, twins, side="right") - 1)
+    for position in np.unique(board[outside]).tolist():
+        rs, cs, _ = _columns(boards[indexes[position]]["dots"])
+        if len(set(zip(rs, cs))) != len(rs):
+            duplicated.add(position)
+    flag(np.fromiter(duplicated, dtype=np.int64, count=len(duplicated)), DUPLICATE)
+
+    # 4. liczności kolorów na planszy: klucz (plansza, kolor)
+    keys, counts = np.unique(board * len(codes) + color, return_counts=True)
+    wrong: dict[int, list[str]] = {}
+    for key in keys[counts != 2].tolist():
+        position, code = divmod(key, len(codes))
+        wrong.setdefault(position, []).append(codes[code])
+    for position, colors in wrong.items():
+        # kolejność kolorów jak w Counter – pierwsze wystąpienie na planszy
+        seen = [d["color"] for d in boards[indexes[position]]["dots"]]
+        reports[indexes[position]].append(wrong_colors(sorted(colors, key=seen.index)))
+    return reports
+
+
+def create_boards(owner, boards: Sequence[dict], *, batch_size: int = BATCH_SIZE):
+    """Waliduje partię i zapisuje poprawne plansze; zwraca ``(utworzone, raporty)``."""
+    reports = validate_boards(boards)
+    if settings.BOARD_REQUIRE_SOLVABLE:
+        for report, board in zip(reports, boards):
+            if report:
+                continue
+            result = solver.solve_cached(
+                board.get("rows", 5), board.get("cols", 5), board.get("dots", []),
+                timeout=settings.BOARD_SOLVE_TIMEOUT,
+            )
+            if result.status == solver.UNSOLVABLE:
+                report.append("Plansza nie ma rozwiązania.")
+    objs = [
+        GameBoard(
+            owner=owner, title=board["title"], rows=board.get("rows", 5),
+            cols=board.get("cols", 5), dots=board.get("dots", []),
+        )
+        for report, board in zip(reports, boards) if not report
+    ]
+    return GameBoard.objects.bulk_create(objs, batch_size=batch_size), reports
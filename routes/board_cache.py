@@ -0,0 +1,90 @@
+# routes/board_cache.py
+"""Read-through cache zserializowanej planszy – gotowe bajty JSON.
+
+Odczyt planszy to lekki odczyt ``modified`` po kluczu głównym (ten sam,
+którego i tak potrzebuje walidator ETag z ``routes.conditional``) i jedno
+``cache.get`` zamiast SELECT-a z ``dots`` i serializacji DRF.  Klucze:
+
+• ``FORMAT`` – zmiana ``GameBoardSerializer`` = nowy prefiks, stare wpisy
+  po prostu wygasają,
+• ``modified`` planszy (``auto_now``, µs) – zapis planszy zmienia klucz,
+  więc nieaktualny wpis nie może pasować w żadnym workerze, także przy
+  cache lokalnym dla procesu (LocMem); nie potrzeba unieważniania sygnałem.
+  Wpis zapisujemy pod ``modified`` wyrenderowanego wiersza, nie tym, o który
+  pytano – wyścig z zapisem nie przypisze nowej treści staremu kluczowi.
+
+Stampede: przy braku wpisu liczy tylko jeden proces (``cache.add`` na
+kluczu blokady), reszta czeka na jego wynik najwyżej ``LOCK_TIMEOUT`` s,
+potem liczy sama.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.renderers import JSONRenderer
+
+from .models import GameBoard
+from .serializers import GameBoardSerializer
+
+FORMAT = "v2"
+LOCK_TIMEOUT = 2.0   # s – dłużej żadna serializacja planszy nie trwa
+POLL_INTERVAL = 0.02
+
+
+def _cache():
+    return caches["boards"]
+
+
+def _key(pk: int, modified: datetime) -> str:
+    return f"{FORMAT}:board:{pk}:{int(modified.timestamp() * 1_000_000)}"
+
+
+def _render(pk: int) -> tuple[bytes, datetime] | None:
+    board = GameBoard.objects.filter(pk=pk).first()
+    if board is None:
+        return None
+    return JSONRenderer().render(GameBoardSerializer(board).data), board.modified
+
+
+def _render_and_store(cache, pk: int) -> bytes | None:
+    rendered = _render(pk)
+    if rendered is None:
+        return None
+    data, modified = rendered
+    cache.set(_key(pk, modified), data, timeout=settings.BOARD_JSON_CACHE_TTL)
+    return data
+
+
+def board_json(pk: int, modified: datetime | None = None) -> bytes | None:
+    """
+    JSON planszy jak z ``GameBoardSerializer``; ``None`` – nie ma planszy.
+    ``modified`` – już odczytane przez wołającego (np. walidator ETag).
+    """
+    if modified is None:
+        modified = GameBoard.objects.filter(pk=pk).values_list("modified", flat=True).first()
+        if modified is None:
+            return None
+    cache = _cache()
+    key = _key(pk, modified)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    if cache.add(f"{key}:lock", 1, timeout=LOCK_TIMEOUT):
+        try:
+            return _render_and_store(cache, pk)
+        finally:
+            cache.delete(f"{key}:lock")
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if cache.get(f"{key}:lock") is None:   # zwycięzca skończył bez wyniku (brak planszy)
+            break
+    return _render_and_store(cache, pk)
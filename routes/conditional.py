@@ -0,0 +1,108 @@
+# routes/conditional.py
+"""Warunkowe GET (``ETag`` / ``Last-Modified``) dla plansz i tras.
+
+Walidatory liczymy jednym zapytaniem po kluczu głównym (``values_list``
+– bez ``dots`` i ``packed_points``), zanim widok cokolwiek serializuje;
+przy zgodnym ``If-None-Match`` / ``If-Modified-Since`` dekorator
+``condition`` od razu zwraca 304.
+
+• plansza – ``GameBoard.modified`` (``auto_now``),
+• trasa – ``Route.version`` (licznik zapisów; trasa nie ma ``modified``).
+
+``?fields=`` / ``?summary=`` zmieniają treść odpowiedzi, więc wchodzą do
+ETag-a jako krótki skrót.
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import GameBoard, Route
+
+_VARIANT_PARAMS = ("fields", "summary")
+
+
+def _variant(request) -> str:
+    params = [f"{name}={request.GET[name]}" for name in _VARIANT_PARAMS if name in request.GET]
+    if not params:
+        return ""
+    return "." + hashlib.blake2b("&".join(params).encode(), digest_size=4).hexdigest()
+
+
+def _memo(request, key, compute):
+    """Jedno zapytanie na żądanie, choć ``condition`` pyta o ETag i datę osobno."""
+    cache = request.META.setdefault("routes.conditional", {})
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def board_modified(request, pk=None, **_):
+    if not str(pk).isdigit():
+        return None
+    return _memo(request, ("board", pk), lambda: (
+        GameBoard.objects.filter(pk=pk).values_list("modified", flat=True).first()
+    ))
+
+
+def board_etag(request, pk=None, **_):
+    modified = board_modified(request, pk)
+    if modified is None:
+        return None
+    return f'"b{pk}.{int(modified.timestamp() * 1_000_000)}{_variant(request)}"'
+
+
+def route_etag(request, pk=None, **_):
+    user = getattr(request, "user", None)
+    if not str(pk).isdigit() or user is None or not user.is_authenticated:
+        return None
+    version = _memo(request, ("route", pk), lambda: (
+        Route.objects.filter(pk=pk, owner=user).values_list("version", flat=True).first()
+    ))
+    return None if version is None else f'"r{pk}.{version}{_variant(request)}"'
+
+
+def _with_cache_control(view, validators, **cache_control):
+    conditional_view = validators(view)
+
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, **cache_control)
+        return response
+    return inner
+
+
+def _board_condition(view):
+    return condition(etag_func=board_etag, last_modified_func=board_modified)(view)
+
+
+def public_board(view):
+    """
+    Anonimowy odczyt planszy: 304 po samym ``modified``; plansza wygląda tak
+    samo dla każdego, więc CDN / reverse proxy może ją trzymać
+    ``BOARD_CACHE_MAX_AGE`` sekund.
+    """
+    return _with_cache_control(
+        view, _board_condition, public=True, max_age=settings.BOARD_CACHE_MAX_AGE,
+    )
+
+
+def revalidated_board(view):
+    """
+    Odczyt planszy w edytorze: kopia wolno trzymać, ale przy każdym użyciu
+    sprawdzać ETag-iem – świeżo zapisana plansza nie może wrócić z cache.
+    """
+    return _with_cache_control(view, _board_condition, public=True, no_cache=True)
+
+
+def private_route(view):
+    """Odczyt trasy: prywatna kopia w przeglądarce, zawsze sprawdzana ETag-iem."""
+    return _with_cache_control(
+        view, condition(etag_func=route_etag), private=True, no_cache=True,
+    )
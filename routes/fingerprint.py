@@ -0,0 +1,68 @@
+# routes/fingerprint.py
+"""Kanoniczny odcisk planszy ``GameBoard``.
+
+Dwie plansze są równoważne, jeśli jedna powstaje z drugiej przez obrót,
+odbicie (8 symetrii prostokąta; obrót o 90° zamienia ``rows`` z ``cols``)
+albo zmianę nazw kolorów.  Dla każdej symetrii sortujemy kropki po polu
+i numerujemy kolory w kolejności pierwszego wystąpienia; najmniejsza
+z 8 postaci jest kanoniczna, a jej skrót – odciskiem.
+
+Koszt: 8 × sortowanie kropek (≤ 144 na planszy 12×12), czyli mikrosekundy.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+VERSION = "v1"
+
+# (r, c, rows, cols) → (r', c'); nieparzyste indeksy zamieniają wymiary
+_TRANSFORMS = (
+    lambda r, c, R, C: (r, c),                  # tożsamość
+    lambda r, c, R, C: (c, R - 1 - r),          # obrót o 90°
+    lambda r, c, R, C: (R - 1 - r, C - 1 - c),  # obrót o 180°
+    lambda r, c, R, C: (C - 1 - c, r),          # obrót o 270°
+    lambda r, c, R, C: (r, C - 1 - c),          # odbicie poziome
+    lambda r, c, R, C: (c, r),                  # transpozycja
+    lambda r, c, R, C: (R - 1 - r, c),          # odbicie pionowe
+    lambda r, c, R, C: (C - 1 - c, R - 1 - r),  # antytranspozycja
+)
+_INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)
+
+
+@dataclass(frozen=True)
+class Canonical:
+    """Postać kanoniczna planszy i droga powrotna do oryginału."""
+    fingerprint: str
+    rows: int
+    cols: int
+    dots: tuple[tuple[int, int, int], ...]  # (row, col, nr koloru), posortowane
+    transform: int
+    colors: tuple[str, ...]                 # nr koloru → kolor oryginału
+
+    def dot_dicts(self) -> list[dict]:
+        """Kropki w formacie ``GameBoard.dots`` (kolory to numery)."""
+        return [{"row": r, "col": c, "color": str(k)} for r, c, k in self.dots]
+
+    def restore(self, row: int, col: int) -> tuple[int, int]:
+        """Pole planszy kanonicznej → pole oryginału."""
+        return _TRANSFORMS[_INVERSE[self.transform]](row, col, self.rows, self.cols)
+
+
+def canonical(rows: int, cols: int, dots: list[dict]) -> Canonical:
+    best = None
+    for index, transform in enumerate(_TRANSFORMS):
+        R, C = (cols, rows) if index % 2 else (rows, cols)
+        placed = sorted(
+            (*transform(d["row"], d["col"], rows, cols), d["color"]) for d in dots
+        )
+        labels: dict[str, int] = {}
+        key = (R, C, tuple((r, c, labels.setdefault(color, len(labels))) for r, c, color in placed))
+        if best is None or key < best[0]:
+            best = (key, index, tuple(labels))
+    (R, C, placed), index, colors = best
+    digest = hashlib.blake2b(repr((R, C, placed)).encode(), digest_size=16).hexdigest()
+    return Canonical(
+        fingerprint=f"{VERSION}:{digest}", rows=R, cols=C, dots=placed,
+        transform=index, colors=colors,
+    )
@@ -1,15 +1,15 @@
 from django import forms
-from .models import RoutePoint, Route, GameBoard
+from .models import Route, GameBoard
 
 class RouteCreateForm(forms.ModelForm):
     class Meta:
         model = Route
         fields = ["name", "background"]
 
-class PointForm(forms.ModelForm):
-    class Meta:
-        model = RoutePoint
-        fields = ["x", "y"]
+class PointForm(forms.Form):
+    """Nowy wierzchołek – dopisywany do ``Route.coords``."""
+    x = forms.IntegerField(min_value=0)
+    y = forms.IntegerField(min_value=0)
 
 class BoardForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,55 @@
+# routes/geometry.py
+"""Upakowana geometria ścieżki (``Route.packed_points``).
+
+Zamiast wiersza ``RoutePoint`` na każdy wierzchołek trzymamy całą ścieżkę
+w jednym polu binarnym:
+
+• pusty ciąg – brak punktów,
+• ``0x01`` + pary uint8 ``(x, y)`` – format podstawowy, 2 B na punkt
+  (plansze do 255×255; ścieżka 12×12 to najwyżej 289 B),
+• ``0x02`` + pary uint16 little‑endian – tylko gdy któraś współrzędna
+  nie mieści się w bajcie (stare trasy sprzed plansz).
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Iterable
+
+Point = tuple[int, int]
+
+MAX_COORD = 0xFFFF
+
+_U8 = 1
+_U16 = 2
+
+
+def pack(points: Iterable[Point]) -> bytes:
+    """``[(x, y), …]`` → bajty; ``ValueError`` dla współrzędnych spoza zakresu."""
+    flat = [v for point in points for v in point]
+    if not flat:
+        return b""
+    if min(flat) < 0 or max(flat) > MAX_COORD:
+        raise ValueError(f"Współrzędne punktów muszą być w zakresie 0…{MAX_COORD}.")
+    if max(flat) <= 0xFF:
+        return bytes([_U8, *flat])
+    words = array("H", flat)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return bytes([_U16]) + words.tobytes()
+
+
+def unpack(data: bytes | memoryview | None) -> list[Point]:
+    """Odwrotność :func:`pack` (Postgres zwraca ``memoryview``)."""
+    if not data:
+        return []
+    data = bytes(data)
+    if data[0] == _U8:
+        flat = data[1:]
+    elif data[0] == _U16:
+        flat = array("H", data[1:])
+        if sys.byteorder == "big":
+            flat.byteswap()
+    else:
+        raise ValueError(f"Nieznany format geometrii: {data[0]:#x}.")
+    return list(zip(flat[::2], flat[1::2]))
@@ -0,0 +1,85 @@
+# routes/management/commands/bench_board_validation.py
+"""
+Porównanie walidacji partii plansz: GameBoardSerializer po jednej planszy
+vs routes.batch (pętla w Pythonie i NumPy, jeśli jest).
+
+    python manage.py bench_board_validation --boards 5000 --colors 8
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from routes import batch
+from routes.serializers import GameBoardSerializer
+
+
+def synthetic_boards(count: int, colors: int, size: int, invalid: float, seed: int) -> list[dict]:
+    """Losowe plansze size×size po ``colors`` par; część ``invalid`` psujemy."""
+    rng = random.Random(seed)
+    boards = []
+    for i in range(count):
+        cells = rng.sample(range(size * size), 2 * colors)
+        dots = [
+            {"row": cell // size, "col": cell % size, "color": f"#{k // 2:06x}"}
+            for k, cell in enumerate(cells)
+        ]
+        if rng.random() < invalid:
+            broken = rng.choice(dots[1:])
+            kind = rng.randrange(3)
+            if kind == 0:
+                broken["row"] = size                       # poza planszą
+            elif kind == 1:
+                broken.update(row=dots[0]["row"], col=dots[0]["col"])  # duplikat pola
+            else:
+                broken["color"] = "#ffffff"                # kolor 1×
+        boards.append({"title": f"bench {i}", "rows": size, "cols": size, "dots": dots})
+    return boards
+
+
+class Command(BaseCommand):
+    help = "Benchmark: walidacja plansz serializerem vs routes.batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--boards", type=int, default=5000)
+        parser.add_argument("--colors", type=int, default=8)
+        parser.add_argument("--size", type=int, default=12)
+        parser.add_argument("--invalid", type=float, default=0.1, help="odsetek błędnych plansz")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, boards, colors, size, invalid, repeat, seed, **options):
+        data = synthetic_boards(boards, colors, size, invalid, seed)
+
+        def serializer_path():
+            return [GameBoardSerializer(data=board).is_valid() for board in data]
+
+        paths = [("serializer", serializer_path),
+                 ("batch/python", lambda: batch.validate_boards(data, vectorized=False))]
+        if batch.np is not None:
+            paths.append(("batch/numpy", lambda: batch.validate_boards(data, vectorized=True)))
+        else:
+            self.stdout.write("NumPy niezainstalowany – pomijam batch/numpy.")
+
+        results, baseline = {}, None
+        with override_settings(BOARD_REQUIRE_SOLVABLE=False):
+            for name, run in paths:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    out = run()
+                    best = min(best, time.perf_counter() - start)
+                results[name] = [bool(r) if name == "serializer" else not r for r in out]
+                baseline = baseline or best
+                self.stdout.write(
+                    f"{name:<13} {best * 1000:9.1f} ms  {best / len(data) * 1e6:7.1f} µs/planszę"
+                    f"  ×{baseline / best:.1f}"
+                )
+
+        verdicts = list(results.values())
+        if any(v != verdicts[0] for v in verdicts[1:]):
+            self.stderr.write(self.style.ERROR("Rozbieżne wyniki walidacji!"))
+        else:
+            ok = sum(verdicts[0])
+            self.stdout.write(self.style.SUCCESS(f"Wyniki zgodne: {ok}/{len(data)} poprawnych."))
@@ -0,0 +1,321 @@
+# routes/management/commands/benchmark.py
+"""
+Benchmark API, widoków HTML i fan-outu SSE na syntetycznych danych:
+
+    python manage.py benchmark --users 20 --boards 50 --routes 20 --requests 300
+    python manage.py benchmark --output wyniki.json --compare poprzednie.json
+    python manage.py benchmark --sse-clients 500 --sse-redis      # lokalny Redis
+
+Domyślnie wszystko dzieje się w osobnej bazie testowej (``create_test_db``
+– SQLite w pamięci albo ``test_<nazwa>`` na lokalnym PostgreSQL), więc
+wynik nie zależy od zawartości bazy deweloperskiej.  Żądania idą przez
+``django.test.Client`` (w procesie, bez sieci) jedno po drugim: liczymy
+opóźnienia p50/p90/p99 i przepustowość pojedynczego workera.  Wynik
+trafia do pliku JSON; ``--compare`` wypisuje zmianę względem starszego.
+"""
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from routes import sse, synthetic
+from routes.models import GameBoard, Route
+
+
+def _summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    total = sum(ordered)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / total, 1) if total else None,
+        "mean_ms": round(total / len(ordered) * 1000, 3),
+        "p50_ms": pick(0.5),
+        "p90_ms": pick(0.9),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _database() -> str:
+    if connection.vendor == "sqlite":
+        return f"sqlite {connection.Database.sqlite_version}"
+    if connection.vendor == "postgresql":
+        connection.ensure_connection()
+        return f"postgresql {connection.pg_version}"
+    return connection.vendor
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark /api/boards/, /api/routes/…/points/bulk/, /boards/ i fan-outu SSE."
+
+    def add_arguments(self, parser):
+        scale = parser.add_argument_group("skala danych")
+        scale.add_argument("--users", type=int, default=20)
+        scale.add_argument("--boards", type=int, default=50, help="plansz na użytkownika")
+        scale.add_argument("--routes", type=int, default=20, help="tras na użytkownika")
+        scale.add_argument("--size", type=int, default=12, help="bok planszy")
+        scale.add_argument("--colors", type=int, default=8)
+        scale.add_argument("--seed", type=int, default=0)
+
+        run = parser.add_argument_group("pomiar")
+        run.add_argument("--requests", type=int, default=200, help="żądań na endpoint")
+        run.add_argument("--warmup", type=int, default=20)
+        run.add_argument("--only", nargs="*", help="tylko wybrane endpointy (nazwy z wyniku)")
+        run.add_argument("--sse-clients", type=int, default=100, help="0 – bez części SSE")
+        run.add_argument("--sse-events", type=int, default=200)
+        run.add_argument("--sse-rate", type=float, default=200.0, help="zdarzeń na sekundę")
+        run.add_argument("--sse-redis", action="store_true",
+                         help="fan-out przez Redis (REDIS_URL) zamiast trybu in-memory")
+        run.add_argument("--in-place", action="store_true",
+                         help="bieżąca baza zamiast testowej (dane i tak są dopisywane)")
+
+        out = parser.add_argument_group("wynik")
+        out.add_argument("--output", help="plik JSON (domyślnie bench-<czas>.json)")
+        out.add_argument("--compare", help="poprzedni wynik JSON do porównania")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Nie można wczytać {options['compare']}: {exc}")
+
+        try:
+            # DEBUG=False jak na produkcji (bez logu zapytań), ALLOWED_HOSTS += testserver
+            setup_test_environment(debug=False)
+            own_environment = True
+        except RuntimeError:           # już w środowisku testowym (manage.py test)
+            own_environment = False
+        old_name = None
+        if not options["in_place"]:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            result = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            if own_environment:
+                teardown_test_environment()
+
+        path = options["output"] or f"bench-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2, ensure_ascii=False)
+        self.report(result, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Zapisano {path}"))
+
+    # ------------------------------------------------------------------ pomiar
+
+    def run(self, options) -> dict:
+        for alias in ("default", "boards", "solver"):
+            caches[alias].clear()
+        # --in-place: własny prefiks, żeby nie zderzyć się z poprzednim przebiegiem
+        prefix = f"bench{int(time.time())}-" if options["in_place"] else "bench"
+        started = time.perf_counter()
+        seeded = synthetic.seed(
+            users=options["users"], boards_per_user=options["boards"],
+            routes_per_user=options["routes"], size=options["size"],
+            colors=options["colors"], seed=options["seed"], prefix=prefix,
+        )
+        seed_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f"Dane: {seeded['users']} użytk., {seeded['boards']} plansz, {seeded['routes']} tras "
+            f"({seed_seconds:.1f} s)"
+        )
+
+        rng = random.Random(options["seed"])
+        user = get_user_model().objects.get(username=f"{prefix}0")
+        board_ids = list(GameBoard.objects.filter(title__startswith=f"{prefix} ").values_list("pk", flat=True))
+        routes = list(Route.objects.filter(owner=user).only("id", "packed_points"))
+        if not routes:
+            raise CommandError("Benchmark wymaga --routes ≥ 1.")
+        client = Client()
+        client.force_login(user)
+
+        def bulk_put():
+            route = rng.choice(routes)
+            body = [{"x": x, "y": y} for x, y in route.coords]
+            return client.put(f"/api/routes/{route.pk}/points/bulk/", body, content_type="application/json")
+
+        scenarios = {
+            "api_boards_list": lambda: client.get("/api/boards/"),
+            "api_boards_list_summary": lambda: client.get("/api/boards/?summary=1"),
+            "api_board_retrieve": lambda: client.get(f"/api/boards/{rng.choice(board_ids)}/"),
+            "api_routes_list": lambda: client.get("/api/routes/"),
+            "api_route_points_bulk_put": bulk_put,
+            "html_board_list": lambda: client.get("/boards/"),
+            "html_board_list_mine": lambda: client.get("/boards/my"),
+        }
+        if options["only"]:
+            unknown = set(options["only"]) - set(scenarios)
+            if unknown:
+                raise CommandError(f"Nieznane endpointy: {', '.join(sorted(unknown))}")
+            scenarios = {name: scenarios[name] for name in options["only"]}
+
+        endpoints = {}
+        for name, call in scenarios.items():
+            endpoints[name] = self.measure(name, call, options["requests"], options["warmup"])
+
+        result = {
+            "meta": {
+                "at": datetime.now(timezone.utc).isoformat(),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": _database(),
+                "cpu_count": os.cpu_count(),
+                "options": {k: options[k] for k in (
+                    "users", "boards", "routes", "size", "colors", "seed", "requests", "warmup",
+                    "sse_clients", "sse_events", "sse_rate", "sse_redis", "in_place",
+                )},
+            },
+            "seed": {**seeded, "seconds": round(seed_seconds, 2)},
+            "endpoints": endpoints,
+        }
+        if options["sse_clients"]:
+            result["sse"] = self.measure_sse(
+                options["sse_clients"], options["sse_events"], options["sse_rate"], options["sse_redis"],
+            )
+        return result
+
+    def measure(self, name: str, call, requests: int, warmup: int) -> dict:
+        for _ in range(warmup):
+            call()
+        with CaptureQueriesContext(connection) as captured:
+            response = call()
+        queries = len(captured)   # od razu – request_started czyści log zapytań
+        if response.status_code >= 400:
+            raise CommandError(f"{name}: HTTP {response.status_code}")
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+        return {**_summary(latencies), "queries": queries, "status": response.status_code}
+
+    def measure_sse(self, clients: int, events: int, rate: float, use_redis: bool) -> dict:
+        """
+        ``clients`` subskrybentów wątkowych (jak ``event_stream``) na własnym
+        temacie; publikacja ``events`` zdarzeń w tempie ``rate``/s.  Opóźnienie
+        = czas publikacji (``_Event.published``) → odbiór przez wątek klienta.
+        """
+        topic = f"bench:{os.getpid()}"
+        if use_redis:
+            sse.start()
+            if not sse._link.healthy:
+                raise CommandError(f"Redis niedostępny ({sse._link.last_error}).")
+
+            def publish(body):
+                sse._link.log.publish((topic,), "", body)
+        else:
+            def publish(body):
+                sse._local_log.publish((topic,), "", body)
+
+        subscribers = [sse._subscribe(topic) for _ in range(clients)]
+        received = [[] for _ in subscribers]
+        done = threading.Event()
+
+        def consume(sub, out):
+            while len(out) + sub.dropped < events and not done.is_set():
+                batch = sub.take(0.2)
+                now = time.time()
+                out.extend(now - event.published for event in batch if event.published is not None)
+
+        threads = [
+            threading.Thread(target=consume, args=(sub, out), daemon=True)
+            for sub, out in zip(subscribers, received)
+        ]
+        for thread in threads:
+            thread.start()
+        if use_redis:
+            time.sleep(0.5)   # listener musi zdążyć zasubskrybować kanały
+
+        started = time.perf_counter()
+        for n in range(events):
+            publish(f"event: bench\ndata: {json.dumps({'n': n})}\n\n")
+            delay = started + (n + 1) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        publish_seconds = time.perf_counter() - started
+        deadline = time.monotonic() + 10
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        done.set()
+        for sub in subscribers:
+            sse._unsubscribe(sub)
+
+        latencies = [value for out in received for value in out]
+        delivered = len(latencies)
+        summary = _summary(latencies) if latencies else {}
+        return {
+            "mode": "redis" if use_redis else "memory",
+            "clients": clients,
+            "events": events,
+            "publish_rate": round(events / publish_seconds, 1),
+            "delivered": delivered,
+            "expected": clients * events,
+            "dropped": sum(sub.dropped for sub in subscribers),
+            "latency": {k: v for k, v in summary.items() if k.endswith("_ms")},
+        }
+
+    # ------------------------------------------------------------------ raport
+
+    def report(self, result: dict, baseline: dict | None) -> None:
+        before = (baseline or {}).get("endpoints", {})
+        self.stdout.write(f"{'endpoint':<28}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'SQL':>5}")
+        for name, row in result["endpoints"].items():
+            line = (f"{name:<28}{row['throughput_rps']:>9}{row['p50_ms']:>10}"
+                    f"{row['p99_ms']:>10}{row['queries']:>5}")
+            old = before.get(name)
+            if old:
+                line += "   p50 " + self._delta(old["p50_ms"], row["p50_ms"])
+                line += "  p99 " + self._delta(old["p99_ms"], row["p99_ms"])
+            self.stdout.write(line)
+        if "sse" in result:
+            s = result["sse"]
+            latency = s["latency"]
+            line = (f"SSE {s['mode']}: {s['clients']} klientów × {s['events']} zdarzeń, "
+                    f"dostarczono {s['delivered']}/{s['expected']}, wyrzucono {s['dropped']}, "
+                    f"p50 {latency.get('p50_ms')} ms, p99 {latency.get('p99_ms')} ms")
+            old = (baseline or {}).get("sse", {}).get("latency")
+            if old and latency:
+                line += "   p99 " + self._delta(old["p99_ms"], latency["p99_ms"])
+            self.stdout.write(line)
+
+    def _delta(self, old: float, new: float) -> str:
+        if not old:
+            return "–"
+        change = (new - old) / old * 100
+        text = f"{change:+.0f}%"
+        if change > 10:
+            return self.style.ERROR(text)
+        if change < -10:
+            return self.style.SUCCESS(text)
+        return text
@@ -0,0 +1,36 @@
+# routes/management/commands/export_boards.py
+"""
+Eksport plansz do NDJSON (domyślnie na stdout), stałą pamięcią:
+
+    python manage.py export_boards > plansze.ndjson
+    python manage.py export_boards plansze.ndjson --owner jan
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from routes import ndjson
+from routes.models import GameBoard
+
+
+class Command(BaseCommand):
+    help = "Zapisuje plansze jako NDJSON (iterator z chunk_size, bez listy w pamięci)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="plik wyjściowy albo - (stdout)")
+        parser.add_argument("--owner", help="tylko plansze tego użytkownika (username)")
+        parser.add_argument("--chunk-size", type=int, default=ndjson.CHUNK_SIZE)
+
+    def handle(self, *args, path, owner, chunk_size, **options):
+        queryset = GameBoard.objects.all()
+        if owner:
+            queryset = queryset.filter(owner__username=owner)
+        chunks = ndjson.export_boards(queryset, chunk_size=chunk_size)
+        if path == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
+            return
+        try:
+            with open(path, "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+        except OSError as exc:
+            raise CommandError(f"Nie można zapisać {path}: {exc}")
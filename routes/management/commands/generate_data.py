@@ -0,0 +1,127 @@
+# routes/management/commands/generate_data.py
+"""
+Syntetyczne dane do testów skali – poprawne, rozwiązywalne plansze i trasy
+zgodne z ich kropkami (``routes.synthetic``):
+
+    python manage.py generate_data --boards 1000000 --routes 1000000 --users 10000 --workers 8
+    python manage.py generate_data --boards 5000 --seed 7 --clear --no-signals
+
+Zapis wyłącznie przez ``bulk_create`` partiami po ``--batch-size`` plansz
+(jedna transakcja na partię), więc bez ``save()`` i bez sygnałów
+``post_save``.  Ten sam ``--seed`` i ``--batch-size`` dają te same dane
+przy dowolnej liczbie ``--workers``.  Punkty tras są upakowane w
+``Route.packed_points`` – „10 mln punktów” to suma wierzchołków tras.
+"""
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+_owners: list[int] = []
+
+
+def _init_worker(owners: list[int]) -> None:
+    """Start procesu roboczego – przy „spawn” to świeży interpreter bez Django."""
+    global _owners
+    django.setup()
+    connections.close_all()     # przy „fork” nie dzielimy połączenia z rodzicem
+    _owners = owners
+
+
+def _chunk(job: dict) -> dict[str, int]:
+    from routes import synthetic    # modele dopiero po django.setup()
+
+    return synthetic.generate(**job, owners=_owners)
+
+
+class Command(BaseCommand):
+    help = "Generuje poprawne plansze i trasy hurtem (bulk_create, seed, wiele procesów)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--boards", type=int, default=1000)
+        parser.add_argument("--routes", type=int, default=0, help="łączna liczba tras")
+        parser.add_argument("--users", type=int, default=100, help="właściciele plansz i gracze")
+        parser.add_argument("--min-size", type=int, default=5)
+        parser.add_argument("--max-size", type=int, default=15)
+        parser.add_argument("--max-colors", type=int, default=12)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000, help="plansz na partię/transakcję")
+        parser.add_argument("--workers", type=int, default=1, help="procesy generujące równolegle")
+        parser.add_argument("--prefix", default="syn", help="użytkownicy <prefix><i>, plansze „<prefix> <nr>”")
+        parser.add_argument("--clear", action="store_true", help="najpierw usuń dane z tym prefiksem")
+        parser.add_argument(
+            "--no-signals", action="store_false", dest="signals",
+            help="bez sygnałów modeli przy --clear (SSE, cache plansz) – szybka kaskada",
+        )
+
+    def handle(self, *args, **options):
+        from routes import synthetic
+
+        boards, routes, users = options["boards"], options["routes"], options["users"]
+        sizes = (options["min_size"], options["max_size"])
+        workers, batch_size, prefix = options["workers"], options["batch_size"], options["prefix"]
+        if min(boards, users, batch_size, workers) < 1 or routes < 0:
+            raise CommandError("--boards, --users, --batch-size i --workers muszą być ≥ 1.")
+        if not 2 <= sizes[0] <= sizes[1]:
+            raise CommandError("Wymagane 2 ≤ --min-size ≤ --max-size.")
+        if options["max_colors"] < 2:
+            raise CommandError("--max-colors musi być ≥ 2.")
+        if routes > boards * users:
+            raise CommandError("Każdy gracz ma najwyżej jedną trasę na planszę: --routes ≤ boards × users.")
+        if workers > 1 and connection.vendor == "sqlite":
+            raise CommandError("SQLite nie zniesie równoległych zapisów – użyj --workers 1.")
+
+        User = get_user_model()
+        existing = User.objects.filter(username__regex=rf"^{re.escape(prefix)}[0-9]+$")
+        if options["clear"]:
+            started = time.perf_counter()
+            if options["signals"]:
+                deleted, _ = existing.delete()
+            else:
+                with synthetic.muted_signals():
+                    deleted, _ = existing.delete()
+            self.stdout.write(f"Usunięto {deleted} wierszy ({time.perf_counter() - started:.1f} s)")
+        elif existing.exists():
+            raise CommandError(f"Są już użytkownicy {prefix}<i> – dodaj --clear albo zmień --prefix.")
+
+        owners = [user.pk for user in synthetic.create_users(prefix, users)]
+        jobs = [
+            {
+                "seed": options["seed"], "start": start, "count": min(batch_size, boards - start),
+                "routes": routes * min(start + batch_size, boards) // boards - routes * start // boards,
+                "sizes": sizes, "max_colors": options["max_colors"], "prefix": prefix,
+            }
+            for start in range(0, boards, batch_size)
+        ]
+
+        self.progress = options["verbosity"] >= 2
+        started = time.perf_counter()
+        total = {"boards": 0, "routes": 0, "points": 0}
+        if workers == 1:
+            results = (synthetic.generate(**job, owners=owners) for job in jobs)
+            self._collect(results, total, boards, started)
+        else:
+            connections.close_all()     # procesy robocze otwierają własne
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(owners,)) as pool:
+                self._collect(pool.map(_chunk, jobs), total, boards, started)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{users} użytk., {total['boards']} plansz, {total['routes']} tras "
+            f"({total['points']} punktów) w {elapsed:.1f} s "
+            f"({total['boards'] / max(elapsed, 1e-9):.0f} plansz/s)"
+        ))
+
+    def _collect(self, results, total: dict, boards: int, started: float) -> None:
+        for result in results:
+            for key in total:
+                total[key] += result[key]
+            if self.progress:
+                self.stdout.write(
+                    f"  {total['boards']}/{boards} plansz, {total['routes']} tras "
+                    f"({time.perf_counter() - started:.1f} s)"
+                )
@@ -0,0 +1,44 @@
+# routes/management/commands/import_boards.py
+"""
+Import plansz z pliku NDJSON (jedna plansza na linię; ``-`` – stdin):
+
+    python manage.py import_boards plansze.ndjson --owner jan
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from routes import batch, ndjson
+
+
+class Command(BaseCommand):
+    help = "Importuje plansze z NDJSON partiami (routes.batch + bulk_create)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="plik NDJSON albo - (stdin)")
+        parser.add_argument("--owner", required=True, help="właściciel plansz (username)")
+        parser.add_argument("--batch-size", type=int, default=batch.BATCH_SIZE)
+
+    def handle(self, *args, path, owner, batch_size, **options):
+        try:
+            user = get_user_model().objects.get(username=owner)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Nie ma użytkownika {owner}.")
+        try:
+            fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"Nie można otworzyć {path}: {exc}")
+        try:
+            summary = ndjson.import_boards(user, fh, batch_size=batch_size)
+        finally:
+            if fh is not sys.stdin:     # stdin nie nasz – nie zamykamy
+                fh.close()
+
+        for line, messages in summary.errors.items():
+            for message in messages:
+                self.stdout.write(f"linia {line}: {message}")
+        if summary.invalid > len(summary.errors):
+            self.stdout.write(f"… i {summary.invalid - len(summary.errors)} kolejnych błędnych linii")
+        text = f"{summary.lines} linii, utworzono {summary.created}, błędnych {summary.invalid}"
+        self.stdout.write(self.style.SUCCESS(text) if not summary.invalid else self.style.WARNING(text))
@@ -0,0 +1,70 @@
+# routes/management/commands/sse_stats.py
+"""
+Stan SSE wszystkich workerów – z raportów, które listenery co kilka sekund
+zapisują w Redis (``routes.sse._StatsReporter``):
+
+    python manage.py sse_stats
+    python manage.py sse_stats --json
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from routes import sse
+
+COLUMNS = (
+    ("worker", 24), ("conn", 5), ("queue p50/p99/max", 17), ("deliver p50/p99 ms", 18),
+    ("lag p99 ms", 10), ("dropped", 7), ("coalesced", 9), ("discon.", 7),
+    ("unpubl.", 7), ("resumed", 7), ("resync", 6), ("reconn.", 7), ("redis", 5), ("age s", 5),
+)
+
+
+def _ms(value) -> str:
+    return "–" if value is None else f"{value:g}"
+
+
+class Command(BaseCommand):
+    help = "Połączenia, kolejki, opóźnienia i straty SSE per worker (raporty w Redis)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", dest="as_json", help="surowe raporty jako JSON")
+
+    def handle(self, *args, as_json, **options):
+        import redis
+
+        try:
+            reports = sse.worker_stats()
+        except redis.RedisError as exc:
+            raise CommandError(
+                f"Redis niedostępny ({exc}) – stan pojedynczego workera: /sse/stats/ lub /metrics."
+            )
+        if as_json:
+            self.stdout.write(json.dumps(reports, indent=2, ensure_ascii=False))
+            return
+        if not reports:
+            self.stdout.write("Brak raportów – żaden worker nie ma aktywnego listenera SSE.")
+            return
+
+        now = time.time()
+        self.stdout.write("  ".join(name.ljust(width) for name, width in COLUMNS))
+        for r in reports:
+            queue, deliver = r["queue_depth"], r["delivery_latency_ms"]
+            row = (
+                r["worker"], r["connections"],
+                f"{queue['p50']}/{queue['p99']}/{queue['max']}",
+                f"{_ms(deliver['p50'])}/{_ms(deliver['p99'])}",
+                _ms(r["listener_lag_ms"]["p99"]),
+                r["dropped"], r["coalesced"], r["disconnected"], r["unpublished"],
+                r["resumed"], r["resynced"], r["redis"]["reconnects"], r["redis"]["status"],
+                f"{now - r['reported_at']:.0f}",
+            )
+            self.stdout.write("  ".join(str(v).ljust(width) for v, (_, width) in zip(row, COLUMNS)))
+
+        totals = {key: sum(r[key] for r in reports)
+                  for key in ("connections", "dropped", "disconnected", "unpublished", "resynced")}
+        self.stdout.write(self.style.SUCCESS(
+            f"Razem {len(reports)} workerów: {totals['connections']} połączeń, "
+            f"{totals['dropped']} wyrzuconych zdarzeń, {totals['disconnected']} rozłączonych klientów, "
+            f"{totals['unpublished']} nieopublikowanych, {totals['resynced']} resync."
+        ))
@@ -0,0 +1,54 @@
+# routes/management/commands/validate_boards.py
+"""
+Walidacja (i opcjonalnie import) pliku JSON z listą plansz:
+
+    python manage.py validate_boards plansze.json
+    python manage.py validate_boards plansze.json --create --owner jan
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from routes import batch
+
+
+class Command(BaseCommand):
+    help = "Sprawdza listę plansz z pliku JSON (routes.batch); z --create zapisuje poprawne."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="plik JSON: [{\"title\", \"rows\", \"cols\", \"dots\"}, …]")
+        parser.add_argument("--create", action="store_true", help="zapisz poprawne plansze")
+        parser.add_argument("--owner", help="właściciel tworzonych plansz (username)")
+        parser.add_argument("--batch-size", type=int, default=batch.BATCH_SIZE)
+
+    def handle(self, *args, path, create, owner, batch_size, **options):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                boards = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Nie można wczytać {path}: {exc}")
+        if not isinstance(boards, list):
+            raise CommandError("Plik musi zawierać listę plansz.")
+
+        if create:
+            if not owner:
+                raise CommandError("--create wymaga --owner.")
+            try:
+                user = get_user_model().objects.get(username=owner)
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Nie ma użytkownika {owner}.")
+            with transaction.atomic():
+                created, reports = batch.create_boards(user, boards, batch_size=batch_size)
+        else:
+            created, reports = [], batch.validate_boards(boards)
+
+        for index, report in enumerate(reports):
+            for message in report:
+                self.stdout.write(f"#{index}: {message}")
+        invalid = sum(1 for report in reports if report)
+        summary = f"{len(boards)} plansz, poprawnych {len(boards) - invalid}, błędnych {invalid}"
+        if create:
+            summary += f", utworzono {len(created)}"
+        self.stdout.write(self.style.SUCCESS(summary) if not invalid else self.style.WARNING(summary))
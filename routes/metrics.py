@@ -0,0 +1,363 @@
+# routes/metrics.py
+"""Profilowanie żądań i endpoint ``/metrics`` w formacie Prometheusa.
+
+``MetricsMiddleware`` (włączany ``METRICS_ENABLED=1``; inaczej
+``MiddlewareNotUsed`` – zostaje tylko pusty wrapper SQL) mierzy dla każdego widoku
+(``resolver_match.view_name``), metody i kodu odpowiedzi:
+
+• czas obsługi żądania,
+• liczbę i łączny czas zapytań SQL (``execute_wrapper`` na każdym połączeniu,
+  także w wątkach ``sync_to_async`` pod ASGI),
+• czas serializerów DRF (``TimedSerializerMixin`` w ``routes.serializers``:
+  walidacja + ``to_representation``; zapytania leniwe z serializera liczą
+  się do obu miar),
+• rozmiar odpowiedzi w bajtach.
+
+Inne moduły dopisują własne metryki przez :func:`register_collector`
+(np. ``routes.sse`` – połączenia, kolejki, opóźnienia fan-outu).
+
+Próbkowanie: mierzone jest tylko ``METRICS_SAMPLE_RATE`` żądań (losowo),
+reszta przechodzi bez pomiarów (wrapper SQL kosztuje ją jeden odczyt
+contextvar na zapytanie) – zwiększa się jedynie licznik
+``editor_http_requests_total``.  Przy ``0.01``–``0.05`` narzut
+na produkcji jest poniżej 1 %; histogramy liczą wtedy próbkę, a nie
+wszystkie żądania (``editor_metrics_sample_rate`` podaje mnożnik).
+
+Rejestr jest per proces – przy kilku workerach Prometheus powinien
+zbierać z każdego osobno (albo z jednego workera za osobnym portem).
+
+Zapytania przypisujemy żądaniu przez contextvar, nie przez wątek: wrapper
+``_count_query`` siedzi na stałe na każdym połączeniu (sygnał
+``connection_created``, moduł ładuje ``RoutesConfig.ready``), a ``sync_to_async`` przenosi kontekst do wątku
+z połączeniem – pod ASGI widoki synchroniczne i zapytania z widoków
+asynchronicznych liczą się tak samo jak pod WSGI.
+"""
+from __future__ import annotations
+
+import contextvars
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "editor_"
+PATH = "/metrics"   # samego scrape'u nie liczymy
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# nazwa → (opis, kubełki); kolejność = kolejność w /metrics
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("Czas obsługi żądania.", SECONDS_BUCKETS),
+    "db_queries_per_request": ("Liczba zapytań SQL na żądanie.", QUERY_BUCKETS),
+    "db_query_duration_seconds": ("Łączny czas zapytań SQL na żądanie.", SECONDS_BUCKETS),
+    "serializer_duration_seconds": ("Łączny czas serializerów DRF na żądanie.", SECONDS_BUCKETS),
+    "http_response_size_bytes": ("Rozmiar treści odpowiedzi.", BYTES_BUCKETS),
+}
+LABELS = ("view", "method", "status")
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)   # ostatni – +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, buckets, value: float) -> None:
+        self.counts[bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _histogram_lines(name: str, labels: str, buckets, counts, total: float, count: int) -> list[str]:
+    sep = "," if labels else ""
+    lines, cumulative = [], 0
+    for bound, n in zip((*buckets, "+Inf"), counts):
+        cumulative += n
+        lines.append(f'{PREFIX}{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{PREFIX}{name}_sum{suffix} {total:.6g}")
+    lines.append(f"{PREFIX}{name}_count{suffix} {count}")
+    return lines
+
+
+def header(name: str, kind: str, help_text: str) -> list[str]:
+    return [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} {kind}"]
+
+
+def sample(name: str, value, **labels) -> str:
+    """Jedna linia ``editor_<name>{labels} value``."""
+    if labels:
+        inner = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        return f"{PREFIX}{name}{{{inner}}} {value}"
+    return f"{PREFIX}{name} {value}"
+
+
+class Histogram:
+    """Samodzielny histogram (bez etykiet) dla innych modułów, np. ``routes.sse``."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._data = _Histogram(self.buckets)
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._data.add(self.buckets, value)
+
+    def quantile(self, q: float) -> float | None:
+        """Przybliżenie jak ``histogram_quantile``: interpolacja w kubełku."""
+        with self._lock:
+            counts, count = list(self._data.counts), self._data.count
+        if not count:
+            return None
+        rank, seen, lower = q * count, 0, 0.0
+        for bound, n in zip((*self.buckets, None), counts):
+            if n and seen + n >= rank:
+                if bound is None:      # ponad ostatnim kubełkiem – jego granica
+                    return self.buckets[-1]
+                return lower + (bound - lower) * (rank - seen) / n
+            seen += n
+            lower = bound if bound is not None else lower
+        return self.buckets[-1]
+
+    def lines(self, name: str, help_text: str) -> list[str]:
+        with self._lock:
+            counts, total, count = list(self._data.counts), self._data.sum, self._data.count
+        return header(name, "histogram", help_text) + _histogram_lines(
+            name, "", self.buckets, counts, total, count,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data = _Histogram(self.buckets)
+
+
+_collectors: list = []
+
+
+def register_collector(collect) -> None:
+    """``collect()`` → linie tekstu dopisywane do ``/metrics`` (np. stan SSE)."""
+    if collect not in _collectors:
+        _collectors.append(collect)
+
+
+class Registry:
+    """Liczniki i histogramy procesu; jedna blokada, bo zapis to kilka dodawań."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._requests: dict[tuple, int] = defaultdict(int)
+            self._histograms: dict[str, dict[tuple, _Histogram]] = {name: {} for name in HISTOGRAMS}
+
+    def count_request(self, labels: tuple) -> None:
+        with self._lock:
+            self._requests[labels] += 1
+
+    def observe(self, labels: tuple, values: dict[str, float]) -> None:
+        with self._lock:
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                series = self._histograms[name].get(labels)
+                if series is None:
+                    series = self._histograms[name][labels] = _Histogram(buckets)
+                series.add(buckets, value)
+
+    def render(self) -> str:
+        with self._lock:
+            requests = sorted(self._requests.items())
+            histograms = {
+                name: sorted(
+                    (labels, list(h.counts), h.sum, h.count) for labels, h in series.items()
+                )
+                for name, series in self._histograms.items()
+            }
+        lines = header("metrics_sample_rate", "gauge", "Odsetek żądań mierzonych przez histogramy.")
+        lines.append(sample("metrics_sample_rate", settings.METRICS_SAMPLE_RATE))
+        lines += header("http_requests_total", "counter", "Wszystkie żądania (także niepróbkowane).")
+        lines += [f"{PREFIX}http_requests_total{{{_labels(labels)}}} {n}" for labels, n in requests]
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines += header(name, "histogram", help_text)
+            for labels, counts, total, count in histograms[name]:
+                lines += _histogram_lines(name, _labels(labels), buckets, counts, total, count)
+        for collect in _collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(values: tuple) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in zip(LABELS, values))
+
+
+REGISTRY = Registry()
+
+
+# ---------------------------------------------------------------------------
+# Pomiar jednego żądania
+# ---------------------------------------------------------------------------
+
+class _Sample:
+    """Stan mierzonego żądania; jest też wrapperem ``execute_wrapper``."""
+    __slots__ = ("queries", "db_time", "serializer_time", "serializing")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+_current: contextvars.ContextVar[_Sample | None] = contextvars.ContextVar("routes_metrics_sample", default=None)
+
+
+def current() -> _Sample | None:
+    """Próbka bieżącego żądania albo ``None`` (metryki wyłączone / żądanie pominięte)."""
+    return _current.get()
+
+
+def _count_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    return sample(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install(sender=None, connection=None, **_) -> None:
+    """
+    Wrapper na początku listy – ``execute_wrapper()`` innych zdejmuje ostatni.
+    Zakładany zawsze (bez żądania w pomiarze to jeden odczyt contextvar),
+    bo połączenie bywa otwarte, zanim powstanie middleware.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+def _view_labels(request, response) -> tuple:
+    match = getattr(request, "resolver_match", None)
+    view = (match.view_name or match.route) if match is not None else "<unresolved>"
+    return view, request.method, response.status_code
+
+
+def _response_size(response) -> int | None:
+    if response.streaming:
+        length = response.get("Content-Length")
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """Pierwszy w ``MIDDLEWARE`` – mierzy też pozostałe middleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _record(self, request, response, elapsed: float, sample: _Sample | None) -> None:
+        labels = _view_labels(request, response)
+        REGISTRY.count_request(labels)
+        if sample is None:
+            return
+        values = {
+            "http_request_duration_seconds": elapsed,
+            "db_queries_per_request": sample.queries,
+            "db_query_duration_seconds": sample.db_time,
+        }
+        if sample.serializer_time:
+            values["serializer_duration_seconds"] = sample.serializer_time
+        size = _response_size(response)
+        if size is not None:
+            values["http_response_size_bytes"] = size
+        REGISTRY.observe(labels, values)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == PATH:
+            return self.get_response(request)
+        if not self._sampled():
+            response = self.get_response(request)
+            REGISTRY.count_request(_view_labels(request, response))
+            return response
+
+        sample = _Sample()
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, time.perf_counter() - start, sample)
+        return response
+
+    async def __acall__(self, request):
+        if request.path == PATH:
+            return await self.get_response(request)
+        sample = _Sample() if self._sampled() else None
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, time.perf_counter() - start, sample)
+        return response
+
+
+# ---------------------------------------------------------------------------
+# /metrics
+# ---------------------------------------------------------------------------
+
+def _authorized(request) -> bool:
+    token = settings.METRICS_TOKEN
+    if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    """Tekst dla Prometheusa: ``Authorization: Bearer $METRICS_TOKEN`` albo sesja admina."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not _authorized(request):
+        return HttpResponse(status=403)
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
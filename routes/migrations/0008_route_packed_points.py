@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0007_delete_backgroundimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='packed_points',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from itertools import groupby
+
+from django.db import migrations
+
+from routes import geometry
+
+
+def pack_points(apps, schema_editor):
+    """RoutePoint → Route.packed_points (jeden UPDATE na trasę)."""
+    Route = apps.get_model("routes", "Route")
+    RoutePoint = apps.get_model("routes", "RoutePoint")
+    rows = (
+        RoutePoint.objects.order_by("route_id", "order")
+        .values_list("route_id", "x", "y")
+        .iterator(chunk_size=2000)
+    )
+    for route_id, points in groupby(rows, key=lambda row: row[0]):
+        packed = geometry.pack((x, y) for _, x, y in points)
+        Route.objects.filter(pk=route_id).update(packed_points=packed)
+
+
+def unpack_points(apps, schema_editor):
+    Route = apps.get_model("routes", "Route")
+    RoutePoint = apps.get_model("routes", "RoutePoint")
+    RoutePoint.objects.all().delete()
+    for route_id, packed in Route.objects.exclude(packed_points=b"").values_list("id", "packed_points"):
+        RoutePoint.objects.bulk_create(
+            RoutePoint(route_id=route_id, order=order, x=x, y=y)
+            for order, (x, y) in enumerate(geometry.unpack(packed), start=1)
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("routes", "0008_route_packed_points"),
+    ]
+
+    operations = [
+        migrations.RunPython(pack_points, unpack_points),
+    ]
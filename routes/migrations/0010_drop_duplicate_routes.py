@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def drop_duplicate_routes(apps, schema_editor):
+    """Przed unikalnością (owner, background) zostaje najnowsza trasa gracza na planszy."""
+    Route = apps.get_model("routes", "Route")
+    duplicates = (
+        Route.objects.values("owner_id", "background_id")
+        .annotate(n=Count("id"), keep=Max("id"))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        Route.objects.filter(
+            owner_id=row["owner_id"], background_id=row["background_id"]
+        ).exclude(pk=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Osobna migracja: na PostgreSQL DELETE zostawia odroczone triggery FK,
+    a z nimi ALTER TABLE (nowe ograniczenie w 0011) w tej samej transakcji
+    kończy się błędem.
+    """
+    dependencies = [
+        ("routes", "0009_pack_route_points"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_routes, migrations.RunPython.noop),
+    ]
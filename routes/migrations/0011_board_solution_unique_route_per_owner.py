@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 20:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0010_drop_duplicate_routes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardSolution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paths', models.JSONField(blank=True, default=dict)),
+                ('complete', models.BooleanField(default=False)),
+                ('covered', models.PositiveSmallIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-modified'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='route',
+            name='background',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='routes', to='routes.gameboard'),
+        ),
+        migrations.AlterField(
+            model_name='route',
+            name='name',
+            field=models.CharField(max_length=25),
+        ),
+        migrations.AddConstraint(
+            model_name='route',
+            constraint=models.UniqueConstraint(fields=('owner', 'background'), name='unique_route_per_user_board'),
+        ),
+        migrations.AddField(
+            model_name='boardsolution',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solutions', to='routes.gameboard'),
+        ),
+        migrations.AddField(
+            model_name='boardsolution',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solutions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='boardsolution',
+            constraint=models.UniqueConstraint(fields=('owner', 'board'), name='unique_solution_per_user_board'),
+        ),
+    ]
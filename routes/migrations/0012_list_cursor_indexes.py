@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 21:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0011_board_solution_unique_route_per_owner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameboard',
+            index=models.Index(fields=['-modified', 'id'], name='board_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['owner', '-created', 'id'], name='route_owner_created_id_idx'),
+        ),
+    ]
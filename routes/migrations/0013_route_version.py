@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0012_list_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
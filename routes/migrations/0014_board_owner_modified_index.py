@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 21:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0013_route_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameboard',
+            index=models.Index(fields=['owner', '-modified', 'id'], name='board_owner_modified_id_idx'),
+        ),
+    ]
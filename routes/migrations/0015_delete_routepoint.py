@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Tabela „wiersz na punkt” po 0009 nie ma już czytelników; migracje idą po
+    kolei, więc każda baza, która tu dochodzi, ma punkty upakowane w
+    ``Route.packed_points``.  Cofnięcie odtwarza pustą tabelę, a cofnięcie
+    0009 napełnia ją z powrotem.
+    """
+    dependencies = [
+        ("routes", "0014_board_owner_modified_index"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="RoutePoint",
+        ),
+    ]
@@ -1,7 +1,13 @@
+from typing import Iterable
+
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from . import geometry
+from .fingerprint import canonical
+from .geometry import Point
+
 class GameBoard(models.Model):
     """
     Plansza do gry „Połącz Kropki”.
@@ -27,6 +33,17 @@ class GameBoard(models.Model):
 
     class Meta:
         ordering = ["-modified"]
+        indexes = [
+            # kursor /api/boards/: ORDER BY modified DESC, id
+            models.Index(fields=["-modified", "id"], name="board_modified_id_idx"),
+            # „Moje plansze”: WHERE owner = … ORDER BY modified DESC, id
+            models.Index(fields=["owner", "-modified", "id"], name="board_owner_modified_id_idx"),
+        ]
+
+    @property
+    def fingerprint(self) -> str:
+        """Odcisk niezależny od obrotów, odbić i nazw kolorów (patrz routes.fingerprint)."""
+        return canonical(self.rows, self.cols, self.dots or []).fingerprint
 
     def __str__(self) -> str:
         return f"Board #{self.pk} ({self.owner})"
@@ -41,31 +58,93 @@ class Route(models.Model):
         GameBoard, on_delete=models.CASCADE, related_name="routes"
     )
     created = models.DateTimeField(auto_now_add=True)
+    # Wierzchołki ścieżki upakowane przez routes.geometry (2 B na punkt);
+    # czytamy i zapisujemy wyłącznie przez ``coords``.
+    packed_points = models.BinaryField(default=b"", editable=False)
+    # Licznik zapisów – ETag trasy (routes.conditional); Route nie ma ``modified``.
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=["background"],
+                fields=["owner", "background"],
                 name="unique_route_per_user_board"
             )
         ]
+        indexes = [
+            # kursor /api/routes/: WHERE owner = … ORDER BY created DESC, id
+            models.Index(fields=["owner", "-created", "id"], name="route_owner_created_id_idx"),
+        ]
 
 
     def __str__(self) -> str:
         return f"Route #{self.pk} ({self.owner})"
 
+    def save(self, *args, **kwargs):
+        """
+        Każdy zapis istniejącej trasy podbija ``version`` (atomowo, w SQL).
+
+        Nowej wartości nie czytamy z powrotem (Django 5.2 nie ma UPDATE …
+        RETURNING w ``save()``), więc zapis to wciąż jedno zapytanie:
+        • odbiorcy ``post_save`` widzą ``instance.version`` jako wyrażenie
+          ``F("version") + 1`` – nie czytać go tam ani nie zapisywać,
+        • po ``save()`` pole jest odroczone: pierwszy odczyt ``version`` to
+          dodatkowy SELECT (ETag i tak bierze je z bazy, ``routes.conditional``).
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        self.version = models.F("version") + 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+        del self.version   # pole odroczone – wczyta się z bazy dopiero przy odczycie
 
-class RoutePoint(models.Model):
-    route = models.ForeignKey(
-        Route, on_delete=models.CASCADE, related_name="points"
+    @property
+    def coords(self) -> list[Point]:
+        """Wierzchołki ścieżki w kolejności: ``[(x, y), …]``."""
+        return geometry.unpack(self.packed_points)
+
+    @coords.setter
+    def coords(self, points: Iterable[Point]) -> None:
+        self.packed_points = geometry.pack(points)
+
+
+class BoardSolution(models.Model):
+    """
+    Pełne rozwiązanie planszy – wszystkie ścieżki gracza naraz:
+    paths = {
+        "#ff0000": [[0, 2], [3, 2], [3, 5]],   # wierzchołki (x, y) jak w Route
+        ...
+    }
+    ``complete`` i ``covered`` liczy routes.validation.check_solution przy
+    zapisie (serializer), żeby listy nie musiały sprawdzać ścieżek.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="solutions"
+    )
+    board = models.ForeignKey(
+        GameBoard, on_delete=models.CASCADE, related_name="solutions"
     )
-    order = models.PositiveIntegerField()
-    x = models.PositiveIntegerField()
-    y = models.PositiveIntegerField()
+    paths = models.JSONField(default=dict, blank=True)
+    complete = models.BooleanField(default=False)
+    covered = models.PositiveSmallIntegerField(default=0)
+
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ("route", "order")
-        ordering = ["order"]
+        ordering = ["-modified"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "board"],
+                name="unique_solution_per_user_board"
+            )
+        ]
 
     def __str__(self) -> str:
-        return f"P{self.order}@({self.x}, {self.y})"
+        return f"Solution #{self.pk} ({self.owner})"
+
+    @property
+    def coords(self) -> dict[str, list[Point]]:
+        """``{kolor: [(x, y), …]}``."""
+        return {color: [tuple(p) for p in points] for color, points in (self.paths or {}).items()}
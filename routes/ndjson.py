@@ -0,0 +1,177 @@
+# routes/ndjson.py
+"""Import i eksport plansz w NDJSON – jeden obiekt JSON na linię.
+
+Import czyta strumień linia po linii i co ``batch_size`` plansz woła
+:func:`routes.batch.create_boards` (walidacja całej partii + ``bulk_create``,
+każda partia we własnej transakcji).  W pamięci jest więc najwyżej jedna
+partia i ograniczona liczba opisów błędów, a na koniec idzie jedno
+zdarzenie SSE ``boardsImported`` zamiast N×``newBoard``.
+
+Eksport czyta ``values()`` przez ``.iterator(chunk_size=…)`` (po stronie
+PostgreSQL – kursor serwerowy) i oddaje po jednym kawałku ``bytes`` na
+partię, więc zrzut miliona plansz nie buduje listy w RAM.  Pod ASGI
+``StreamingHttpResponse`` zebrałby synchroniczny iterator w listę
+(``sync_to_async(list)``), dlatego tam idzie :func:`aexport_boards` –
+ten sam generator, kawałek po kawałku przez ``sync_to_async``.
+
+Import z API ma limity (``BOARD_IMPORT_MAX_*``): liczba linii, bajty linii
+(czytamy ``readline(limit + 1)``, więc nawet jedna gigantyczna linia nie
+trafia w całości do pamięci) i bajty całego ciała.  Przekroczenie przerywa
+import: linie wcześniejsze zostają zapisane, reszty nie czytamy, a
+podsumowanie dostaje ``aborted`` z powodem.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+
+from . import batch, sse
+
+CONTENT_TYPE = "application/x-ndjson"
+EXPORT_FIELDS = ("id", "title", "rows", "cols", "dots", "created", "modified")
+CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 100   # dalsze błędne linie tylko liczymy
+
+
+class ImportTooLarge(Exception):
+    """Przekroczony limit importu – czytanie kończy się na tej linii."""
+
+
+@dataclass
+class ImportSummary:
+    lines: int = 0
+    created: int = 0
+    invalid: int = 0
+    errors: dict[int, list[str]] = field(default_factory=dict)  # nr linii → opisy
+    aborted: str = ""      # powód przerwania (limit); pusty – przeczytano wszystko
+
+    def report(self, line: int, messages: list[str]) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors[line] = messages
+
+    def as_dict(self) -> dict:
+        out = {
+            "lines": self.lines,
+            "created": self.created,
+            "invalid": self.invalid,
+            "errors": {str(line): messages for line, messages in self.errors.items()},
+            "errors_truncated": self.invalid > len(self.errors),
+        }
+        if self.aborted:
+            out["aborted"] = self.aborted
+        return out
+
+
+def limited_lines(stream, *, max_line_bytes: int, max_bytes: int) -> Iterator[bytes]:
+    """Linie ``stream`` (``readline``); ``ImportTooLarge`` po przekroczeniu limitu bajtów."""
+    total = 0
+    while True:
+        raw = stream.readline(max_line_bytes + 1)
+        if not raw:
+            return
+        if len(raw) > max_line_bytes:
+            raise ImportTooLarge(f"Linia dłuższa niż {max_line_bytes} B.")
+        total += len(raw)
+        if total > max_bytes:
+            raise ImportTooLarge(f"Import większy niż {max_bytes} B.")
+        yield raw
+
+
+def import_boards(
+    owner, lines: Iterable[bytes | str], *, batch_size: int = batch.BATCH_SIZE,
+    max_lines: int | None = None,
+) -> ImportSummary:
+    """
+    Plansze z linii NDJSON (puste linie pomijamy) → ``owner``; numery linii od 1.
+    ``ImportTooLarge`` z ``lines`` albo ponad ``max_lines`` linii przerywa
+    import – wcześniejsze linie są zapisane, powód w ``summary.aborted``.
+    """
+    summary = ImportSummary()
+    pending: list[tuple[int, dict]] = []
+
+    def flush() -> None:
+        with transaction.atomic():
+            created, reports = batch.create_boards(
+                owner, [board for _, board in pending], batch_size=batch_size,
+            )
+        summary.created += len(created)
+        for (line, _), report in zip(pending, reports):
+            if report:
+                summary.report(line, report)
+        pending.clear()
+
+    try:
+        for number, raw in enumerate(lines, start=1):
+            if max_lines is not None and number > max_lines:
+                raise ImportTooLarge(f"Najwyżej {max_lines} linii w jednym imporcie.")
+            summary.lines = number
+            if not raw.strip():
+                continue
+            try:
+                pending.append((number, json.loads(raw)))
+            except ValueError as exc:    # także UnicodeDecodeError
+                summary.report(number, [f"Niepoprawny JSON: {exc}"])
+                continue
+            except RecursionError:       # np. "[[[[…" – dekoder C nie zgłasza ValueError
+                summary.report(number, ["Niepoprawny JSON: zbyt głębokie zagnieżdżenie."])
+                continue
+            if len(pending) >= batch_size:
+                flush()
+    except ImportTooLarge as exc:
+        summary.aborted = str(exc)
+    if pending:
+        flush()
+
+    sse.boards_imported(owner, summary.created)
+    return summary
+
+
+def export_boards(queryset, *, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Linie NDJSON plansz z ``queryset`` (po ``id``), po ``chunk_size`` na kawałek."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    rows = queryset.order_by("pk").values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(encoder.encode(row))
+        if len(chunk) >= chunk_size:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk.clear()
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+async def aexport_boards(queryset, *, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """:func:`export_boards` dla ASGI – każdy kawałek z bazy w wątku (``sync_to_async``)."""
+    chunks = export_boards(queryset, chunk_size=chunk_size)
+    fetch = sync_to_async(next, thread_sensitive=True)   # ten sam wątek = to samo połączenie/kursor
+    try:
+        while (chunk := await fetch(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+class NDJSONParser(BaseParser):
+    """Nie parsuje – ``request.data`` to sam strumień, czytany linia po linii."""
+    media_type = CONTENT_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Dla negocjacji ``Accept``; strumień eksportu omija renderer, błędy to jedna linia."""
+    media_type = CONTENT_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n").encode()
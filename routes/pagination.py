@@ -0,0 +1,25 @@
+# routes/pagination.py
+"""Stronicowanie kursorem (keyset) dla list API.
+
+``CursorPagination`` z DRF filtruje po pierwszej kolumnie porządku
+(``WHERE modified < …``) zamiast ``OFFSET`` – koszt strony nie rośnie
+z jej numerem, a wstawki w trakcie przeglądania nie przesuwają wyników.
+Drugą kolumną jest ``id``, żeby porządek był jednoznaczny; oba porządki
+mają indeksy złożone w ``models.py``.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class _Cursor(CursorPagination):
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class BoardCursorPagination(_Cursor):
+    ordering = ("-modified", "id")
+
+
+class RouteCursorPagination(_Cursor):
+    ordering = ("-created", "id")
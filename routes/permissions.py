@@ -1,15 +1,38 @@
 from rest_framework import permissions
 from .models import Route
 
+
+def owned_route(request, route_pk, lock=False):
+    """
+    Trasa zalogowanego użytkownika (z planszą do walidacji) albo ``None`` –
+    jedno zapytanie na żądanie, wspólne dla ``IsRouteOwner`` i widoku.
+    ``lock`` – SELECT … FOR UPDATE (tylko wiersz trasy), zawsze świeży odczyt.
+    """
+    if not lock and hasattr(request, "_owned_route"):
+        return request._owned_route
+    routes = Route.objects.select_related("background")
+    if lock:
+        routes = routes.select_for_update(of=("self",))
+    route = routes.filter(pk=route_pk, owner=request.user).first()
+    if route is not None:
+        route.owner = request.user  # sygnał SSE nie dociągnie właściciela zapytaniem
+    request._owned_route = route
+    return route
+
+
 class IsRouteOwner(permissions.BasePermission):
     """
     Pozwala tylko właścicielowi trasy operować na jej punktach.
+
+    Sprawdzamy zawsze tutaj, przed walidacją ciała: obcy dostaje 403, a nie
+    opis błędów.  Odczyt zostaje w żądaniu – GET nie pyta bazy drugi raz;
+    zapisy i tak czytają trasę ponownie FOR UPDATE w transakcji.
     """
     def has_permission(self, request, view):
         route_pk = view.kwargs.get('route_pk')
         if route_pk is None:
             return False
-        return Route.objects.filter(pk=route_pk, owner=request.user).exists()
+        return owned_route(request, route_pk) is not None
 
     def has_object_permission(self, request, view, obj):
-        return obj.route.owner == request.user
\ No newline at end of file
+        return obj.route.owner == request.user
@@ -1,23 +1,177 @@
+import time
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from .models import Route, RoutePoint, GameBoard
+from . import batch, metrics, solver, validation
+from .geometry import MAX_COORD
+from .models import BoardSolution, Route, GameBoard
 
 
-class RoutePointSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = RoutePoint
-        fields = ["id", "order", "x", "y"]
-        read_only_fields = ["id", "order"]
+class TimedSerializerMixin:
+    """
+    Czas walidacji i ``to_representation`` do próbki ``routes.metrics``;
+    liczy tylko najbardziej zewnętrzny serializer (zagnieżdżone i elementy
+    ``many=True`` nie dublują czasu).
+    """
+
+    def _timed(self, method, value):
+        sample = metrics.current()
+        if sample is None or sample.serializing:
+            return method(value)
+        sample.serializing = True
+        start = time.perf_counter()
+        try:
+            return method(value)
+        finally:
+            sample.serializer_time += time.perf_counter() - start
+            sample.serializing = False
+
+    def to_representation(self, instance):
+        return self._timed(super().to_representation, instance)
+
+    def run_validation(self, data=serializers.empty):
+        return self._timed(super().run_validation, data)
+
+
+class RoutePointSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Punkt ścieżki – widok na element ``Route.coords``.
+    ``id`` == ``order`` (1…n), bo punkty nie są już osobnymi wierszami.
+    """
+    id    = serializers.IntegerField(read_only=True)
+    order = serializers.IntegerField(read_only=True)
+    x     = serializers.IntegerField(min_value=0, max_value=MAX_COORD)
+    y     = serializers.IntegerField(min_value=0, max_value=MAX_COORD)
+
+
+class FieldSelectionMixin:
+    """``context["fields"]`` (``?fields=`` / ``?summary=1``) – tylko te pola w odpowiedzi."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get("fields")
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+def point_dicts(coords):
+    """``[(x, y), …]`` → dane dla ``RoutePointSerializer`` (ten sam JSON co dawniej)."""
+    return [
+        {"id": order, "order": order, "x": x, "y": y}
+        for order, (x, y) in enumerate(coords, start=1)
+    ]
+
+class RoutePointOpSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Jedna operacja przyrostowej edycji punktów (``order`` liczone od 1):
+    • ``{"op": "append", "points": [...]}``
+    • ``{"op": "truncate", "after": K}`` – usuwa punkty o order > K
+    • ``{"op": "replace", "start": a, "end": b, "points": [...]}`` – zastępuje
+      zakres order ∈ [a, b) nową listą (może być dłuższa lub krótsza)
+    """
+    op     = serializers.ChoiceField(choices=["append", "truncate", "replace"])
+    points = RoutePointSerializer(many=True, required=False)
+    after  = serializers.IntegerField(min_value=0, required=False)
+    start  = serializers.IntegerField(min_value=1, required=False)
+    end    = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        required = {"append": ["points"], "truncate": ["after"], "replace": ["start", "end"]}
+        missing = [f for f in required[data["op"]] if f not in data]
+        if missing:
+            raise serializers.ValidationError(
+                {f: f"Wymagane dla operacji {data['op']}." for f in missing}
+            )
+        if data["op"] == "replace" and data["start"] > data["end"]:
+            raise serializers.ValidationError("Zakres replace: start > end.")
+        data.setdefault("points", [])
+        return data
+
 
-class RouteSerializer(serializers.ModelSerializer):
-    points = RoutePointSerializer(many=True, read_only=True)
+class RouteSerializer(TimedSerializerMixin, FieldSelectionMixin, serializers.ModelSerializer):
+    points = serializers.SerializerMethodField()
 
     class Meta:
         model = Route
         fields = ["id", "name", "background", "created", "points"]
         read_only_fields = ["id", "created"]
 
+    @extend_schema_field(RoutePointSerializer(many=True))
+    def get_points(self, route):
+        return point_dicts(route.coords)
+
+    def validate(self, data):
+        """
+        Jedna trasa gracza na planszę (owner, background); zmiana planszy
+        istniejącej trasy – zapisana ścieżka musi pasować do nowej planszy.
+        """
+        background = data.get("background")
+        request = self.context.get("request")
+        if background is not None and request is not None:
+            taken = Route.objects.filter(owner=request.user, background=background)
+            if self.instance is not None:
+                taken = taken.exclude(pk=self.instance.pk)
+            if taken.exists():
+                raise serializers.ValidationError("Masz już trasę na tej planszy.")
+        if self.instance is not None and background is not None and background.pk != self.instance.background_id:
+            try:
+                validation.check_route(validation.board_map(background), self.instance.coords)
+            except validation.RouteError as exc:
+                raise serializers.ValidationError(
+                    {"background": [f"Zapisana ścieżka nie pasuje do planszy – punkt {exc.index + 1}: {exc}"]}
+                )
+        return data
+
+
+class BoardSolutionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Wszystkie ścieżki planszy naraz: ``{"kolor": [[x, y], …], …}``.
+    Ścieżki sprawdzamy razem (routes.validation.check_solution) – błędne
+    odrzucamy, niedokończone zapisujemy; ``report`` mówi, czego brakuje
+    i ile pól planszy pokrywają.
+    """
+    paths = serializers.DictField(
+        child=serializers.ListField(
+            child=serializers.ListField(
+                child=serializers.IntegerField(min_value=0, max_value=MAX_COORD),
+                min_length=2, max_length=2,
+            )
+        )
+    )
+    report = serializers.SerializerMethodField()
 
-class GameBoardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BoardSolution
+        fields = ["id", "board", "paths", "complete", "covered", "report", "created", "modified"]
+        read_only_fields = ["id", "complete", "covered", "created", "modified"]
+
+    def validate(self, data):
+        board = data.get("board", getattr(self.instance, "board", None))
+        paths = data.get("paths", getattr(self.instance, "paths", None) or {})
+        request = self.context.get("request")
+        if request is not None and (self.instance is None or board != self.instance.board):
+            if BoardSolution.objects.filter(owner=request.user, board=board).exists():
+                raise serializers.ValidationError("Masz już rozwiązanie tej planszy.")
+
+        state = validation.check_solution(
+            validation.board_map(board),
+            {color: [tuple(p) for p in points] for color, points in paths.items()},
+        )
+        if state.errors:
+            raise serializers.ValidationError({"paths": state.errors})
+        data["complete"], data["covered"] = state.complete, state.covered
+        return data
+
+    @extend_schema_field(serializers.DictField())
+    def get_report(self, solution):
+        return validation.check_solution(
+            validation.board_map(solution.board), solution.coords
+        ).as_dict()
+
+
+class GameBoardSerializer(TimedSerializerMixin, FieldSelectionMixin, serializers.ModelSerializer):
     class Meta:
         model  = GameBoard
         fields = ["id", "title", "rows", "cols", "dots", "created", "modified"]
@@ -28,31 +182,25 @@ class GameBoardSerializer(serializers.ModelSerializer):
         • każdy kolor dokładnie 2×
         • kropki mieszczą się w siatce
         • brak duplikatów pól (row, col)
+        • z BOARD_REQUIRE_SOLVABLE – plansza ma rozwiązanie
         """
         rows = data.get("rows", getattr(self.instance, "rows", None))
         cols = data.get("cols", getattr(self.instance, "cols", None))
-        dots = data.get("dots", [])
+        # PATCH bez dots (np. samo rows) → sprawdzamy kropki z bazy w nowej siatce
+        dots = data.get("dots", getattr(self.instance, "dots", None) or [])
 
         if rows is None or cols is None:
             raise serializers.ValidationError("Nie podano wymiarów planszy.")
 
-        # 1. koordynaty w zakresie i unikalność pól
-        seen = set()
-        for d in dots:
-            r, c = d["row"], d["col"]
-            if not (0 <= r < rows and 0 <= c < cols):
-                raise serializers.ValidationError("Kropka poza zakresem planszy.")
-            if (r, c) in seen:
-                raise serializers.ValidationError("Podwójna kropka w tej samej komórce.")
-            seen.add((r, c))
-
-        # 2. każdy kolor dokładnie 2×
-        from collections import Counter
-        counts = Counter(d["color"] for d in dots)
-        wrong  = [col for col, n in counts.items() if n != 2]
-        if wrong:
-            raise serializers.ValidationError(
-                f"Kolory {', '.join(wrong)} występują nie dokładnie 2 razy."
-            )
+        # 1–2. kształt kropek, zakres, unikalność pól, kolory 2× (routes.batch)
+        errors = batch.check_dots(rows, cols, dots)
+        if errors:
+            raise serializers.ValidationError(errors[0])
+
+        # 3. rozwiązywalność (opcjonalnie) – tylko gdy zmienia się układ
+        if settings.BOARD_REQUIRE_SOLVABLE and data.keys() & {"rows", "cols", "dots"}:
+            result = solver.solve_cached(rows, cols, dots, timeout=settings.BOARD_SOLVE_TIMEOUT)
+            if result.status == solver.UNSOLVABLE:
+                raise serializers.ValidationError("Plansza nie ma rozwiązania.")
 
         return data
\ No newline at end of file
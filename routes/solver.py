@@ -0,0 +1,720 @@
+# routes/solver.py
+"""Solver łamigłówki „Połącz Kropki” dla ``GameBoard``.
+
+Każdą parę kropek tego samego koloru trzeba połączyć ścieżką po sąsiednich
+(ortogonalnie) polach; ścieżki nie mogą się przecinać ani wchodzić na obce
+kropki.  Z ``fill=True`` obowiązuje dodatkowo reguła Flow Free: ścieżki
+muszą pokryć całą planszę.
+
+Model jak w kodowaniu SAT, przeszukiwanie z propagacją ograniczeń:
+
+• pole ma dziedzinę kolorów (maska bitowa; bez ``fill`` także bit „puste”),
+  krawędź między sąsiadami – stan nieznana / użyta / wolna;
+• kropka ma dokładnie 1 użytą krawędź, pole ścieżki 2, puste 0; użyta
+  krawędź wymusza ten sam kolor na obu końcach;
+• łańcuchy użytych krawędzi śledzimy przez ich końce – cykl wykrywamy w O(1);
+• bez ``fill`` dwa sąsiednie pola jednego koloru muszą być połączone
+  (ścieżkę, która dotyka samej siebie, zawsze da się skrócić);
+• po propagacji :meth:`_Search._feasible` szuka sprzeczności na grafie pól,
+  przez które ścieżki mogą jeszcze przejść: fronty pary w różnych obszarach,
+  obszar bez żadnej pary (przy ``fill``), parzystość szachownicy, pola
+  rozcinające obszar, których nie przejdzie żadna para, i fronty dwóch par
+  na przemian na brzegu jednej ściany (ścieżki musiałyby się przeciąć);
+• rozgałęziamy się na froncie ostatnio przedłużanej pary, a gdy jest już
+  połączona – na froncie z najmniejszym wyborem; bez ``fill`` najpierw
+  najkrótsza droga do drugiego frontu, z ``fill`` – pole przy ścianie;
+• po ``RESTART_NODES`` węzłach (limit rośnie dwukrotnie) zaczynamy od nowa
+  z innymi remisami – jedna zła decyzja przy korzeniu nie zjada czasu.
+
+Plansza 12×12 to 144 pola i 264 krawędzie – typowe łamigłówki (także
+``synthetic.layout`` z kilkunastoma parami) rozwiązują się w dziesiątkach
+milisekund; ``timeout`` ogranicza patologiczne przypadki (wynik
+``"unknown"``), sprawdzany także przy budowie siatki i w propagacji.  Plansz
+większych niż ``MAX_CELLS`` pól w ogóle nie budujemy – od razu ``"unknown"``.
+Kropki, które nie tworzą par w siatce, dają ``"invalid"`` zamiast wyjątku.
+
+:func:`solve_cached` rozwiązuje postać kanoniczną planszy
+(:mod:`routes.fingerprint`) i trzyma wynik w cache ``"solver"`` – plansze
+obrócone, odbite albo z innymi kolorami kosztują jeden odczyt z cache.
+"""
+from __future__ import annotations
+
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.core.cache import caches
+
+from .fingerprint import canonical
+
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+UNKNOWN = "unknown"
+INVALID = "invalid"
+
+DEFAULT_TIMEOUT = 0.5
+RESTART_NODES = 256     # limit węzłów pierwszego przebiegu; każdy restart go podwaja
+MAX_CELLS = 64 * 64     # większa plansza → "unknown" bez budowania siatki
+
+# stany krawędzi
+_UNSET, _ON, _OFF = 0, 1, 2
+
+
+@dataclass
+class Solution:
+    status: str
+    paths: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    nodes: int = 0
+    elapsed_ms: float = 0.0
+    fingerprint: str = ""
+    cached: bool = False
+    error: str = ""       # powód statusu "invalid"
+
+    @property
+    def solvable(self) -> bool | None:
+        return None if self.status == UNKNOWN else self.status == SOLVED
+
+    def as_dict(self) -> dict:
+        out = {
+            "status": self.status,
+            "solvable": self.solvable,
+            "paths": {color: [list(cell) for cell in cells] for color, cells in self.paths.items()},
+            "nodes": self.nodes,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "fingerprint": self.fingerprint,
+            "cached": self.cached,
+        }
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class _Restart(Exception):
+    pass
+
+
+def _malformed(rows: int, cols: int, dots: list) -> str:
+    """Dlaczego ``dots`` nie nadają się dla solvera; ``""`` – w porządku.
+
+    Tania kopia reguł ``routes.batch.check_dots`` (batch importuje solver):
+    kropka z całkowitymi ``row``/``col`` w siatce, pole najwyżej raz, kolor 2×.
+    """
+    seen, count = set(), Counter()
+    for d in dots:
+        if not isinstance(d, dict) or not all(
+            isinstance(d.get(k), int) and not isinstance(d.get(k), bool) for k in ("row", "col")
+        ):
+            return "Kropka musi mieć całkowite row i col."
+        cell = (d["row"], d["col"])
+        if not (0 <= cell[0] < rows and 0 <= cell[1] < cols):
+            return f"Kropka {cell} poza planszą {rows}×{cols}."
+        if cell in seen:
+            return f"Dwie kropki na polu {cell}."
+        seen.add(cell)
+        count[str(d.get("color"))] += 1
+    odd = sorted(color for color, n in count.items() if n != 2)
+    return f"Kolor {odd[0]} musi wystąpić dokładnie 2 razy." if odd else ""
+
+
+def _precheck(rows: int, cols: int, dots: list, started: float) -> Solution | None:
+    """Wynik bez przeszukiwania: za duża plansza albo błędne kropki."""
+    if rows * cols > MAX_CELLS:
+        return Solution(status=UNKNOWN, elapsed_ms=(time.perf_counter() - started) * 1000)
+    error = _malformed(rows, cols, dots)
+    if error:
+        return Solution(status=INVALID, error=error,
+                        elapsed_ms=(time.perf_counter() - started) * 1000)
+    return None
+
+
+class _Search:
+    def __init__(self, rows: int, cols: int, dots: list[dict], fill: bool, timeout: float) -> None:
+        self.cols, self.fill = cols, fill
+        self.deadline = time.perf_counter() + timeout
+        self.nodes = 0
+        self.node_limit = 0             # licznik węzłów, po którym restart (run)
+        n = rows * cols
+
+        # krawędzie (u, w); adj[v] – lista (sąsiad, nr krawędzi)
+        self.edges: list[tuple[int, int]] = []
+        self.adj: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+        for v in range(n):
+            if not v & 1023:
+                self._check_time()
+            r, c = divmod(v, cols)
+            for w in (v + 1 if c + 1 < cols else None, v + cols if r + 1 < rows else None):
+                if w is not None:
+                    self.adj[v].append((w, len(self.edges)))
+                    self.adj[w].append((v, len(self.edges)))
+                    self.edges.append((v, w))
+
+        ends: dict[str, list[int]] = {}
+        for d in dots:
+            ends.setdefault(d["color"], []).append(d["row"] * cols + d["col"])
+        self.colors = sorted(ends)
+        self.pairs = [ends[color] for color in self.colors]
+        self.any_color = (1 << len(self.colors)) - 1
+        self.empty = 0 if fill else 1 << len(self.colors)
+
+        self.color = [self.any_color | self.empty] * n
+        self.endpoint = [False] * n
+        self.black = [(v // cols + v % cols) % 2 == 0 for v in range(n)]  # szachownica
+        for k, (a, b) in enumerate(self.pairs):
+            self.color[a] = self.color[b] = 1 << k
+            self.endpoint[a] = self.endpoint[b] = True
+        # sąsiedzi w kolejności zegarowej: góra, prawo, dół, lewo (obchodzenie
+        # ścian grafu w _separated); (-1, -1) – za brzegiem planszy
+        self.around: list[list[tuple[int, int]]] = [[(-1, -1)] * 4 for _ in range(n)]
+        for e, (u, w) in enumerate(self.edges):
+            if w == u + 1:
+                self.around[u][1], self.around[w][3] = (w, e), (u, e)
+            else:
+                self.around[u][2], self.around[w][0] = (w, e), (u, e)
+        self.state = [_UNSET] * len(self.edges)
+        self.on = [0] * n
+        self.unset = [len(a) for a in self.adj]
+        self.end_of = list(range(n))  # dla końca łańcucha – jego drugi koniec
+        self.trail: list[tuple[list, int, int]] = []
+        self.queue: list[int] = []
+        self.noise = [0.0] * n          # losowe remisy w kolejności ruchów (restarty)
+
+    def _check_time(self) -> None:
+        if time.perf_counter() > self.deadline:
+            raise _OutOfTime
+
+    # -- zmiany z możliwością cofnięcia ------------------------------------
+    def _assign(self, array: list, index: int, value: int) -> None:
+        self.trail.append((array, index, array[index]))
+        array[index] = value
+
+    def _undo(self, mark: int) -> None:
+        trail = self.trail
+        while len(trail) > mark:
+            array, index, value = trail.pop()
+            array[index] = value
+
+    def _restrict(self, v: int, mask: int) -> bool:
+        new = self.color[v] & mask
+        if new == self.color[v]:
+            return True
+        if not new:
+            return False
+        self._assign(self.color, v, new)
+        self.queue.append(v)
+        self.queue.extend(w for w, _ in self.adj[v])
+        return True
+
+    def _set_edge(self, e: int, value: int) -> bool:
+        if self.state[e] != _UNSET:
+            return self.state[e] == value
+        u, w = self.edges[e]
+        self._assign(self.state, e, value)
+        self._assign(self.unset, u, self.unset[u] - 1)
+        self._assign(self.unset, w, self.unset[w] - 1)
+        self.queue += (u, w)
+        if value == _OFF:
+            return True
+        for v in (u, w):
+            if self.on[v] >= (1 if self.endpoint[v] else 2):
+                return False
+        a, b = self.end_of[u], self.end_of[w]
+        if a == w:
+            return False  # zamknęłoby cykl
+        self._assign(self.on, u, self.on[u] + 1)
+        self._assign(self.on, w, self.on[w] + 1)
+        self._assign(self.end_of, a, b)
+        self._assign(self.end_of, b, a)
+        return self._restrict(u, self.color[w] & self.any_color) and self._restrict(
+            w, self.color[u] & self.any_color
+        )
+
+    # -- propagacja ------------------------------------------------------
+    def _need(self, v: int) -> int | None:
+        """Wymagana liczba użytych krawędzi; ``None`` – pole może być puste."""
+        if self.endpoint[v]:
+            return 1
+        if self.color[v] == self.empty:
+            return 0
+        if self.color[v] & self.empty:
+            return None
+        return 2
+
+    def _propagate(self) -> bool:
+        color, state, adj, queue = self.color, self.state, self.adj, self.queue
+        steps = 0
+        while queue:
+            steps += 1
+            if not steps & 4095:
+                self._check_time()
+            v = queue.pop()
+            mine = color[v]
+            for w, e in adj[v]:
+                if state[e] == _ON:
+                    if color[w] & ~mine and not self._restrict(w, mine):
+                        return False
+                    continue
+                if state[e] == _OFF:
+                    continue
+                if not mine & color[w] & self.any_color:
+                    if not self._set_edge(e, _OFF):
+                        return False
+                elif not self.fill and mine == color[w] and not mine & (mine - 1):
+                    if not self._set_edge(e, _ON):
+                        return False
+            if self.empty and not self.endpoint[v]:
+                if self.on[v] and not self._restrict(v, self.any_color):
+                    return False
+                if self.on[v] + self.unset[v] < 2 and not self._restrict(v, self.empty):
+                    return False
+            need = self._need(v)
+            if need is None:
+                continue
+            on, free = self.on[v], self.unset[v]
+            if on > need or on + free < need:
+                return False
+            if free and (on == need or on + free == need):
+                value = _OFF if on == need else _ON
+                for _, e in adj[v]:
+                    if state[e] == _UNSET and not self._set_edge(e, value):
+                        return False
+        return True
+
+    def _bury(self, alive: list[bool], v: int, stop: int) -> None:
+        """Odznacza łańcuch od *v* do *stop* (bez *stop*) – po nim nikt już nie przejdzie."""
+        state, adj, previous = self.state, self.adj, -1
+        while v != stop:
+            alive[v] = False
+            for w, e in adj[v]:
+                if state[e] == _ON and w != previous:
+                    previous, v = v, w
+                    break
+
+    def _feasible(self) -> bool:
+        """Warunki konieczne na grafie możliwych ruchów (po propagacji).
+
+        Graf to pola, przez które ścieżka może jeszcze przejść: bez pól na
+        pewno pustych i bez łańcuchów przypiętych do kropek – z nich zostaje
+        tylko front.  Łańcuch jeszcze niepodpięty działa jak przewód.
+
+        • obszary wolnych pól (bez frontów): fronty każdej niedokończonej
+          pary muszą sąsiadować ze wspólnym obszarem (albo ze sobą); pole
+          może dostać tylko kolor pary sięgającej do jego obszaru – obszar
+          bez żadnej pary przy ``fill`` to sprzeczność, bez ``fill`` – pola
+          puste (zawężenia idą do kolejki propagacji),
+        • przy ``fill`` przydział par do obszarów i parzystość: :meth:`_fill_regions`,
+        • pola rozcinające obszar: :meth:`_cut_cells`,
+        • separacja: :meth:`_separated`.
+        """
+        color, state, adj, end_of = self.color, self.state, self.adj, self.end_of
+        n, empty = len(color), self.empty
+        alive = [c != empty for c in color]     # przy fill ``empty == 0`` – wszystkie
+        terminal = [-1] * n                     # front → nr pary
+        open_pairs = []
+        for k, (a, b) in enumerate(self.pairs):
+            front_a, front_b = end_of[a], end_of[b]
+            if front_a == b:                    # para połączona
+                self._bury(alive, a, b)
+                alive[b] = False
+                continue
+            self._bury(alive, a, front_a)
+            self._bury(alive, b, front_b)
+            terminal[front_a] = terminal[front_b] = k
+            open_pairs.append((k, front_a, front_b))
+
+        comp = [-1] * n
+        balance = []                            # obszar → pola czarne − białe
+        for start in range(n):
+            if comp[start] >= 0 or not alive[start] or terminal[start] >= 0:
+                continue
+            comp[start] = len(balance)
+            stack, count = [start], 0
+            while stack:
+                v = stack.pop()
+                count += 1 if self.black[v] else -1
+                for w, e in adj[v]:
+                    if comp[w] < 0 and state[e] != _OFF and alive[w] and terminal[w] < 0:
+                        comp[w] = len(balance)
+                        stack.append(w)
+            balance.append(count)
+
+        serve: list[set[int]] = [set() for _ in balance]   # obszar → pary, które mogą do niego wejść
+        reach: dict[int, set[int]] = {}                     # para → obszary przy obu frontach
+        for k, front_a, front_b in open_pairs:
+            near_a = {comp[w] for w, e in adj[front_a] if state[e] == _UNSET}
+            near_b = {comp[w] for w, e in adj[front_b] if state[e] == _UNSET}
+            reach[k] = (near_a & near_b) - {-1}
+            if not reach[k] and not any(w == front_b and state[e] == _UNSET for w, e in adj[front_a]):
+                return False
+            for c in reach[k]:
+                serve[c].add(k)
+        if self.fill and not self._fill_regions(serve, reach, balance, open_pairs):
+            return False
+        allowed = [sum(1 << k for k in pairs) | empty for pairs in serve]
+        for v in range(n):
+            if comp[v] >= 0 and not self._restrict(v, allowed[comp[v]]):
+                return False
+        return self._cut_cells(comp, open_pairs) and not self._separated(alive, terminal, open_pairs)
+
+    def _cut_cells(self, comp: list[int], open_pairs: list) -> bool:
+        """Pola rozcinające obszar (punkty artykulacji, algorytm Tarjana).
+
+        Ścieżka przez pole *v* wchodzi do niego z jednej części obszaru bez
+        *v* i wychodzi do innej – albo wraca do tej samej, jeśli *v* ma w niej
+        dwóch sąsiadów – a fronty jej pary muszą dotykać tych części (albo
+        samego *v*).  Pole może więc dostać tylko kolor pary, która umie przez
+        nie przejść; typowy przypadek to korytarz szerokości 1 między dwoma
+        obszarami, z których żaden nie ma drugiego frontu pary z pierwszego.
+        """
+        color, state, adj = self.color, self.state, self.adj
+        n = len(color)
+        tin, low, tout = [-1] * n, [0] * n, [0] * n
+        cut: dict[int, list[int]] = {}          # pole → dzieci w drzewie DFS odcięte przez nie
+        timer = 0
+        for root in range(n):
+            if comp[root] < 0 or tin[root] >= 0:
+                continue
+            tin[root] = low[root] = timer
+            timer += 1
+            stack = [(root, -1, iter(adj[root]))]
+            while stack:
+                v, parent, neighbours = stack[-1]
+                for w, e in neighbours:
+                    if comp[w] < 0 or state[e] == _OFF or w == parent:
+                        continue
+                    if tin[w] < 0:
+                        tin[w] = low[w] = timer
+                        timer += 1
+                        stack.append((w, v, iter(adj[w])))
+                        break
+                    low[v] = min(low[v], tin[w])
+                else:
+                    stack.pop()
+                    tout[v] = timer
+                    if parent >= 0:
+                        low[parent] = min(low[parent], low[v])
+                        if low[v] >= tin[parent]:
+                            cut.setdefault(parent, []).append(v)
+            if len(cut.get(root, ())) < 2:
+                cut.pop(root, None)             # korzeń rozcina tylko przy ≥ 2 dzieciach
+
+        def entry(front: int) -> list[int]:
+            return [w for w, e in adj[front] if state[e] == _UNSET and comp[w] >= 0]
+
+        fronts = [(k, entry(front_a), entry(front_b)) for k, front_a, front_b in open_pairs]
+        for v, children in cut.items():
+            def part(u: int) -> int:
+                """Część obszaru bez *v*, w której leży *u* (-1 – część z przodkami *v*)."""
+                if u == v:
+                    return v
+                for c in children:
+                    if tin[c] <= tin[u] < tout[c]:
+                        return c
+                return -1
+
+            links = Counter(part(w) for w, e in adj[v] if comp[w] >= 0 and state[e] != _OFF)
+            region, allowed = comp[v], 0
+            for k, near_a, near_b in fronts:
+                if not color[v] >> k & 1:
+                    continue
+                sides_a = {part(w) for w in near_a if comp[w] == region}
+                sides_b = {part(w) for w in near_b if comp[w] == region}
+                if not sides_a or not sides_b:
+                    continue
+                if len(sides_a | sides_b) == 1:
+                    (x,) = sides_a      # obie strony w jednej części: trzeba z niej wyjść i wrócić
+                    if x != v and links[x] < 2:
+                        continue
+                allowed |= 1 << k
+            if not self._restrict(v, allowed | self.empty):
+                return False
+        return True
+
+    def _fill_regions(self, serve: list[set[int]], reach: dict[int, set[int]],
+                      balance: list[int], open_pairs: list) -> bool:
+        """Przy ``fill``: przydział par do obszarów i parzystość szachownicy.
+
+        Każdy obszar musi wypełnić co najmniej jedna para, a para przechodzi
+        przez co najwyżej jeden obszar (jest spójna, a obszary rozdzielają
+        fronty).  Obszar z jedną możliwą parą ją zabiera – inne obszary tracą
+        ją z *serve*, co może zostawić im znowu jedną parę.
+
+        Ścieżka naprzemiennie odwiedza pola czarne i białe, więc jej wnętrze
+        ma o jedno białe pole więcej, gdy oba fronty są czarne, o jedno czarne
+        więcej, gdy oba białe, a po równo przy frontach różnych kolorów.  Suma
+        tych wkładów par w obszarze musi dać jego *balance*.
+        """
+        black = self.black
+        charge = {k: (1 if not black[a] else -1) if black[a] == black[b] else 0 for k, a, b in open_pairs}
+        owner: dict[int, int] = {}              # para → jedyny obszar, który może wypełnić
+        work = [c for c, pairs in enumerate(serve) if len(pairs) <= 1]
+        while work:
+            c = work.pop()
+            if not serve[c]:
+                return False
+            (k,) = serve[c]
+            if owner.setdefault(k, c) != c:
+                return False
+            for other in reach[k] - {c}:
+                serve[other].discard(k)
+                if len(serve[other]) <= 1:
+                    work.append(other)
+            reach[k] = {c}
+        for c, pairs in enumerate(serve):
+            fixed = sum(charge[k] for k in pairs if owner.get(k) == c)
+            low = fixed + sum(min(charge[k], 0) for k in pairs if k not in owner)
+            high = fixed + sum(max(charge[k], 0) for k in pairs if k not in owner)
+            if not low <= balance[c] <= high:
+                return False
+        return True
+
+    def _separated(self, alive: list[bool], terminal: list[int], open_pairs: list) -> bool:
+        """Czy fronty dwóch par leżą na przemian na brzegu jednej ściany grafu.
+
+        Graf jest płaski (podgraf siatki), więc ścieżki a–a i b–b, których
+        końce idą po brzegu ściany w kolejności a, b, a, b, musiałyby się
+        przeciąć (krzywa Jordana) – np. dwie pary wzdłuż brzegu planszy
+        albo para, której łańcuch już odgrodził drugą.  Obchodzimy tylko
+        ściany, na których leży jakiś front: z każdej krawędzi skręcamy
+        w pierwszą możliwą w kolejności zegarowej.  Front, który wypada na
+        brzegu ściany kilka razy, liczymy w pierwszym miejscu – każdy wybór
+        miejsca daje poprawny dowód.
+        """
+        state, around = self.state, self.around
+        seen = set()
+        for _, *fronts in open_pairs:
+            for front in fronts:
+                for d0 in range(4):
+                    w, e = around[front][d0]
+                    if w < 0 or state[e] == _OFF or not alive[w] or front * 4 + d0 in seen:
+                        continue
+                    order, met = [], set()
+                    v, d = front, d0
+                    while True:
+                        seen.add(v * 4 + d)
+                        if terminal[v] >= 0 and v not in met:
+                            met.add(v)
+                            order.append(terminal[v])
+                        w = around[v][d][0]
+                        back = (d + 2) & 3
+                        for turn in (1, 2, 3, 4):
+                            d = (back + turn) & 3
+                            x, e = around[w][d]
+                            if x >= 0 and state[e] != _OFF and alive[x]:
+                                break
+                        v = w
+                        if v == front and d == d0:
+                            break
+                    if len(order) >= 4 and self._crossing(order):
+                        return True
+        return False
+
+    @staticmethod
+    def _crossing(order: list[int]) -> bool:
+        """Czy pary (każda z obu końców w ``order``) przeplatają się: a … b … a … b."""
+        twice = {k for k in order if order.count(k) == 2}
+        stack: list[int] = []
+        for k in order:
+            if k not in twice:
+                continue
+            if stack and stack[-1] == k:
+                stack.pop()
+            elif k in stack:
+                return True
+            else:
+                stack.append(k)
+        return False
+
+    def _settle(self) -> bool:
+        """Propagacja i :meth:`_feasible` aż nic się już nie zawęża."""
+        while True:
+            if not self._propagate() or not self._feasible():
+                return False
+            if not self.queue:
+                return True
+
+    # -- przeszukiwanie --------------------------------------------------
+    def run(self) -> bool:
+        """Przeszukiwanie z restartami.
+
+        Zła decyzja blisko korzenia potrafi uwięzić przeszukiwanie w ogromnym
+        poddrzewie bez rozwiązania.  Po ``node_limit`` węzłach wracamy więc do
+        korzenia i zaczynamy od nowa z innymi (losowymi, ale powtarzalnymi)
+        remisami w kolejności ruchów, z dwa razy większym limitem – ostatni
+        przebieg, który zmieści się w limicie, jest pełny, więc wynik
+        ``"unsolvable"`` nadal jest dowodem.
+        """
+        self.queue.extend(range(len(self.color)))
+        if not self._settle():
+            return False
+        mark, budget, rng = len(self.trail), RESTART_NODES, random.Random(len(self.color))
+        while True:
+            self.node_limit = self.nodes + budget
+            try:
+                return self._dfs()
+            except _Restart:
+                self._undo(mark)
+                self.queue.clear()
+                budget *= 2
+                self.noise = [rng.random() for _ in self.noise]
+
+    def _branch_cell(self, last: int = -1) -> int | None:
+        """Front do rozgałęzienia; ``None`` – wszystkie pary połączone.
+
+        Parę *last* (przedłużaną w poprzednim kroku) prowadzimy dalej, aż się
+        połączy – jej ścieżka szybciej natrafia na sprzeczność niż kilka
+        zaczętych naraz.  Potem front z najmniejszym wyborem.
+        """
+        best, best_free = None, 5
+        for k, (a, b) in enumerate(self.pairs):
+            if self.end_of[a] == b:
+                continue
+            if k == last:
+                fa, fb = self.end_of[a], self.end_of[b]
+                return fa if self.unset[fa] <= self.unset[fb] else fb
+            for front in (self.end_of[a], self.end_of[b]):
+                if self.unset[front] < best_free:
+                    best, best_free = front, self.unset[front]
+        return best
+
+    def _choices(self, v: int) -> list[int]:
+        """Nieustalone krawędzie frontu *v* w kolejności prób.
+
+        Bez ``fill`` najpierw najkrótsza droga do drugiego frontu (BFS po
+        polach, które mogą mieć ten kolor); z ``fill`` – pole z najmniejszą
+        liczbą nieustalonych krawędzi (reguła Warnsdorffa: pole przy ścianie
+        albo przy innej ścieżce trzeba zająć teraz, bo potem zostanie ślepym
+        zaułkiem), dopiero potem odległość.
+        """
+        choices = [(w, e) for w, e in self.adj[v] if self.state[e] == _UNSET]
+        mine = self.color[v]
+        a, b = self.pairs[mine.bit_length() - 1]
+        target = self.end_of[b] if self.end_of[v] == a else self.end_of[a]
+        distance, noise = self._distances(target, mine), self.noise
+        if self.fill:
+            choices.sort(key=lambda choice: (self.unset[choice[0]], distance[choice[0]], noise[choice[0]]))
+        else:
+            choices.sort(key=lambda choice: (distance[choice[0]], noise[choice[0]]))
+        return [e for _, e in choices]
+
+    def _distances(self, target: int, mine: int) -> list[int]:
+        """Odległości BFS od *target* po polach, które mogą mieć kolor *mine*."""
+        color, state = self.color, self.state
+        distance = [len(color)] * len(color)
+        distance[target] = 0
+        layer = [target]
+        while layer:
+            following = []
+            for v in layer:
+                for w, e in self.adj[v]:
+                    if state[e] != _OFF and color[w] & mine and distance[w] > distance[v] + 1:
+                        distance[w] = distance[v] + 1
+                        following.append(w)
+            layer = following
+        return distance
+
+    def _dfs(self, last: int = -1) -> bool:
+        """Jeden węzeł przeszukiwania; *last* – nr pary przedłużonej przed chwilą."""
+        self.nodes += 1
+        if not self.nodes & 63:
+            self._check_time()
+        if self.nodes > self.node_limit:
+            raise _Restart
+        v = self._branch_cell(last)
+        if v is None:
+            # wszystkie pary połączone; przy fill nie może zostać wolne pole
+            return not self.fill or all(self.on)
+        for e in self._choices(v):
+            mark = len(self.trail)
+            if self._set_edge(e, _ON) and self._settle() and self._dfs(self.color[v].bit_length() - 1):
+                return True
+            self.queue.clear()
+            self._undo(mark)
+        return False
+
+    def solution_paths(self) -> dict[str, list[tuple[int, int]]]:
+        paths = {}
+        for color, (a, b) in zip(self.colors, self.pairs):
+            path, previous = [a], None
+            while path[-1] != b:
+                v = path[-1]
+                path.append(next(
+                    w for w, e in self.adj[v] if self.state[e] == _ON and w != previous
+                ))
+                previous = v
+            paths[color] = [divmod(v, self.cols) for v in path]
+        return paths
+
+
+def solve(
+    rows: int, cols: int, dots: list[dict], *, fill: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Solution:
+    """Rozwiązuje planszę; ``dots`` w formacie ``GameBoard.dots``.
+
+    Kropki łamiące reguły ``GameBoardSerializer.validate`` (kolor nie 2×,
+    poza siatką, duplikat pola) dają ``"invalid"``.  Ścieżki zwracamy jako
+    listy pól ``(row, col)`` od kropki do kropki.
+    """
+    started = time.perf_counter()
+    early = _precheck(rows, cols, dots, started)
+    if early is not None:
+        return early
+    search = None
+    try:
+        search = _Search(rows, cols, dots, fill, timeout)
+        status = SOLVED if search.run() else UNSOLVABLE
+    except _OutOfTime:
+        status = UNKNOWN
+    return Solution(
+        status=status,
+        paths=search.solution_paths() if status == SOLVED else {},
+        nodes=search.nodes if search is not None else 0,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def solve_cached(
+    rows: int, cols: int, dots: list[dict], *, fill: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Solution:
+    """:func:`solve` z pamięcią wyników pod kanonicznym odciskiem planszy.
+
+    W cache trafia wynik dla postaci kanonicznej (kolory = numery); ścieżki
+    przekładamy z powrotem na układ i kolory pytającej planszy.  ``"unknown"``
+    nie jest zapamiętywany – przy dłuższym ``timeout`` może się rozstrzygnąć.
+    """
+    started = time.perf_counter()
+    early = _precheck(rows, cols, dots, started)
+    if early is not None:
+        return early
+    form = canonical(rows, cols, dots)
+    cache = caches["solver"]
+    key = f"{form.fingerprint}:{'fill' if fill else 'link'}"
+    entry = cache.get(key)
+    cached = entry is not None
+    if not cached:
+        result = solve(form.rows, form.cols, form.dot_dicts(), fill=fill, timeout=timeout)
+        entry = (result.status, result.paths, result.nodes)
+        if result.status != UNKNOWN:
+            cache.set(key, entry)
+    status, paths, nodes = entry
+    return Solution(
+        status=status,
+        paths={
+            form.colors[int(label)]: [form.restore(r, c) for r, c in cells]
+            for label, cells in paths.items()
+        },
+        nodes=nodes,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+        fingerprint=form.fingerprint,
+        cached=cached,
+    )
+
+
+def solve_board(board, **kwargs) -> Solution:
+    return solve_cached(board.rows, board.cols, board.dots or [], **kwargs)
@@ -4,189 +4,1279 @@
 Ta wersja *routes/sse.py* publikuje zdarzenia domenowe (GameBoard, Route)
 do kanału **Redis**.  Każdy worker Django/ASGI uruchamia własny wątek
 listenera, który subskrybuje ten kanał i przekazuje odebrane wiadomości do
-lokalnych kolejek klientów SSE.
+lokalnych kolejek klientów SSE.  Import modułu nie łączy się z Redis –
+infrastrukturę uruchamia :func:`start` (leniwie albo ``SSE_AUTOSTART``).
 
 • *Fan‑out* odbywa się centralnie w Redis, więc **N** procesów może współdzielić
   jeden strumień zdarzeń.
 • Kod nadal działa na ``StreamingHttpResponse`` – można go hostować pod
   uvicorn / Daphne.
-• W środowisku developerskim, gdy Redis nie jest dostępny, moduł automatycznie
-  przełącza się na poprzedni tryb „in‑memory”.
+• Pod ASGI (``settings.SSE_ASYNC``) działa :func:`event_stream_async` –
+  asynchroniczny generator i **jeden** subskrybent ``redis.asyncio`` na pętlę
+  zdarzeń, więc bezczynny klient nie blokuje wątku.  Wątkowy
+  :func:`event_stream` zostaje dla WSGI.
+• Połączenia biorą się z jednej puli na proces; listener ma nadzór
+  z wykładniczym backoffem i po reconnect nadrabia lukę ze strumienia.
+  Gdy Redis nie jest dostępny, publikacja przechodzi na tryb „in‑memory”
+  (``SSE_LOCAL_FALLBACK``) i wraca do Redis, gdy ten wstanie; stan widać
+  w ``/sse/stats/`` i ``/sse/health/``.
+• Zdarzenia trafiają na kanały tematyczne (``global``, ``board:<id>``,
+  ``owner:<username>``); klient wybiera temat parametrem ``?board=`` /
+  ``?owner=`` i dostaje tylko to, co go dotyczy.
+• Ramka SSE jest kodowana do ``bytes`` raz i współdzielona przez wszystkich
+  klientów; klient, który nie nadąża, podlega ``SSE_SLOW_CONSUMER_POLICY``,
+  a straty widać w ``/sse/stats/``.
+• Sygnały ORM publikują dopiero po ``transaction.on_commit``, a serie
+  zapisów tej samej planszy/ścieżki w oknie ``SSE_COALESCE_MS`` sklejamy
+  w jedno zdarzenie z najnowszym stanem.
+• Każda ramka ma pole ``id:``; ostatnie zdarzenia trzymamy w ograniczonym
+  dzienniku (strumień Redis lub bufor pierścieniowy), więc klient wracający
+  z ``Last-Event-ID`` dostaje tylko to, co przegapił – albo ``resync``, gdy
+  luka jest większa niż dziennik.
+• Metryki (sekcja 8): połączenia, głębokość kolejek klientów, opóźnienie
+  publikacja → dostarczenie (czas publikacji jedzie w nagłówku wiadomości
+  Redis), opóźnienie listenera, straty i wznowienia.  Widać je
+  w ``/sse/stats/``, ``/metrics`` i – dla wszystkich workerów naraz, przez
+  raport w Redis – w ``manage.py sse_stats``.
 """
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-import queue
+import random
+import socket
 import threading
 import time
-from typing import Generator
+import weakref
+from collections import Counter, deque
+from itertools import islice
+from typing import TYPE_CHECKING, AsyncGenerator, Generator
 
-import redis  # pip install redis>=5.0
-from django.db.models.signals import post_save, post_delete
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.utils.timezone import now
 
+from . import metrics
 from .models import GameBoard, Route
 
+if TYPE_CHECKING:
+    import redis  # pip install redis>=5.0; importowany leniwie – patrz start()
+
 # ---------------------------------------------------------------------------
 # 1 – Konfiguracja Redis
 # ---------------------------------------------------------------------------
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-REDIS_CHANNEL = os.getenv("SSE_CHANNEL", "sse:events")
+REDIS_CHANNEL = os.getenv("SSE_CHANNEL", "sse:events")  # prefiks kanałów tematycznych
+REDIS_STREAM = os.getenv("SSE_STREAM", "sse:log")
+EVENT_LOG_SIZE = int(os.getenv("SSE_LOG_SIZE", "1000"))
+COALESCE_WINDOW = int(os.getenv("SSE_COALESCE_MS", "200")) / 1000  # 0 = wyłączone
+
+logger = logging.getLogger(__name__)
+
+# Gdy Redis leży: "1" – zdarzenia idą tylko do klientów tego procesu (dev,
+# pojedynczy worker); "0" – odrzucamy je, zamiast rozjechać stan między
+# workerami (split‑brain) – klienci dostaną ``resync`` przy wznowieniu.
+LOCAL_FALLBACK = os.getenv("SSE_LOCAL_FALLBACK", "1") in {"1", "true", "True"}
+REDIS_TIMEOUT = float(os.getenv("SSE_REDIS_TIMEOUT", "2"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("SSE_REDIS_MAX_CONNECTIONS", "50"))
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = float(os.getenv("SSE_RECONNECT_MAX", "30"))
+
+# Wspólne opcje pul (sync i ``redis.asyncio``).  Bez decode_responses: ramki
+# zostają bajtami od Redis aż do gniazda klienta.
+_POOL_OPTIONS = {
+    "socket_connect_timeout": REDIS_TIMEOUT,
+    "socket_timeout": REDIS_TIMEOUT,
+    "socket_keepalive": True,
+    "health_check_interval": 30,
+    "max_connections": REDIS_MAX_CONNECTIONS,
+}
+
+
+def _backoff(attempt: int) -> float:
+    """Opóźnienie kolejnej próby: wykładnicze z limitem i „jitterem”."""
+    delay = min(RECONNECT_MAX, RECONNECT_MIN * 2 ** min(attempt, 16))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class _RedisLink:
+    """Jedna pula połączeń na proces + stan zdrowia Redis.
+
+    Pulę (i sam pakiet ``redis``) tworzy dopiero :meth:`start` – import
+    modułu nic nie łączy.  Publikacja pyta :meth:`usable`; błąd dowolnej
+    operacji zgłaszamy przez :meth:`mark_down`, a udany ping/subskrypcja
+    przez :meth:`mark_up`.  W stanie awarii kolejny ping próbujemy dopiero
+    po :func:`_backoff`, więc martwy Redis nie spowalnia każdego zapisu
+    o timeout połączenia.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.started = False
+        self.client: redis.Redis | None = None
+        self.log: _RedisEventLog | None = None
+        self.healthy = False
+        self.failures = 0
+        self.reconnects = 0
+        self.last_error = ""
+        self.changed_at = time.time()
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.started:
+                return
+            import redis
+
+            self.client = redis.Redis(
+                connection_pool=redis.ConnectionPool.from_url(self.url, **_POOL_OPTIONS)
+            )
+            self.log = _RedisEventLog(self.client)
+            self.started = True
+        self.check()
+
+    def check(self) -> bool:
+        import redis
+
+        try:
+            self.client.ping()
+        except redis.RedisError as exc:
+            self.mark_down(exc)
+            return False
+        self.mark_up()
+        return True
+
+    def usable(self) -> bool:
+        if self.healthy:
+            return True
+        if not self.started:
+            self.start()
+            return self.healthy
+        if time.monotonic() < self._retry_at:
+            return False
+        return self.check()
 
-try:
-    _redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
-    # Krótki test połączenia; rzuci wyjątek, jeśli brak serwera Redis.
-    _redis.ping()
-    _redis_available = True
-except Exception:  # noqa: BLE001
-    _redis_available = False
+    def mark_up(self) -> None:
+        with self._lock:
+            if self.healthy:
+                return
+            self.healthy, self.failures = True, 0
+            self.changed_at = time.time()
+        logger.info("SSE: Redis dostępny – fan‑out przez %s", REDIS_CHANNEL)
+
+    def mark_down(self, exc: Exception) -> None:
+        with self._lock:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            self._retry_at = time.monotonic() + _backoff(self.failures)
+            self.failures += 1
+            if not self.healthy:
+                return
+            self.healthy = False
+            self.changed_at = time.time()
+        logger.warning(
+            "SSE: Redis niedostępny (%s) – tryb %s",
+            self.last_error, "lokalny" if LOCAL_FALLBACK else "bez publikacji",
+        )
+
+    def state(self) -> dict:
+        if self.healthy:
+            mode = "redis"
+        else:
+            mode = "local" if LOCAL_FALLBACK else "off"
+        if not self.started:
+            status = "idle"
+        else:
+            status = "up" if self.healthy else "down"
+        return {
+            "status": status,
+            "mode": mode,
+            "since": self.changed_at,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+_link = _RedisLink(REDIS_URL)
+
+CLIENT_QUEUE_SIZE = 200
+KEEPALIVE_SECONDS = 15
 
 # ---------------------------------------------------------------------------
 # 2 – Lokalne kolejki klientów (per proces)
 # ---------------------------------------------------------------------------
-_client_queues: list[queue.Queue[str]] = []
-_clients_lock = threading.Lock()
+GLOBAL_TOPIC = "global"
 
+# Co zrobić z klientem, który nie nadąża (pełny bufor):
+#   drop_oldest – wyrzuca najstarsze oczekujące zdarzenie,
+#   coalesce    – wyrzuca starsze zdarzenie tej samej encji (plansza/ścieżka),
+#                 a gdy takiego nie ma – najstarsze,
+#   disconnect  – zamyka strumień; klient wraca z Last-Event-ID i dostaje
+#                 brakujące zdarzenia z dziennika.
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+SLOW_CONSUMER_POLICY = os.getenv("SSE_SLOW_CONSUMER_POLICY", "drop_oldest")
+if SLOW_CONSUMER_POLICY not in SLOW_CONSUMER_POLICIES:
+    raise ImproperlyConfigured(
+        f"SSE_SLOW_CONSUMER_POLICY musi być jednym z: {', '.join(SLOW_CONSUMER_POLICIES)}."
+    )
 
-def _fan_out_local(payload: str) -> None:
-    """Wrzuca *payload* do kolejek klientów utrzymywanych przez ten proces."""
-    with _clients_lock:
-        for q in list(_client_queues):
+OVERFLOW_FRAME = b"event: overflow\ndata: {}\n\n"
+
+_stats: Counter[str] = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# publikacja → ramka oddana serwerowi (razem z czekaniem w kolejce klienta)
+_delivery_latency = metrics.Histogram(LATENCY_BUCKETS)
+# publikacja → wiadomość odebrana przez listener Redis tego workera
+_listener_lag = metrics.Histogram(LATENCY_BUCKETS)
+
+
+class _Event:
+    """Zdarzenie zakodowane raz; ``frame`` (bytes) współdzielą wszyscy klienci."""
+
+    __slots__ = ("frame", "entity", "key", "published", "local")
+
+    def __init__(
+        self, frame: bytes, entity: str = "", published: float | None = None, local: bool = False,
+    ) -> None:
+        self.frame = frame
+        self.entity = entity  # np. "board:5" – klucz dla polityki coalesce
+        self.key = _frame_key(frame)
+        self.published = published  # time.time() publikacji; None – powtórka z dziennika
+        self.local = local  # z dziennika w pamięci (awaria Redis); ID nieporównywalne z Redis
+
+
+class _Subscriber:
+    """Bufor oczekujących zdarzeń jednego klienta + polityka przepełnienia."""
+
+    def __init__(self, topic: str, policy: str = SLOW_CONSUMER_POLICY) -> None:
+        self.topic = topic
+        self.policy = policy
+        self.pending: deque[_Event] = deque()
+        self.dropped = 0
+        self.overflowed = False
+
+    def _offer(self, event: _Event) -> None:
+        if self.overflowed:
+            return
+        if len(self.pending) >= CLIENT_QUEUE_SIZE:
+            if self.policy == "disconnect":
+                self.overflowed = True
+                self.pending.clear()
+                _count("disconnected")
+                return
+            if not (self.policy == "coalesce" and self._coalesce(event.entity)):
+                self.pending.popleft()
+                self.dropped += 1
+                _count("dropped")
+        self.pending.append(event)
+
+    def _coalesce(self, entity: str) -> bool:
+        if not entity:
+            return False
+        for i, queued in enumerate(self.pending):
+            if queued.entity == entity:
+                # Usuwamy starszą wersję zamiast podmieniać ją w miejscu –
+                # dzięki temu ID w strumieniu klienta nadal rosną.
+                del self.pending[i]
+                _count("coalesced")
+                return True
+        return False
+
+    def _drain(self) -> list[_Event]:
+        events = list(self.pending)
+        self.pending.clear()
+        return events
+
+
+class _ThreadSubscriber(_Subscriber):
+    """Klient widoku wątkowego; ``offer`` woła wątek listenera lub publikujący."""
+
+    def __init__(self, topic: str, policy: str = SLOW_CONSUMER_POLICY) -> None:
+        super().__init__(topic, policy)
+        self._ready = threading.Condition()
+
+    def offer(self, event: _Event) -> None:
+        with self._ready:
+            self._offer(event)
+            self._ready.notify()
+
+    def take(self, timeout: float) -> list[_Event]:
+        with self._ready:
+            if not self.pending and not self.overflowed:
+                self._ready.wait(timeout)
+            return self._drain()
+
+
+class _AsyncSubscriber(_Subscriber):
+    """Klient widoku ``asyncio``; wszystkie metody wołamy w wątku pętli."""
+
+    def __init__(self, topic: str, policy: str = SLOW_CONSUMER_POLICY) -> None:
+        super().__init__(topic, policy)
+        self._ready = asyncio.Event()
+
+    def offer(self, event: _Event) -> None:
+        self._offer(event)
+        self._ready.set()
+
+    async def take(self, timeout: float) -> list[_Event]:
+        if not self.pending and not self.overflowed:
             try:
-                q.put_nowait(payload)
-            except queue.Full:
-                # Pomijamy komunikat dla *tego* klienta – jest zasypany.
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
                 pass
+        self._ready.clear()
+        return self._drain()
+
+
+# temat → klienci zainteresowani tematem; publikacja dotyka tylko ich.
+# Krotki podmieniamy pod blokadą (copy‑on‑write), a fan‑out czyta migawkę
+# bez blokady – wolny klient nie wstrzymuje rejestracji pozostałych.
+_topic_subscribers: dict[str, tuple[_ThreadSubscriber, ...]] = {}
+_clients_lock = threading.Lock()
+
+
+def _channel(topic: str) -> str:
+    return f"{REDIS_CHANNEL}:{topic}"
+
+
+def _channel_topic(channel: bytes | str) -> str:
+    if isinstance(channel, bytes):
+        channel = channel.decode()
+    return channel[len(REDIS_CHANNEL) + 1:]
+
+
+def _decode_message(data: bytes) -> _Event:
+    """Wiadomość z kanału Redis: ``<encja> <czas publikacji, ms>\\n<ramka SSE>``."""
+    header, _, frame = data.partition(b"\n")
+    entity, _, published = header.partition(b" ")
+    return _Event(frame, entity.decode(), int(published) / 1000 if published.isdigit() else None)
+
+
+def _subscribe(topic: str) -> _ThreadSubscriber:
+    sub = _ThreadSubscriber(topic)
+    with _clients_lock:
+        _topic_subscribers[topic] = (*_topic_subscribers.get(topic, ()), sub)
+    return sub
+
+
+def _unsubscribe(sub: _ThreadSubscriber) -> None:
+    with _clients_lock:
+        rest = tuple(s for s in _topic_subscribers.get(sub.topic, ()) if s is not sub)
+        if rest:
+            _topic_subscribers[sub.topic] = rest
+        else:
+            _topic_subscribers.pop(sub.topic, None)
+
+
+def _fan_out_local(topic: str, event: _Event) -> None:
+    """Przekazuje *event* klientom tematu *topic* w tym procesie."""
+    for sub in _topic_subscribers.get(topic, ()):
+        sub.offer(event)
 
 
 # ---------------------------------------------------------------------------
-# 3 – Publikowanie zdarzeń (globalne)
+# 2a – Klienci asynchroniczni (ASGI): jeden hub na pętlę zdarzeń
 # ---------------------------------------------------------------------------
 
-def _publish(payload: str) -> None:
-    if _redis_available:
-        _redis.publish(REDIS_CHANNEL, payload)
-    else:
-        # Tryb awaryjny – labowy in‑memory fallback.
-        _fan_out_local(payload)
+class _LoopHub:
+    """Klienci ``asyncio`` jednej pętli + jej subskrybent Redis.
+
+    Wszystkie metody poza :meth:`deliver_threadsafe` wołamy z wątku pętli,
+    więc indeks tematów nie potrzebuje blokady.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.subscribers: dict[str, set[_AsyncSubscriber]] = {}
+        self._listener: asyncio.Task | None = None
+
+    def add(self, topic: str) -> _AsyncSubscriber:
+        sub = _AsyncSubscriber(topic)
+        self.subscribers.setdefault(topic, set()).add(sub)
+        if self._listener is None:
+            self._listener = self.loop.create_task(self._listen())
+        return sub
+
+    def remove(self, sub: _AsyncSubscriber) -> None:
+        subscribers = self.subscribers.get(sub.topic, set())
+        subscribers.discard(sub)
+        if not subscribers:
+            self.subscribers.pop(sub.topic, None)
+        if not self.subscribers and self._listener is not None:
+            # Ostatni klient odszedł – nie trzymamy subskrypcji na zapas.
+            self._listener.cancel()
+            self._listener = None
+
+    def dispatch(self, topic: str, event: _Event) -> None:
+        for sub in self.subscribers.get(topic, ()):
+            sub.offer(event)
+
+    def deliver_threadsafe(self, topic: str, event: _Event) -> None:
+        """Przekazuje *event* z dowolnego wątku (np. z sygnału ORM)."""
+        try:
+            self.loop.call_soon_threadsafe(self.dispatch, topic, event)
+        except RuntimeError:
+            # Pętla już zamknięta – hub zniknie razem z nią.
+            pass
+
+    async def _listen(self) -> None:
+        """Subskrypcja z nadzorem: po zerwaniu łączymy się ponownie z backoffem.
+
+        Pula ``redis.asyncio`` jest związana z pętlą, więc każdy hub ma własną
+        (opcje jak w :data:`_link`); stan zdrowia jest wspólny.
+        """
+        import redis
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(REDIS_URL, **_POOL_OPTIONS)
+        cursor = _StreamCursor()
+        attempt = 0
+        try:
+            while True:
+                pubsub = client.pubsub()
+                try:
+                    await pubsub.psubscribe(_channel("*"))
+                    if cursor.last is None:
+                        cursor.anchor(await client.xrevrange(REDIS_STREAM, count=1))
+                    else:
+                        _link.reconnects += 1
+                        oldest = await client.xrange(REDIS_STREAM, count=1)
+                        entries = await client.xrange(REDIS_STREAM, **cursor.gap())
+                        cursor.replay(oldest, entries, self.dispatch, list(self.subscribers))
+                    _link.mark_up()
+                    attempt = 0
+                    while True:
+                        msg = await pubsub.get_message(timeout=KEEPALIVE_SECONDS)
+                        if msg is not None and msg["type"] == "pmessage":
+                            event = _received(msg["data"])
+                            if cursor.accept(event):
+                                self.dispatch(_channel_topic(msg["channel"]), event)
+                        elif not _link.healthy and time.monotonic() >= _link._retry_at:
+                            await client.ping()
+                            _link.mark_up()
+                        if _reporter.due():
+                            await client.set(**_reporter.entry())
+                except (redis.RedisError, OSError) as exc:
+                    _link.mark_down(exc)
+                except Exception:  # noqa: BLE001
+                    logger.exception("SSE: błąd listenera Redis")
+                finally:
+                    await pubsub.aclose()
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+        finally:
+            await client.aclose()
+
+
+_loop_hubs: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopHub] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loop_hub() -> _LoopHub:
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        hub = _loop_hubs.get(loop)
+        if hub is None:
+            hub = _loop_hubs[loop] = _LoopHub(loop)
+    return hub
+
+
+def _fan_out_loops(topic: str, event: _Event) -> None:
+    """Przekazuje *event* hubom asynchronicznym (tryb bez Redis)."""
+    with _clients_lock:
+        hubs = list(_loop_hubs.values())
+    for hub in hubs:
+        hub.deliver_threadsafe(topic, event)
+
+
+# ---------------------------------------------------------------------------
+# 3 – Publikowanie zdarzeń (tematy + dziennik)
+# ---------------------------------------------------------------------------
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+
+def _frame(event_id: str, body: str) -> bytes:
+    return f"id: {event_id}\n{body}".encode()
+
+
+def _id_key(event_id: str) -> tuple[int, int] | None:
+    """``"1716300000000-3"`` → ``(1716300000000, 3)``; ``None`` dla śmieci."""
+    ms, _, seq = event_id.strip().partition("-")
+    try:
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return None
+
+
+def _frame_key(frame: bytes) -> tuple[int, int] | None:
+    if not frame.startswith(b"id: "):
+        return None
+    return _id_key(frame[4:frame.find(b"\n")].decode())
+
+
+class _MemoryEventLog:
+    """Bufor pierścieniowy ostatnich ramek – tryb awaryjny bez Redis.
+
+    ID mają postać ``<epoka>-<n>`` (jak w strumieniu Redis); epoka to start
+    procesu, więc ID sprzed restartu kończą się ``resync``.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._events: deque[tuple[tuple[str, ...], _Event]] = deque(maxlen=size)
+        self._epoch = time.time_ns() // 1_000_000
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def publish(self, topics: tuple[str, ...], entity: str, body: str) -> str:
+        # Pod blokadą tylko ID i dopisanie do dziennika; fan‑out (z ``_coalesce``
+        # O(kolejka) na klienta) już bez niej – jak w listenerze Redis.  Dwa
+        # równoległe publish mogą dotrzeć do klienta w odwrotnej kolejności;
+        # nic nie ginie – po reconnect klient najwyżej dostanie ramkę drugi raz.
+        with self._lock:
+            self._seq += 1
+            event_id = f"{self._epoch}-{self._seq}"
+            event = _Event(_frame(event_id, body), entity, time.time(), local=True)
+            self._events.append((topics, event))
+        for topic in topics:
+            _fan_out_local(topic, event)
+            _fan_out_loops(topic, event)
+        return event_id
+
+    def since(self, last_id: str, topic: str) -> list[bytes] | None:
+        key = _id_key(last_id)
+        with self._lock:
+            if key is None or key[0] != self._epoch or key[1] > self._seq:
+                return None
+            missed = self._seq - key[1]
+            if missed > len(self._events):
+                return None
+            return [
+                event.frame
+                for topics, event in islice(self._events, len(self._events) - missed, None)
+                if topic in topics
+            ]
+
+
+class _RedisEventLog:
+    """Strumień Redis przycinany do ~``EVENT_LOG_SIZE`` wpisów.
+
+    XADD i PUBLISH (na kanał każdego tematu) wykonuje jeden skrypt Lua, więc
+    nawet przy wielu publikujących workerach kolejność ID na kanałach zgadza
+    się ze strumieniem.
+    """
+
+    _SCRIPT = """
+    local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*',
+                          'frame', ARGV[2], 'topics', ARGV[3], 'entity', ARGV[4])
+    local message = ARGV[4] .. ' ' .. ARGV[5] .. '\\n' .. 'id: ' .. id .. '\\n' .. ARGV[2]
+    for i = 6, #ARGV do
+        redis.call('PUBLISH', ARGV[i], message)
+    end
+    return id
+    """
+
+    def __init__(self, client: redis.Redis) -> None:
+        self._redis = client
+        self._publish = client.register_script(self._SCRIPT)
+
+    def publish(self, topics: tuple[str, ...], entity: str, body: str) -> str:
+        event_id = self._publish(
+            keys=[REDIS_STREAM],
+            args=[EVENT_LOG_SIZE, body, " ".join(topics), entity, time.time_ns() // 1_000_000,
+                  *map(_channel, topics)],
+        )
+        return event_id.decode()
+
+    def since(self, last_id: str, topic: str) -> list[bytes] | None:
+        key = _id_key(last_id)
+        if key is None:
+            return None
+        # Samo ID musi wciąż być w strumieniu: inaczej zostało przycięte albo
+        # pochodzi z dziennika lokalnego (klient z czasu awarii Redis).
+        event_id = f"{key[0]}-{key[1]}"
+        if not self._redis.xrange(REDIS_STREAM, min=event_id, max=event_id, count=1):
+            return None
+        entries = self._redis.xrange(REDIS_STREAM, min=f"({event_id}", count=EVENT_LOG_SIZE)
+        wanted = topic.encode()
+        return [
+            b"id: " + entry_id + b"\n" + fields[b"frame"]
+            for entry_id, fields in entries
+            if wanted in fields[b"topics"].split(b" ")
+        ]
+
+
+_local_log = _MemoryEventLog(EVENT_LOG_SIZE)
+
+
+def _publish(topics: tuple[str, ...], entity: str, body: str) -> str | None:
+    """Publikuje przez Redis, a gdy ten leży – lokalnie (``SSE_LOCAL_FALLBACK``)."""
+    if _link.usable():
+        import redis
+
+        try:
+            return _link.log.publish(topics, entity, body)
+        except redis.RedisError as exc:
+            _link.mark_down(exc)
+    if not LOCAL_FALLBACK:
+        _count("unpublished")
+        return None
+    return _local_log.publish(topics, entity, body)
+
+
+# Próg deduplikacji: (czy z dziennika lokalnego, ID ostatniej powtórzonej ramki).
+_Horizon = tuple[bool, tuple[int, int]]
+
+
+def _resume(last_id: str | None, topic: str) -> tuple[list[bytes], _Horizon | None]:
+    """Ramki do powtórzenia po ``Last-Event-ID`` oraz próg deduplikacji.
+
+    Klienta rejestrujemy *przed* odczytem dziennika, więc zdarzenie może
+    przyjść dwa razy – raz z powtórki, raz z kolejki; próg je odsiewa.
+    Próg dotyczy tylko zdarzeń z tego samego dziennika: ID lokalne
+    (``<start procesu>-<n>``) są zawsze „starsze” niż ID Redis, więc po
+    awarii Redis porównanie odrzuciłoby każde zdarzenie z trybu lokalnego.
+    """
+    if not last_id:
+        return [], None
+    _count("resumed")
+    backlog, local = None, False
+    if _link.healthy:
+        import redis
+
+        try:
+            backlog = _link.log.since(last_id, topic)
+        except redis.RedisError as exc:
+            _link.mark_down(exc)
+    elif LOCAL_FALLBACK:
+        backlog, local = _local_log.since(last_id, topic), True
+    if backlog is None:
+        _count("resynced")
+        return [RESYNC_FRAME], None
+    key = _frame_key(backlog[-1]) if backlog else _id_key(last_id)
+    return backlog, (local, key)
+
+
+def _is_replayed(event: _Event, horizon: _Horizon | None) -> bool:
+    if horizon is None or event.key is None:
+        return False
+    local, key = horizon
+    return event.local == local and event.key <= key
+
+
+def _frames(events: list[_Event], horizon: _Horizon | None) -> Generator[bytes, None, None]:
+    """Ramki dla klienta (bez powtórzonych) + pomiar publikacja → dostarczenie."""
+    delivered_at = time.time()
+    for event in events:
+        if _is_replayed(event, horizon):
+            continue
+        if event.published is not None:
+            _delivery_latency.observe(max(0.0, delivered_at - event.published))
+        yield event.frame
 
 
 # ---------------------------------------------------------------------------
 # 4 – Listener Redis → lokalny fan‑out
 # ---------------------------------------------------------------------------
 
+class _StreamCursor:
+    """Pozycja listenera w strumieniu – pozwala nadrobić lukę po reconnect.
+
+    Wiadomości pub/sub wysłane, gdy listener był rozłączony, przepadają, ale
+    te same zdarzenia leżą w strumieniu.  Po ponownej subskrypcji dostarczamy
+    je lokalnie z XRANGE, a duplikaty, które zdążą przyjść i z kanału,
+    odsiewamy progiem :attr:`skip`.
+    """
+
+    def __init__(self) -> None:
+        self.last: tuple[int, int] | None = None
+        self.skip: tuple[int, int] | None = None
+
+    def gap(self) -> dict:
+        """Argumenty XRANGE: wszystko po ostatnim znanym ID."""
+        return {"min": f"({self.last[0]}-{self.last[1]}", "count": EVENT_LOG_SIZE}
+
+    def anchor(self, tail: list) -> None:
+        """Pierwsze połączenie: zapamiętujemy koniec strumienia (XREVRANGE)."""
+        self.last = _id_key(tail[0][0].decode()) if tail else (0, 0)
+
+    def replay(self, oldest: list, entries: list, deliver, topics: list[str]) -> None:
+        """Dostarcza przegapione wpisy; gdy część przycięto – ``resync`` dla *topics*."""
+        if oldest and _id_key(oldest[0][0].decode()) > self.last and self.last != (0, 0):
+            resync = _Event(RESYNC_FRAME)
+            for topic in topics:
+                deliver(topic, resync)
+        for entry_id, fields in entries:
+            event = _Event(b"id: " + entry_id + b"\n" + fields[b"frame"],
+                           fields.get(b"entity", b"").decode())
+            for topic in fields[b"topics"].decode().split(" "):
+                deliver(topic, event)
+            self.last = self.skip = event.key
+
+    def accept(self, event: _Event) -> bool:
+        if event.key is None:
+            return True
+        if self.skip is not None and event.key <= self.skip:
+            return False
+        self.last = event.key
+        return True
+
+
+def _received(data: bytes) -> _Event:
+    """Wiadomość pub/sub → zdarzenie; zegary workerów różnią się o skew NTP."""
+    event = _decode_message(data)
+    if event.published is not None:
+        _listener_lag.observe(max(0.0, time.time() - event.published))
+    return event
+
+
 _listener_started = False
 
 
+def _listen_forever() -> None:
+    """Wątek listenera: subskrypcja z nadzorem i wykładniczym backoffem.
+
+    Jeden wzorzec zamiast (od)subskrypcji per temat – lista kanałów nie
+    zależy od tego, kto akurat jest podłączony; filtruje indeks tematów.
+    """
+    import redis
+
+    cursor = _StreamCursor()
+    attempt = 0
+    while True:
+        pubsub = _link.client.pubsub()
+        try:
+            pubsub.psubscribe(_channel("*"))
+            if cursor.last is None:
+                cursor.anchor(_link.client.xrevrange(REDIS_STREAM, count=1))
+            else:
+                _link.reconnects += 1
+                with _clients_lock:
+                    topics = list(_topic_subscribers)
+                cursor.replay(
+                    _link.client.xrange(REDIS_STREAM, count=1),
+                    _link.client.xrange(REDIS_STREAM, **cursor.gap()),
+                    _fan_out_local,
+                    topics,
+                )
+            _link.mark_up()
+            attempt = 0
+            while True:
+                msg = pubsub.get_message(timeout=KEEPALIVE_SECONDS)
+                if msg is not None and msg["type"] == "pmessage":
+                    event = _received(msg["data"])
+                    if cursor.accept(event):
+                        _fan_out_local(_channel_topic(msg["channel"]), event)
+                elif not _link.healthy:
+                    # Awarię zgłosiła publikacja, a subskrypcja żyje – sprawdzamy sami.
+                    _link.usable()
+                if _reporter.due():
+                    _link.client.set(**_reporter.entry())
+        except (redis.RedisError, OSError) as exc:
+            _link.mark_down(exc)
+        except Exception:  # noqa: BLE001
+            logger.exception("SSE: błąd listenera Redis")
+        finally:
+            pubsub.close()
+        time.sleep(_backoff(attempt))
+        attempt += 1
+
+
 def _start_listener_once() -> None:
     global _listener_started  # noqa: PLW0603
-    if _listener_started or not _redis_available:
-        return
-
-    def _listener() -> None:  # runs forever in background thread
-        pubsub = _redis.pubsub()
-        pubsub.subscribe(REDIS_CHANNEL)
-        for msg in pubsub.listen():
-            if msg.get("type") == "message":
-                _fan_out_local(str(msg["data"]))
+    with _clients_lock:
+        if _listener_started:
+            return
+        _listener_started = True
+    # Startuje także bez Redis: pętla sama ponawia połączenie.
+    threading.Thread(target=_listen_forever, daemon=True, name="sse-redis-listener").start()
 
-    threading.Thread(target=_listener, daemon=True, name="sse-redis-listener").start()
-    _listener_started = True
 
+def start(listener: bool = True) -> None:
+    """Uruchamia połączenie z Redis i (opcjonalnie) wątek listenera.
 
-# Start listener as soon as module is imported
-_start_listener_once()
+    Idempotentne.  Nic nie dzieje się przy imporcie – wołają to pierwsze
+    żądanie strumienia, pierwsza publikacja albo ``RoutesConfig.ready`` przy
+    ``settings.SSE_AUTOSTART``; ``migrate``, ``test`` czy ``shell`` nie płacą
+    za Redis.  Pod ASGI wątek jest zbędny (``listener=False``) – subskrybują
+    huby pętli.
+    """
+    _link.start()
+    if listener:
+        _start_listener_once()
 
 # ---------------------------------------------------------------------------
 # 5 – Pomocnik SSE: serializacja + publish
 # ---------------------------------------------------------------------------
 
-def _sse(event: str, data: dict) -> None:
-    message = f"event: {event}\n" f"data: {json.dumps(data, default=str)}\n\n"
-    _publish(message)
+def _topics(data: dict) -> tuple[str, ...]:
+    """Tematy zdarzenia: zawsze ``global`` + plansza i autor, jeśli znane."""
+    topics = [GLOBAL_TOPIC]
+    if data.get("board_id") is not None:
+        topics.append(f"board:{data['board_id']}")
+    if data.get("owner_username"):
+        topics.append(f"owner:{data['owner_username']}")
+    return tuple(topics)
+
+
+def _entity(data: dict) -> str:
+    if data.get("path_id") is not None:
+        return f"path:{data['path_id']}"
+    if data.get("board_id") is not None:
+        return f"board:{data['board_id']}"
+    return ""
+
+
+def _sse(event: str, data: dict) -> str | None:
+    """Dopisuje zdarzenie do dziennika i rozsyła je; zwraca nadane ID."""
+    body = f"event: {event}\n" f"data: {json.dumps(data, default=str)}\n\n"
+    return _publish(_topics(data), _entity(data), body)
+
+
+# ---------------------------------------------------------------------------
+# 5a – Koalescencja: seria zapisów jednej encji → jedno zdarzenie
+# ---------------------------------------------------------------------------
+
+def _merge(pending: str, incoming: str) -> str:
+    """Nazwa sklejonego zdarzenia: usunięcie wygrywa, utworzenie pochłania edycje."""
+    if incoming.endswith("Deleted"):
+        return incoming
+    if pending.startswith("new"):
+        return pending
+    return incoming
+
+
+class _Coalescer:
+    """Wstrzymuje zdarzenie encji na ``window`` s i skleja kolejne w jedno.
+
+    Okno liczymy od *pierwszego* zdarzenia serii, więc opóźnienie jest
+    ograniczone nawet przy ciągłych zapisach.  Publikuje jeden wątek tła.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        # encja → (termin, nazwa zdarzenia, najnowsze dane); kolejność
+        # wstawienia == kolejność terminów, bo okno jest stałe.
+        self._pending: dict[str, tuple[float, str, dict]] = {}
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, event: str, data: dict) -> None:
+        entity = _entity(data)
+        if self.window <= 0 or not entity:
+            _sse(event, data)
+            return
+        with self._cond:
+            previous = self._pending.get(entity)
+            if previous is None:
+                self._pending[entity] = (time.monotonic() + self.window, event, data)
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, daemon=True, name="sse-coalescer"
+                    )
+                    self._thread.start()
+                self._cond.notify()
+            else:
+                deadline, pending_event, _ = previous
+                self._pending[entity] = (deadline, _merge(pending_event, event), data)
+
+    def flush(self) -> None:
+        """Publikuje od razu wszystko, co czeka (testy, zamykanie procesu)."""
+        with self._cond:
+            due = [(event, data) for _, event, data in self._pending.values()]
+            self._pending.clear()
+        self._publish(due)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now_ = time.monotonic()
+                due = []
+                for entity, (deadline, event, data) in list(self._pending.items()):
+                    if deadline > now_:
+                        break
+                    due.append((event, data))
+                    del self._pending[entity]
+                if not due:
+                    self._cond.wait(deadline - now_)
+                    continue
+            self._publish(due)
+
+    @staticmethod
+    def _publish(due: list[tuple[str, dict]]) -> None:
+        for event, data in due:
+            try:
+                _sse(event, data)
+            except Exception:  # noqa: BLE001 – wątek tła nie może zginąć
+                logger.exception("Nie udało się opublikować zdarzenia SSE %s", event)
+
+
+_coalescer = _Coalescer(COALESCE_WINDOW)
+
+
+def _emit(event: str, data: dict) -> None:
+    """Publikacja z sygnału ORM: po commicie, przez koalescencję."""
+    # robust=True: awaria Redis nie może wywrócić zatwierdzonego zapisu.
+    transaction.on_commit(lambda: _coalescer.submit(event, data), robust=True)
 
 
 # ---------------------------------------------------------------------------
 # 6 – Sygnały Django → SSE
 # ---------------------------------------------------------------------------
-@receiver(post_save, sender=GameBoard)
-def _board_saved(sender, instance: GameBoard, created: bool, **_):
+def _cached(instance, field: str):
+    """Obiekt powiązany, o ile już siedzi w pamięci – bez dodatkowego SELECT."""
+    if getattr(type(instance), field).is_cached(instance):
+        return getattr(instance, field)
+    return None
+
+
+def _username(instance, origin=None) -> str | None:
+    owner = _cached(instance, "owner")
+    if owner is None and isinstance(origin, get_user_model()) and origin.pk == instance.owner_id:
+        owner = origin  # kaskada z usuwanego użytkownika
+    if owner is not None:
+        return owner.username
+    return (
+        get_user_model().objects
+        .filter(pk=instance.owner_id)
+        .values_list("username", flat=True)
+        .first()
+    )
+
+
+def _board_payload(board: GameBoard, origin=None) -> dict:
+    return {
+        "board_id": board.pk,
+        "title": board.title,
+        "rows": board.rows,
+        "cols": board.cols,
+        "owner_username": _username(board, origin),
+    }
+
+
+def _path_payload(route: Route, origin=None) -> dict:
     payload = {
-        "board_id": instance.pk,
-        "title": instance.title,
-        "rows": instance.rows,
-        "cols": instance.cols,
-        "owner_username": instance.owner.username,
+        "path_id": route.pk,
+        "board_id": route.background_id,
+        "owner_username": _username(route, origin),
+        "path_name": route.name,
     }
-    _sse("newBoard" if created else "boardUpdated", payload)
+    board = _cached(route, "background")
+    if board is not None:
+        payload["board_title"] = board.title
+    return payload
+
+
+# Kaskada GameBoard → Route: zamiast N×``pathDeleted`` wysyłamy jedno
+# ``boardDeleted`` z listą usuniętych ścieżek.  Stan trzymamy na obiekcie
+# ``origin`` (instancja/QuerySet, od którego zaczęło się usuwanie), więc
+# przerwane usuwanie nie zostawia po sobie śmieci.
+def _cascade(origin) -> dict[int, dict]:
+    state = getattr(origin, "_sse_cascade", None)
+    if state is None:
+        state = {}
+        if origin is not None:
+            origin._sse_cascade = state
+    return state
+
+
+@receiver(post_save, sender=GameBoard)
+def _board_saved(sender, instance: GameBoard, created: bool, **_):
+    _emit("newBoard" if created else "boardUpdated", _board_payload(instance))
+
+
+@receiver(pre_delete, sender=GameBoard)
+def _board_deleting(sender, instance: GameBoard, origin=None, **_):
+    payload = _board_payload(instance, origin)
+    payload["deleted_path_ids"] = []
+    _cascade(origin)[instance.pk] = payload
 
 
 @receiver(post_delete, sender=GameBoard)
-def _board_deleted(sender, instance: GameBoard, **_):
-    _sse(
-        "boardDeleted",
-        {
-            "board_id": instance.pk,
-            "title": instance.title,
-            "owner_username": instance.owner.username,
-        },
-    )
+def _board_deleted(sender, instance: GameBoard, origin=None, **_):
+    payload = _cascade(origin).pop(instance.pk, None) or _board_payload(instance, origin)
+    _emit("boardDeleted", payload)
 
 
 @receiver(post_save, sender=Route)
 def _path_saved(sender, instance: Route, created: bool, **_):
-    payload = {
-        "path_id": instance.pk,
-        "board_id": instance.background.pk,
-        "board_title": instance.background.title,
-        "owner_username": instance.owner.username,
-        "path_name": instance.name,
-    }
-    _sse("newPath" if created else "pathUpdated", payload)
+    _emit("newPath" if created else "pathUpdated", _path_payload(instance))
 
 
 @receiver(post_delete, sender=Route)
-def _path_deleted(sender, instance: Route, **_):
-    _sse(
-        "pathDeleted",
-        {
-            "path_id": instance.pk,
-            "board_id": instance.background.pk,
-            "board_title": instance.background.title,
-            "owner_username": instance.owner.username,
-        },
-    )
+def _path_deleted(sender, instance: Route, origin=None, **_):
+    batch = _cascade(origin).get(instance.background_id)
+    if batch is not None:
+        batch["deleted_path_ids"].append(instance.pk)
+        return
+    _emit("pathDeleted", _path_payload(instance, origin))
+
+
+def boards_imported(owner, count: int) -> None:
+    """
+    Jedno zdarzenie ``boardsImported`` za cały import – ``bulk_create`` nie
+    wysyła ``post_save``, a N×``newBoard`` zalałoby klientów.
+    """
+    if count:
+        _emit("boardsImported", {"owner_username": owner.username, "count": count})
 
 
 # ---------------------------------------------------------------------------
 # 7 – Django view: /sse/notifications/
 # ---------------------------------------------------------------------------
 
+def _last_event_id(request: HttpRequest) -> str | None:
+    # EventSource wysyła nagłówek sam przy auto‑reconnect; nasz klient TS
+    # tworzy nowe połączenie, więc przekazuje ID w query stringu.
+    return request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+
+
+def _connected_comment() -> bytes:
+    return f": connected {now().isoformat()} via redis={'yes' if _link.healthy else 'no'}\n\n".encode()
+
+
+def _keepalive_comment() -> bytes:
+    return f": keep-alive {int(time.time())}\n\n".encode()
+
+
+def _request_topic(request: HttpRequest) -> str | None:
+    """``?board=<id>`` / ``?owner=<username>`` / brak → ``global``."""
+    if "board" in request.GET:
+        board = request.GET["board"]
+        return f"board:{board}" if board.isdigit() else None
+    if "owner" in request.GET:
+        return f"owner:{request.GET['owner']}" if request.GET["owner"] else None
+    return GLOBAL_TOPIC
+
+
 def event_stream(request: HttpRequest) -> HttpResponse:  # pragma: no cover
     """Długotrwałe połączenie SSE."""
-    _start_listener_once()  # pewność, że listener działa
+    topic = _request_topic(request)
+    if topic is None:
+        return HttpResponseBadRequest("Nieprawidłowy temat SSE.")
+    start()  # pewność, że listener działa
 
-    q: queue.Queue[str] = queue.Queue(maxsize=200)
-    with _clients_lock:
-        _client_queues.append(q)
+    sub = _subscribe(topic)
+    backlog, horizon = _resume(_last_event_id(request), topic)
 
-    def _stream() -> Generator[str, None, None]:
-        yield f": connected {now().isoformat()} via redis={'yes' if _redis_available else 'no'}\n\n"
+    def _stream() -> Generator[bytes, None, None]:
+        yield _connected_comment()
         try:
+            yield from backlog
             while True:
-                try:
-                    payload = q.get(timeout=15)
-                except queue.Empty:
-                    yield f": keep-alive {int(time.time())}\n\n"
-                else:
-                    yield payload
+                events = sub.take(KEEPALIVE_SECONDS)
+                if sub.overflowed:
+                    yield OVERFLOW_FRAME
+                    return
+                if not events:
+                    yield _keepalive_comment()
+                yield from _frames(events, horizon)
         finally:
-            with _clients_lock:
-                _client_queues.remove(q)
+            _unsubscribe(sub)
 
     resp = StreamingHttpResponse(_stream(), content_type="text/event-stream")
     resp["Cache-Control"] = "no-cache"
     return resp
+
+
+async def event_stream_async(request: HttpRequest) -> HttpResponse:  # pragma: no cover
+    """Długotrwałe połączenie SSE bez wątku per klient (ASGI)."""
+    topic = _request_topic(request)
+    if topic is None:
+        return HttpResponseBadRequest("Nieprawidłowy temat SSE.")
+    if not _link.started:
+        await sync_to_async(start, thread_sensitive=False)(listener=False)
+    hub = _loop_hub()
+    sub = hub.add(topic)
+    backlog, horizon = await sync_to_async(_resume, thread_sensitive=False)(
+        _last_event_id(request), topic
+    )
+
+    async def _stream() -> AsyncGenerator[bytes, None]:
+        yield _connected_comment()
+        try:
+            for frame in backlog:
+                yield frame
+            while True:
+                events = await sub.take(KEEPALIVE_SECONDS)
+                if sub.overflowed:
+                    yield OVERFLOW_FRAME
+                    return
+                if not events:
+                    yield _keepalive_comment()
+                for frame in _frames(events, horizon):
+                    yield frame
+        finally:
+            hub.remove(sub)
+
+    resp = StreamingHttpResponse(_stream(), content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# 8 – Statystyki fan‑outu
+# ---------------------------------------------------------------------------
+
+def _worker_id() -> str:
+    # pid liczony przy każdym wywołaniu – gunicorn --preload forkuje po imporcie
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _percentiles(values: list[int]) -> dict:
+    values = sorted(values) or [0]
+    def pick(q: float) -> int:
+        return values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": values[-1]}
+
+
+def _latency_ms(histogram: metrics.Histogram) -> dict:
+    result = {}
+    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        value = histogram.quantile(q)
+        result[name] = None if value is None else round(value * 1000, 1)
+    return result
+
+
+def stats() -> dict:
+    """Stan tego procesu: połączenia, kolejki klientów, opóźnienia i straty."""
+    with _clients_lock:
+        hubs = list(_loop_hubs.values())
+        subscribers = [sub for subs in _topic_subscribers.values() for sub in subs]
+    for hub in hubs:
+        for subs in list(hub.subscribers.values()):
+            subscribers.extend(list(subs))
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        "worker": _worker_id(),
+        "connections": len(subscribers),
+        "queue_depth": _percentiles([len(sub.pending) for sub in subscribers]),
+        "delivery_latency_ms": _latency_ms(_delivery_latency),
+        "listener_lag_ms": _latency_ms(_listener_lag),
+        "slow_consumer_policy": SLOW_CONSUMER_POLICY,
+        "dropped": counters.get("dropped", 0),
+        "coalesced": counters.get("coalesced", 0),
+        "disconnected": counters.get("disconnected", 0),
+        "unpublished": counters.get("unpublished", 0),
+        "resumed": counters.get("resumed", 0),
+        "resynced": counters.get("resynced", 0),
+        "redis": _link.state(),
+    }
+
+
+STATS_KEY = f"{REDIS_STREAM}:workers"
+STATS_INTERVAL = 5.0
+
+
+class _StatsReporter:
+    """Raport :func:`stats` w Redis, żeby ``manage.py sse_stats`` widział
+    wszystkie workery.  Wysyła go listener (budzi się co najmniej co
+    ``KEEPALIVE_SECONDS``); klucz wygasa, gdy worker zniknie.
+    """
+
+    def __init__(self) -> None:
+        self._next = 0.0
+
+    def due(self) -> bool:
+        now_ = time.monotonic()
+        if now_ < self._next:
+            return False
+        self._next = now_ + STATS_INTERVAL
+        return True
+
+    def entry(self) -> dict:
+        report = {**stats(), "reported_at": time.time()}
+        return {
+            "name": f"{STATS_KEY}:{report['worker']}",
+            "value": json.dumps(report, default=str),
+            "ex": 3 * KEEPALIVE_SECONDS,
+        }
+
+
+_reporter = _StatsReporter()
+
+
+def worker_stats() -> list[dict]:
+    """Ostatnie raporty workerów z Redis (posortowane po ``worker``)."""
+    _link.start()
+    keys = sorted(_link.client.scan_iter(match=f"{STATS_KEY}:*"))
+    return [json.loads(value) for value in (_link.client.mget(keys) if keys else []) if value]
+
+
+def _prometheus() -> list[str]:
+    """Metryki SSE tego procesu dla ``/metrics`` (``routes.metrics``)."""
+    current = stats()
+    lines = metrics.header("sse_connections", "gauge", "Otwarte strumienie SSE.")
+    lines.append(metrics.sample("sse_connections", current["connections"]))
+    lines += metrics.header("sse_client_queue_depth", "gauge",
+                            "Zdarzenia czekające w kolejce klienta (percentyle po klientach).")
+    lines += [
+        metrics.sample("sse_client_queue_depth", current["queue_depth"][name], quantile=q)
+        for name, q in (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99"), ("max", "1"))
+    ]
+    lines += _delivery_latency.lines("sse_delivery_latency_seconds",
+                                     "Publikacja → ramka oddana klientowi.")
+    lines += _listener_lag.lines("sse_listener_lag_seconds",
+                                 "Publikacja → odbiór wiadomości przez listener Redis.")
+    lines += metrics.header("sse_slow_consumer_total", "counter",
+                            "Przepełnione kolejki klientów wg reakcji (SSE_SLOW_CONSUMER_POLICY).")
+    lines += [
+        metrics.sample("sse_slow_consumer_total", current[action], action=action)
+        for action in ("dropped", "coalesced", "disconnected")
+    ]
+    lines += metrics.header("sse_unpublished_events_total", "counter",
+                            "Zdarzenia odrzucone przy niedostępnym Redis (bez SSE_LOCAL_FALLBACK).")
+    lines.append(metrics.sample("sse_unpublished_events_total", current["unpublished"]))
+    lines += metrics.header("sse_resumes_total", "counter", "Wznowienia strumienia z Last-Event-ID.")
+    lines.append(metrics.sample("sse_resumes_total", current["resumed"]))
+    lines += metrics.header("sse_resyncs_total", "counter", "Wznowienia zakończone ramką resync.")
+    lines.append(metrics.sample("sse_resyncs_total", current["resynced"]))
+    lines += metrics.header("sse_redis_reconnects_total", "counter", "Ponowne subskrypcje listenera Redis.")
+    lines.append(metrics.sample("sse_redis_reconnects_total", current["redis"]["reconnects"]))
+    lines += metrics.header("sse_redis_up", "gauge", "1 – publikacja idzie przez Redis.")
+    lines.append(metrics.sample("sse_redis_up", int(_link.healthy)))
+    return lines
+
+
+metrics.register_collector(_prometheus)
+
+
+@staff_member_required
+def sse_stats(request: HttpRequest) -> JsonResponse:
+    return JsonResponse(stats())
+
+
+def sse_health(request: HttpRequest) -> JsonResponse:
+    """Sonda dla load balancera: 503, gdy ten worker nie widzi Redis."""
+    _link.start()
+    state = _link.state()
+    return JsonResponse(
+        {"status": state["status"], "mode": state["mode"]},
+        status=200 if _link.healthy else 503,
+    )
@@ -0,0 +1,169 @@
+# routes/synthetic.py
+"""Syntetyczne plansze i trasy – benchmarki i testy skali.
+
+Planszę budujemy od rozwiązania: wąż (boustrophedon) przez całą siatkę,
+losowo odbity, pocięty na ``colors`` odcinków.  Końce odcinków to kropki,
+odcinki to ścieżki – plansza jest więc z definicji rozwiązywalna (i pokryta
+w całości), a trasa z dowolnej ścieżki przechodzi ``routes.validation``.
+Wszystko zależy tylko od ``random.Random`` przekazanego przez wołającego.
+
+Duże wolumeny (``manage.py generate_data``) idą przez ``generate``: plansza
+``index`` losuje się z własnego ziarna ``"<seed>:<index>"``, więc ten sam
+seed daje te same plansze niezależnie od liczby procesów i kolejności partii.
+"""
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .geometry import Point
+from .models import GameBoard, Route
+
+
+def _vertices(cells: list[Point]) -> list[Point]:
+    """Pola ścieżki → wierzchołki (początek, zakręty, koniec) jak w ``Route.coords``."""
+    out = [cells[0]]
+    for prev, cell, nxt in zip(cells, cells[1:], cells[2:]):
+        if (cell[0] - prev[0], cell[1] - prev[1]) != (nxt[0] - cell[0], nxt[1] - cell[1]):
+            out.append(cell)
+    if len(cells) > 1:
+        out.append(cells[-1])
+    return out
+
+
+def layout(rows: int, cols: int, colors: int, rng: random.Random) -> tuple[list[dict], dict[str, list[Point]]]:
+    """``(dots, {kolor: wierzchołki ścieżki})``; ``colors`` ≤ rows·cols / 2 − 1."""
+    cells = [
+        (r, c if r % 2 == 0 else cols - 1 - c)
+        for r in range(rows) for c in range(cols)
+    ]
+    flip_r, flip_c = rng.random() < 0.5, rng.random() < 0.5
+    cells = [(rows - 1 - r if flip_r else r, cols - 1 - c if flip_c else c) for r, c in cells]
+    if rng.random() < 0.5:
+        cells.reverse()
+
+    # odcinki długości parzystej ≥ 2: cięcia w punktach 2·k
+    cuts = [0, *sorted(2 * k for k in rng.sample(range(1, len(cells) // 2), colors - 1)), len(cells)]
+    dots, paths = [], {}
+    for k, (start, end) in enumerate(zip(cuts, cuts[1:])):
+        color = f"#{(k * 0x2F5A3B + 0x1E90FF) & 0xFFFFFF:06x}"
+        segment = cells[start:end]
+        dots += [
+            {"row": segment[0][0], "col": segment[0][1], "color": color},
+            {"row": segment[-1][0], "col": segment[-1][1], "color": color},
+        ]
+        paths[color] = _vertices(segment)
+    return dots, paths
+
+
+def create_users(prefix: str, count: int, batch_size: int = 1000) -> list:
+    """Użytkownicy ``<prefix><i>`` z hasłem ``prefix`` (jeden hash dla wszystkich)."""
+    User = get_user_model()
+    password = make_password(prefix)
+    return User.objects.bulk_create(
+        [User(username=f"{prefix}{i}", password=password) for i in range(count)],
+        batch_size=batch_size,
+    )
+
+
+def seed(
+    *, users: int, boards_per_user: int, routes_per_user: int, size: int, colors: int,
+    seed: int = 0, batch_size: int = 1000, prefix: str = "bench",
+) -> dict[str, int]:
+    """
+    Użytkownicy ``<prefix><i>`` (hasło = ``prefix``), ich plansze i trasy
+    – ``bulk_create`` partiami, więc bez sygnałów ``post_save`` (SSE, cache).
+    Trasa gracza to ścieżka losowego koloru cudzej lub własnej planszy.
+    """
+    rng = random.Random(seed)
+    people = create_users(prefix, users, batch_size)
+
+    boards, solutions = [], []
+    for owner in people:
+        for j in range(boards_per_user):
+            dots, paths = layout(size, size, colors, rng)
+            boards.append(GameBoard(owner=owner, title=f"{prefix} {owner.pk}/{j}",
+                                    rows=size, cols=size, dots=dots))
+            solutions.append(paths)
+    boards = GameBoard.objects.bulk_create(boards, batch_size=batch_size)
+
+    routes = []
+    for owner in people:
+        for n, index in enumerate(rng.sample(range(len(boards)), min(routes_per_user, len(boards)))):
+            route = Route(name=f"{prefix} {n}", owner=owner, background=boards[index])
+            route.coords = solutions[index][rng.choice(list(solutions[index]))]
+            routes.append(route)
+    Route.objects.bulk_create(routes, batch_size=batch_size)
+    return {"users": len(people), "boards": len(boards), "routes": len(routes)}
+
+
+def board(seed: int, index: int, sizes: tuple[int, int], max_colors: int):
+    """``(rows, cols, dots, paths)`` planszy nr ``index`` – zależy tylko od ``seed``."""
+    rng = random.Random(f"{seed}:{index}")
+    rows, cols = rng.randint(*sizes), rng.randint(*sizes)
+    colors = rng.randint(2, max(2, min(max_colors, rows * cols // 2)))
+    dots, paths = layout(rows, cols, colors, rng)
+    return rows, cols, dots, paths
+
+
+def generate(
+    *, seed: int, start: int, count: int, routes: int, owners: list[int],
+    sizes: tuple[int, int], max_colors: int, prefix: str,
+) -> dict[str, int]:
+    """
+    Plansze ``start … start+count−1`` i ``routes`` tras na nich, w jednej
+    transakcji.  Właściciele i gracze – losowo z ``owners`` (pk), każda para
+    (gracz, plansza) najwyżej raz (``unique_route_per_user_board``).
+    """
+    rng = random.Random(f"{seed}:chunk:{start}")
+    boards, solutions = [], []
+    for index in range(start, start + count):
+        rows, cols, dots, paths = board(seed, index, sizes, max_colors)
+        boards.append(GameBoard(owner_id=rng.choice(owners), title=f"{prefix} {index}",
+                                rows=rows, cols=cols, dots=dots))
+        solutions.append(paths)
+
+    picked, taken = [], set()
+    while len(picked) < min(routes, count * len(owners)):
+        pair = (rng.choice(owners), rng.randrange(count))
+        if pair not in taken:
+            taken.add(pair)
+            picked.append(pair)
+
+    points = 0
+    with transaction.atomic():
+        GameBoard.objects.bulk_create(boards)
+        objs = []
+        for owner, i in picked:
+            path = solutions[i][rng.choice(list(solutions[i]))]
+            route = Route(name=f"{prefix} {start + i}"[:25], owner_id=owner, background=boards[i])
+            route.coords = path
+            points += len(path)
+            objs.append(route)
+        Route.objects.bulk_create(objs)
+    return {"boards": count, "routes": len(objs), "points": points}
+
+
+@contextmanager
+def muted_signals():
+    """
+    Bez sygnałów modeli (``pre/post_save``, ``pre/post_delete``) – na czas
+    masowego usuwania: bez odbiorników Django kasuje kaskadę bez ładowania
+    wierszy, a SSE i cache plansz nie dostają zdarzenia na każdy wiersz.
+    """
+    signals = (pre_save, post_save, pre_delete, post_delete)
+    saved = [(signal, signal.receivers) for signal in signals]
+    for signal in signals:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
@@ -1,15 +1,39 @@
+import asyncio
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from importlib import import_module
+from unittest import mock
+
+import redis
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db.models.deletion import ProtectedError
-from django.test import TestCase, Client
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.expressions import CombinedExpression
+from django.db.models.signals import post_save
+from django.test import (
+    AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, Client, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 
 from rest_framework.test import APIClient, APITestCase
 from rest_framework.authtoken.models import Token
 from rest_framework import status
 
-from .models import BackgroundImage, Route, RoutePoint, GameBoard  # adjust import path
+from . import batch, board_cache, geometry, metrics, ndjson, solver, sse, synthetic, validation
+from .models import BoardSolution, Route, GameBoard
+from .serializers import point_dicts
 
 User = get_user_model()
 
@@ -19,18 +43,6 @@ User = get_user_model()
 ###############################################################################
 
 
-def create_image(name: str = "map.png", size: tuple[int, int] = (10, 10)) -> SimpleUploadedFile:
-    """Return an in‑memory 1‑pixel PNG so we do not rely on fixture files."""
-    from io import BytesIO
-    from PIL import Image
-
-    image_io = BytesIO()
-    img = Image.new("RGB", size, color="red")
-    img.save(image_io, format="PNG")
-    image_io.seek(0)
-    return SimpleUploadedFile(name, image_io.read(), content_type="image/png")
-
-
 class AuthenticatedAPIMixin:
     """Mixin that creates a user + token and exposes an authenticated APIClient."""
 
@@ -43,74 +55,206 @@ class AuthenticatedAPIMixin:
 
         cls.other_user = User.objects.create_user("bob", password="secret123")
         cls.other_token = Token.objects.create(user=cls.other_user)
+        # tło tras: plansza z kropkami, na których ścieżki mogą się zaczynać
+        cls.bg = GameBoard.objects.create(
+            owner=cls.user, title="BG", rows=5, cols=5,
+            dots=[{"row": 1, "col": 2, "color": "a"}, {"row": 1, "col": 4, "color": "a"}],
+        )
 
 ###############################################################################
 # 1. Model tests
 ###############################################################################
 
 
-class BackgroundImageModelTest(TestCase):
-    def test_create_background_image(self):
-        bg = BackgroundImage.objects.create(title="Test plan", image=create_image())
-        self.assertEqual(str(bg), "Test plan")
-        self.assertTrue(bg.image.name.endswith(".png"))
-
-
 class RouteModelTest(TestCase):
     @classmethod
     def setUpTestData(cls):
         cls.user = User.objects.create_user("foo", password="bar")
-        cls.bg = BackgroundImage.objects.create(title="BG", image=create_image("bg.png"))
+        cls.bg = GameBoard.objects.create(owner=cls.user, title="BG")
 
     def test_route_fields_and_str(self):
         route = Route.objects.create(name="Route 1", owner=self.user, background=self.bg)
         self.assertEqual(route.name, "Route 1")
         self.assertEqual(route.owner, self.user)
         self.assertEqual(route.background, self.bg)
-        self.assertEqual(str(route), "Route #1 (foo)")
+        self.assertEqual(str(route), f"Route #{route.pk} (foo)")
 
-    def test_background_protect_on_delete(self):
+    def test_background_delete_cascades_to_routes(self):
         route = Route.objects.create(name="Route 1", owner=self.user, background=self.bg)
-        with self.assertRaises(ProtectedError):
-            self.bg.delete()
+        self.bg.delete()
+        self.assertFalse(Route.objects.filter(pk=route.pk).exists())
 
-    def test_route_and_points_relationship(self):
+    def test_route_points_keep_order(self):
         route = Route.objects.create(name="Route 1", owner=self.user, background=self.bg)
-        p1 = RoutePoint.objects.create(route=route, order=1, x=10, y=20)
-        p2 = RoutePoint.objects.create(route=route, order=2, x=30, y=40)
-
-        # Backward FK relation
-        self.assertEqual(route.points.count(), 2)
-        self.assertIn(p1, route.points.all())
-        self.assertEqual(p2.order, 2)
-
-        # Cascade delete of points when route is deleted
-        route.delete()
-        self.assertFalse(RoutePoint.objects.filter(pk=p1.pk).exists())
-
-
-class RoutePointModelTest(TestCase):
-    @classmethod
-    def setUpTestData(cls):
-        cls.user = User.objects.create_user("foo", password="bar")
-        cls.bg = BackgroundImage.objects.create(title="BG", image=create_image("bg.png"))
-        cls.route = Route.objects.create(name="Route X", owner=cls.user, background=cls.bg)
-
-    def test_create_route_point(self):
-        pt = RoutePoint.objects.create(route=self.route, order=5, x=1.23, y=4.56)
-        self.assertEqual(pt.route, self.route)
-        self.assertEqual(pt.order, 5)
-        self.assertEqual(pt.x, 1.23)
-        self.assertEqual(pt.y, 4.56)
+        route.coords = [(10, 20), (30, 40)]
+        route.save()
+        route = Route.objects.get(pk=route.pk)
+        self.assertEqual(route.coords, [(10, 20), (30, 40)])
         self.assertEqual(
-            str(pt), f"P{5}@({1.23}, {4.56})"
+            point_dicts(route.coords),
+            [{"id": 1, "order": 1, "x": 10, "y": 20}, {"id": 2, "order": 2, "x": 30, "y": 40}],
         )
 
-    def test_ordering_of_points(self):
-        p1 = RoutePoint.objects.create(route=self.route, order=2, x=0, y=0)
-        p2 = RoutePoint.objects.create(route=self.route, order=1, x=1, y=1)
-        points = list(RoutePoint.objects.filter(route=self.route))
-        self.assertEqual(points, [p2, p1])
+
+class RouteGeometryTests(TestCase):
+    def test_pack_roundtrip_uses_two_bytes_per_point(self):
+        coords = [(0, 0), (11, 3), (255, 7)]
+        packed = geometry.pack(coords)
+        self.assertEqual(len(packed), 1 + 2 * len(coords))
+        self.assertEqual(geometry.unpack(memoryview(packed)), coords)
+        self.assertEqual(geometry.unpack(geometry.pack([(300, 1)])), [(300, 1)])
+        self.assertEqual(geometry.pack([]), b"")
+        with self.assertRaises(ValueError):
+            geometry.pack([(-1, 0)])
+
+
+
+class RoutePointMigrationTests(TransactionTestCase):
+    """0009 pakuje dawne wiersze ``RoutePoint``, 0015 usuwa ich tabelę."""
+
+    def _migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("routes", target)])
+        return executor.loader.project_state(("routes", target)).apps
+
+    def tearDown(self):
+        self._migrate("0015_delete_routepoint")
+
+    def test_data_migration_packs_existing_rows(self):
+        old = self._migrate("0009_pack_route_points")
+        user = User.objects.create_user("mig", password="pwd")
+        board = old.get_model("routes", "GameBoard").objects.create(owner_id=user.pk, title="B")
+        route = old.get_model("routes", "Route").objects.create(name="R", owner_id=user.pk, background=board)
+        RoutePoint = old.get_model("routes", "RoutePoint")
+        for order, (x, y) in enumerate([(1, 2), (1, 3), (2, 3)], start=1):
+            RoutePoint.objects.create(route=route, order=order, x=x, y=y)
+        import_module("routes.migrations.0009_pack_route_points").pack_points(old, None)
+
+        self._migrate("0015_delete_routepoint")
+        self.assertEqual(Route.objects.get(pk=route.pk).coords, [(1, 2), (1, 3), (2, 3)])
+        self.assertNotIn("routes_routepoint", connection.introspection.table_names())
+
+def _dots(pairs):
+    return [
+        {"row": r, "col": c, "color": color}
+        for color, cells in pairs.items() for r, c in cells
+    ]
+
+FLOW_5X5 = _dots({
+    "R": [(0, 0), (4, 1)], "G": [(0, 2), (3, 1)], "Y": [(0, 4), (3, 3)],
+    "B": [(1, 2), (4, 2)], "O": [(1, 4), (4, 3)],
+})
+CROSSED_2X2 = _dots({"a": [(0, 0), (1, 1)], "b": [(0, 1), (1, 0)]})
+
+class BoardSolverTests(SimpleTestCase):
+    def assertValidSolution(self, rows, cols, dots, result, fill):
+        self.assertEqual(result.status, solver.SOLVED)
+        used = set()
+        for color, path in result.paths.items():
+            ends = {(d["row"], d["col"]) for d in dots if d["color"] == color}
+            self.assertEqual({path[0], path[-1]}, ends)
+            for (r1, c1), (r2, c2) in zip(path, path[1:]):
+                self.assertEqual(abs(r1 - r2) + abs(c1 - c2), 1)
+            self.assertFalse(used & set(path))
+            used |= set(path)
+        self.assertEqual(len(result.paths), len({d["color"] for d in dots}))
+        if fill:
+            self.assertEqual(len(used), rows * cols)
+
+    def test_solves_flow_level(self):
+        for fill in (False, True):
+            result = solver.solve(5, 5, FLOW_5X5, fill=fill)
+            self.assertValidSolution(5, 5, FLOW_5X5, result, fill)
+
+    def test_proves_unsolvable(self):
+        self.assertEqual(solver.solve(2, 2, CROSSED_2X2).status, solver.UNSOLVABLE)
+        # bez fill da się połączyć, ale zostaje wolne pole
+        dots = _dots({"a": [(0, 0), (0, 2)]})
+        self.assertEqual(solver.solve(2, 3, dots).status, solver.SOLVED)
+        self.assertEqual(solver.solve(3, 3, dots, fill=True).status, solver.SOLVED)
+        self.assertEqual(solver.solve(2, 2, _dots({"a": [(0, 0), (0, 1)]}), fill=True).status,
+                         solver.SOLVED)
+        # 9 pól, a kropki na polach różnej parzystości → brak ścieżki Hamiltona
+        self.assertEqual(solver.solve(3, 3, _dots({"a": [(0, 0), (0, 1)]}), fill=True).status,
+                         solver.UNSOLVABLE)
+
+    def test_fingerprint_ignores_symmetry_and_colour_names(self):
+        board = GameBoard(rows=5, cols=5, dots=FLOW_5X5)
+        # obrót o 90° + nowe nazwy kolorów
+        names = {"R": "#f00", "G": "#0f0", "Y": "#ff0", "B": "#00f", "O": "#f80"}
+        rotated = [
+            {"row": d["col"], "col": 4 - d["row"], "color": names[d["color"]]} for d in FLOW_5X5
+        ]
+        self.assertEqual(GameBoard(rows=5, cols=5, dots=rotated).fingerprint, board.fingerprint)
+        moved = FLOW_5X5[:-1] + [{"row": 4, "col": 4, "color": "O"}]
+        self.assertNotEqual(GameBoard(rows=5, cols=5, dots=moved).fingerprint, board.fingerprint)
+        tall = _dots({"a": [(0, 0), (2, 1)]})
+        wide = _dots({"b": [(0, 2), (1, 0)]})  # ten sam układ obrócony: 3×2 → 2×3
+        self.assertEqual(GameBoard(rows=3, cols=2, dots=tall).fingerprint,
+                         GameBoard(rows=2, cols=3, dots=wide).fingerprint)
+
+    def test_cached_result_is_mapped_to_equivalent_board(self):
+        solver.caches["solver"].clear()
+        first = solver.solve_cached(5, 5, FLOW_5X5, fill=True)
+        self.assertFalse(first.cached)
+        self.assertValidSolution(5, 5, FLOW_5X5, first, fill=True)
+
+        mirrored = [{"row": d["row"], "col": 4 - d["col"], "color": d["color"] * 2} for d in FLOW_5X5]
+        with mock.patch.object(solver, "solve", side_effect=AssertionError):
+            second = solver.solve_cached(5, 5, mirrored, fill=True)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.fingerprint, first.fingerprint)
+        self.assertValidSolution(5, 5, mirrored, second, fill=True)
+
+    def test_two_pairs_on_open_board(self):
+        # kiedyś oba przypadki kończyły się "unknown" przy domyślnym timeout
+        dots = _dots({"a": [(2, 7), (5, 0)], "b": [(3, 0), (3, 3)]})
+        self.assertValidSolution(8, 8, dots, solver.solve(8, 8, dots), fill=False)
+        # a i b siedzą na brzegu na przemian – ścieżki musiałyby się przeciąć
+        dots = _dots({"a": [(1, 0), (0, 7)], "b": [(0, 4), (3, 0)]})
+        self.assertEqual(solver.solve(8, 8, dots).status, solver.UNSOLVABLE)
+
+    def test_synthetic_layouts_solve_within_budget(self):
+        rng = random.Random(1)
+        for _ in range(25):
+            dots, _paths = synthetic.layout(12, 12, rng.randint(2, 12), rng)
+            for fill in (False, True):
+                started = time.perf_counter()
+                result = solver.solve(12, 12, dots, fill=fill, timeout=2)
+                self.assertValidSolution(12, 12, dots, result, fill)
+                self.assertLess(time.perf_counter() - started, 1)
+
+    def test_timeout_reports_unknown(self):
+        result = solver.solve(12, 12, FLOW_5X5, fill=True, timeout=0)
+        self.assertIn(result.status, {solver.SOLVED, solver.UNKNOWN})
+        self.assertIsNone(solver.Solution(solver.UNKNOWN).solvable)
+
+class RouteValidationTests(SimpleTestCase):
+    board = GameBoard(rows=5, cols=5, dots=FLOW_5X5)
+
+    def check(self, coords):
+        return validation.check_route(validation.board_map(self.board), coords)
+
+    def assertBroken(self, coords, index):
+        with self.assertRaises(validation.RouteError) as ctx:
+            self.check(coords)
+        self.assertEqual(ctx.exception.index, index)
+
+    def test_states(self):
+        self.assertEqual(self.check([]).status, validation.EMPTY)
+        self.assertEqual(self.check([(0, 0), (3, 0)]), validation.RouteState("building", "R", 4))
+        self.assertEqual(self.check([(0, 0), (4, 0), (4, 1)]), validation.RouteState("finished", "R", 6))
+
+    def test_rules(self):
+        self.assertBroken([(2, 2)], 0)                          # nie na kropce
+        self.assertBroken([(0, 0), (1, 1)], 1)                  # ukos
+        self.assertBroken([(0, 0), (0, 0)], 1)                  # zerowy odcinek
+        self.assertBroken([(0, 0), (0, 3)], 1)                  # przez obcą kropkę (0, 2)
+        self.assertBroken([(0, 0), (2, 0), (2, 1), (1, 1), (1, 0)], 4)  # przecięcie
+        self.assertBroken([(0, 0), (4, 0), (4, 1), (3, 1)], 3)  # dalej po zakończeniu
+        self.assertBroken([(0, 0), (4, 0), (4, 3)], 2)          # przez własną kropkę
+        self.assertBroken([(0, 0), (5, 0)], 1)                  # poza planszą
 
 ###############################################################################
 # 2. Web (HTML) view tests – authentication & CRUD
@@ -121,13 +265,16 @@ class RouteViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
         cls.user = User.objects.create_user("viewer", password="pass")
-        cls.bg = BackgroundImage.objects.create(title="BG", image=create_image())
+        cls.bg = GameBoard.objects.create(
+            owner=cls.user, title="BG", rows=5, cols=5,
+            dots=[{"row": 1, "col": 2, "color": "a"}, {"row": 1, "col": 4, "color": "a"}],
+        )
 
     def setUp(self):
         self.client = Client()
 
     def test_requires_login(self):
-        url = reverse("route_list")  # adjust as per your urls.py
+        url = reverse("route_edit", args=[self.bg.pk])
         response = self.client.get(url)
         self.assertRedirects(
             response, f"{reverse('login')}?next={url}", fetch_redirect_response=False
@@ -139,23 +286,25 @@ class RouteViewTests(TestCase):
         Route.objects.create(name="mine", owner=self.user, background=self.bg)
 
         self.client.login(username="viewer", password="pass")
-        response = self.client.get(reverse("route_list"))
+        response = self.client.get(reverse("route_edit", args=[self.bg.pk]))
         self.assertContains(response, "mine")
         self.assertNotContains(response, "not‑mine")
 
-    def test_create_route_and_add_point_via_form(self):
+    def test_create_route_and_add_point(self):
         self.client.login(username="viewer", password="pass")
 
-        # Create route
-        create_url = reverse("route_create")
-        resp = self.client.post(create_url, {"name": "Lab", "background": self.bg.id})
-        self.assertRedirects(resp, reverse("route_detail", args=[1]))
+        # Editor creates the route on first visit
+        resp = self.client.get(reverse("route_new", args=[self.bg.pk]))
+        self.assertEqual(resp.status_code, 200)
+        route = Route.objects.get(owner=self.user, background=self.bg)
 
-        # Add a point
-        add_pt_url = reverse("point_add", args=[1])
-        resp = self.client.post(add_pt_url, {"x": 5, "y": 10})
-        self.assertEqual(resp.status_code, 302)  # redirect after success
-        self.assertEqual(RoutePoint.objects.count(), 1)
+        # Add a point (the editor posts to the API with the session)
+        resp = self.client.post(
+            f"/api/routes/{route.pk}/points/", {"x": 1, "y": 2}, content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        route.refresh_from_db()
+        self.assertEqual(route.coords, [(1, 2)])
 
 ###############################################################################
 # 3. REST‑API tests – authentication & authorisation
@@ -163,11 +312,6 @@ class RouteViewTests(TestCase):
 
 
 class RouteAPITests(AuthenticatedAPIMixin, APITestCase):
-    @classmethod
-    def setUpTestData(cls):
-        super().setUpTestData()
-        cls.bg = BackgroundImage.objects.create(title="BG", image=create_image())
-
     def test_cannot_access_without_token(self):
         res = self.client.get("/api/routes/")  # unauthenticated client
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -184,15 +328,15 @@ class RouteAPITests(AuthenticatedAPIMixin, APITestCase):
 
         # GET list only my routes
         response = self.api_client.get("/api/routes/")
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], route_id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], route_id)
 
         # Other user’s list is empty
         other_client = APIClient()
         other_client.credentials(HTTP_AUTHORIZATION=f"Token {self.other_token.key}")
         res = other_client.get("/api/routes/")
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, [])
+        self.assertEqual(res.data["results"], [])
 
     def test_route_detail_and_delete(self):
         route = Route.objects.create(name="to‑delete", owner=self.user, background=self.bg)
@@ -208,17 +352,34 @@ class RouteAPITests(AuthenticatedAPIMixin, APITestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Route.objects.filter(pk=route.id).exists())
 
+    def test_moving_route_to_another_board_rechecks_its_path(self):
+        route = Route.objects.create(name="R", owner=self.user, background=self.bg)
+        route.coords = [(1, 2), (1, 3)]
+        route.save()
+        empty = GameBoard.objects.create(owner=self.user, title="pusta", rows=5, cols=5)
+        same = GameBoard.objects.create(owner=self.user, title="kopia", rows=5, cols=5, dots=self.bg.dots)
+        url = f"/api/routes/{route.id}/"
+
+        res = self.api_client.patch(url, {"background": empty.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("background", res.data)
+        route.refresh_from_db()
+        self.assertEqual(route.background_id, self.bg.id)
+
+        res = self.api_client.patch(url, {"background": same.id}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_cannot_delete_others_route(self):
         route = Route.objects.create(name="foreign", owner=self.other_user, background=self.bg)
         res = self.api_client.delete(f"/api/routes/{route.id}/")
-        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)  # or 403 depending implementation
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Route.objects.filter(pk=route.id).exists())
 
 
 class RoutePointAPITests(AuthenticatedAPIMixin, APITestCase):
     @classmethod
     def setUpTestData(cls):
         super().setUpTestData()
-        cls.bg = BackgroundImage.objects.create(title="BG", image=create_image())
         cls.route = Route.objects.create(name="R", owner=cls.user, background=cls.bg)
 
     def test_add_list_and_delete_point(self):
@@ -236,7 +397,8 @@ class RoutePointAPITests(AuthenticatedAPIMixin, APITestCase):
         del_url = f"{add_url}{pt_id}/"
         res = self.api_client.delete(del_url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(RoutePoint.objects.filter(pk=pt_id).exists())
+        self.route.refresh_from_db()
+        self.assertEqual(self.route.coords, [])
 
     def test_validation_rejects_missing_fields(self):
         res = self.api_client.post(
@@ -252,6 +414,7 @@ class RoutePointAPITests(AuthenticatedAPIMixin, APITestCase):
         res = self.api_client.get(f"/api/routes/{foreign_route.id}/points/")
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+
 class BoardAccessTests(APITestCase):
     def setUp(self):
         self.alice = User.objects.create_user("alice","a@x.com","pwd")
@@ -306,4 +469,1249 @@ class BoardValidationTests(APITestCase):
             {"row":2,"col":2,"color":"#00ff00"},
         ])
         self.assertEqual(resp.status_code, 400)
-        self.assertIn("dokładnie 2 razy", resp.data["non_field_errors"][0])
\ No newline at end of file
+        self.assertIn("dokładnie 2 razy", resp.data["non_field_errors"][0])
+
+    def test_dot_without_row_is_rejected(self):
+        resp = self.post_board([{"col":0,"color":"#ff0000"}, {"row":1,"col":1,"color":"#ff0000"}])
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["non_field_errors"][0], batch.MALFORMED)
+
+
+class BoardBatchValidationTests(SimpleTestCase):
+    BOARDS = [
+        {"title": "ok", "rows": 3, "cols": 3, "dots": _dots({"a": [(0, 0), (2, 2)]})},
+        {"title": "poza", "rows": 3, "cols": 3, "dots": _dots({"a": [(0, 0), (3, 0)]})},
+        {"title": "dubel", "rows": 3, "cols": 3, "dots": [
+            {"row": 0, "col": 0, "color": "a"}, {"row": 0, "col": 0, "color": "a"},
+        ]},
+        {"title": "kolory", "rows": 3, "cols": 3, "dots": [
+            {"row": 0, "col": 0, "color": "b"}, {"row": 1, "col": 1, "color": "a"},
+        ]},
+        {"title": "zepsuta", "rows": 3, "cols": 3, "dots": [{"row": 0, "color": "a"}]},
+        {"rows": "x", "dots": []},
+        {"title": "pusta", "rows": 0, "cols": 0, "dots": []},
+    ]
+
+    def check(self, vectorized):
+        return batch.validate_boards(self.BOARDS, vectorized=vectorized)
+
+    def test_reports_per_board(self):
+        reports = self.check(vectorized=False)
+        self.assertEqual(reports[0], [])
+        self.assertEqual(reports[1], [batch.OUT_OF_RANGE])
+        self.assertEqual(reports[2], [batch.DUPLICATE])
+        self.assertEqual(reports[3], [batch.wrong_colors(["b", "a"])])
+        self.assertEqual(reports[4], [batch.MALFORMED])
+        self.assertEqual(len(reports[5]), 2)      # tytuł + rows
+        self.assertEqual(reports[6], [])
+
+    def test_numpy_matches_python(self):
+        if batch.np is None:
+            self.skipTest("NumPy niezainstalowany")
+        self.assertEqual(self.check(vectorized=True), self.check(vectorized=False))
+
+    def test_out_of_range_duplicates_are_reported(self):
+        dots = [{"row": 5, "col": 5, "color": "a"}, {"row": 5, "col": 5, "color": "a"}]
+        board = {"title": "x", "rows": 2, "cols": 2, "dots": dots}
+        for vectorized in (False, True) if batch.np is not None else (False,):
+            self.assertEqual(
+                batch.validate_boards([board], vectorized=vectorized)[0],
+                [batch.OUT_OF_RANGE, batch.DUPLICATE],
+            )
+
+    def test_validate_boards_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+            json.dump(self.BOARDS, fh)
+        self.addCleanup(os.unlink, fh.name)
+        out = io.StringIO()
+        call_command("validate_boards", fh.name, stdout=out)
+        self.assertIn(f"#1: {batch.OUT_OF_RANGE}", out.getvalue())
+        self.assertIn("poprawnych 2, błędnych 5", out.getvalue())
+
+
+class BoardBulkAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.client.force_authenticate(self.user)
+
+    def test_creates_valid_and_reports_invalid(self):
+        boards = [
+            {"title": "a", "rows": 3, "cols": 3, "dots": _dots({"a": [(0, 0), (2, 2)]})},
+            {"title": "b", "rows": 3, "cols": 3, "dots": _dots({"a": [(0, 0), (5, 5)]})},
+            {"title": "c", "rows": 4, "cols": 4, "dots": []},
+        ]
+        resp = self.client.post("/api/boards/bulk/", boards, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data["created"]), 2)
+        self.assertEqual(resp.data["errors"], {"1": [batch.OUT_OF_RANGE]})
+        self.assertEqual(
+            sorted(GameBoard.objects.filter(owner=self.user).values_list("title", flat=True)), ["a", "c"],
+        )
+
+    def test_nothing_valid_is_400(self):
+        resp = self.client.post("/api/boards/bulk/", [{"title": "", "rows": 3}], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GameBoard.objects.exists())
+
+    def test_requires_list(self):
+        resp = self.client.post("/api/boards/bulk/", {"title": "a"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BOARD_BULK_LIMIT=1)
+    def test_limit(self):
+        board = {"title": "a", "rows": 3, "cols": 3, "dots": []}
+        resp = self.client.post("/api/boards/bulk/", [board, board], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BOARD_REQUIRE_SOLVABLE=True)
+    def test_unsolvable_rejected(self):
+        board = {"title": "x", "rows": 2, "cols": 2, "dots": CROSSED_2X2}
+        resp = self.client.post("/api/boards/bulk/", [board], format="json")
+        self.assertEqual(resp.data["errors"], {"0": ["Plansza nie ma rozwiązania."]})
+
+
+class BoardNDJSONTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.client.force_authenticate(self.user)
+
+    def ndjson_body(self, *items):
+        return "\n".join(i if isinstance(i, str) else json.dumps(i) for i in items).encode()
+
+    def test_import_in_batches_with_one_summary_event(self):
+        body = self.ndjson_body(
+            {"title": "a", "rows": 3, "cols": 3, "dots": _dots({"a": [(0, 0), (2, 2)]})},
+            "{nie json",
+            "",
+            {"title": "b", "rows": 3, "cols": 3, "dots": _dots({"a": [(0, 0), (9, 9)]})},
+            {"title": "c", "rows": 2, "cols": 2, "dots": []},
+        )
+        with mock.patch.object(sse._coalescer, "submit") as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.generic(
+                "POST", "/api/boards/import/", body, content_type=ndjson.CONTENT_TYPE,
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["lines"], 5)
+        self.assertEqual(resp.data["created"], 2)
+        self.assertEqual(resp.data["invalid"], 2)
+        self.assertEqual(set(resp.data["errors"]), {"2", "4"})
+        self.assertEqual(resp.data["errors"]["4"], [batch.OUT_OF_RANGE])
+        submit.assert_called_once_with("boardsImported", {"owner_username": "alice", "count": 2})
+
+    def test_deeply_nested_line_is_an_invalid_line(self):
+        body = self.ndjson_body("[" * 50_000, {"title": "a", "rows": 2, "cols": 2, "dots": []})
+        resp = self.client.generic("POST", "/api/boards/import/", body, content_type=ndjson.CONTENT_TYPE)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data["created"], resp.data["invalid"]), (1, 1))
+        self.assertIn("1", resp.data["errors"])
+
+    def test_import_command_leaves_stdin_open(self):
+        stdin = io.StringIO(json.dumps({"title": "a", "rows": 2, "cols": 2, "dots": []}) + "\n")
+        with mock.patch("sys.stdin", stdin):
+            call_command("import_boards", "-", "--owner", "alice", stdout=io.StringIO())
+        self.assertFalse(stdin.closed)
+        self.assertEqual(GameBoard.objects.filter(owner=self.user).count(), 1)
+
+    def test_import_flushes_every_batch_size_boards(self):
+        lines = [json.dumps({"title": f"b{i}", "rows": 2, "cols": 2, "dots": []}) for i in range(5)]
+        with mock.patch.object(batch, "create_boards", wraps=batch.create_boards) as create:
+            summary = ndjson.import_boards(self.user, lines, batch_size=2)
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(summary.created, 5)
+
+    @override_settings(BOARD_IMPORT_MAX_LINES=2)
+    def test_import_stops_at_line_limit(self):
+        board = {"title": "a", "rows": 2, "cols": 2, "dots": []}
+        body = self.ndjson_body(board, board, board)
+        resp = self.client.generic("POST", "/api/boards/import/", body, content_type=ndjson.CONTENT_TYPE)
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual((resp.data["lines"], resp.data["created"]), (2, 2))
+        self.assertIn("2 linii", resp.data["aborted"])
+
+    @override_settings(BOARD_IMPORT_MAX_LINE_BYTES=100)
+    def test_import_never_buffers_an_oversized_line(self):
+        body = self.ndjson_body({"title": "a", "rows": 2, "cols": 2, "dots": []}, "x" * 10_000)
+        stream = io.BytesIO(body)
+        lines = ndjson.limited_lines(stream, max_line_bytes=100, max_bytes=10**6)
+        summary = ndjson.import_boards(self.user, lines)
+        self.assertEqual((summary.created, summary.lines), (1, 1))
+        self.assertLess(stream.tell(), 200)
+        resp = self.client.generic("POST", "/api/boards/import/", body, content_type=ndjson.CONTENT_TYPE)
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    @override_settings(BOARD_IMPORT_MAX_BYTES=10)
+    def test_import_rejects_large_content_length_up_front(self):
+        body = self.ndjson_body({"title": "a", "rows": 2, "cols": 2, "dots": []})
+        resp = self.client.generic("POST", "/api/boards/import/", body, content_type=ndjson.CONTENT_TYPE)
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(GameBoard.objects.exists())
+
+    def test_import_rejects_other_content_types(self):
+        resp = self.client.post("/api/boards/import/", {"title": "a"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_export_streams_own_boards(self):
+        other = User.objects.create_user("bob", password="pwd")
+        GameBoard.objects.create(owner=other, title="cudza")
+        mine = [GameBoard.objects.create(owner=self.user, title=f"b{i}") for i in range(3)]
+        with mock.patch.object(ndjson, "CHUNK_SIZE", 2):
+            resp = self.client.get("/api/boards/export/")
+        self.assertEqual(resp["Content-Type"], ndjson.CONTENT_TYPE)
+        chunks = list(resp.streaming_content)
+        rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [board.pk for board in mine])
+        self.assertEqual(set(rows[0]), set(ndjson.EXPORT_FIELDS))
+
+    def test_export_under_asgi_streams_async_chunks(self):
+        mine = [GameBoard.objects.create(owner=self.user, title=f"b{i}") for i in range(3)]
+
+        async def fetch():
+            client = AsyncClient()
+            await sync_to_async(client.force_login)(self.user)
+            resp = await client.get("/api/boards/export/")
+            return resp, [chunk async for chunk in resp.streaming_content]
+
+        resp, chunks = async_to_sync(fetch)()
+        self.assertTrue(resp.is_async)
+        rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [board.pk for board in mine])
+        self.assertFalse(self.client.get("/api/boards/export/").is_async)   # WSGI – jak było
+
+        async def collect():
+            return [c async for c in ndjson.aexport_boards(GameBoard.objects.all(), chunk_size=2)]
+
+        self.assertEqual(len(async_to_sync(collect)()), 2)      # kawałek na partię, nie całość
+
+    def test_export_import_round_trip_commands(self):
+        GameBoard.objects.create(owner=self.user, title="x", rows=3, cols=3, dots=_dots({"a": [(0, 0), (2, 2)]}))
+        with tempfile.NamedTemporaryFile(suffix=".ndjson", delete=False) as fh:
+            pass
+        self.addCleanup(os.unlink, fh.name)
+        call_command("export_boards", fh.name, "--owner", "alice")
+        User.objects.create_user("bob", password="pwd")
+        out = io.StringIO()
+        call_command("import_boards", fh.name, "--owner", "bob", stdout=out)
+        self.assertIn("utworzono 1, błędnych 0", out.getvalue())
+        copy = GameBoard.objects.get(owner__username="bob")
+        self.assertEqual((copy.title, copy.dots), ("x", _dots({"a": [(0, 0), (2, 2)]})))
+
+
+class ListPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.client.force_authenticate(self.user)
+
+    def collect(self, url):
+        ids = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            ids += [item["id"] for item in resp.data["results"]]
+            url = resp.data["next"]
+        return ids
+
+    def test_board_cursor_walks_all_pages(self):
+        boards = [GameBoard.objects.create(owner=self.user, title=f"b{i}") for i in range(5)]
+        ids = self.collect("/api/boards/?page_size=2")
+        self.assertEqual(ids, [b.pk for b in reversed(boards)])
+
+    def test_route_cursor_breaks_ties_by_id(self):
+        for i in range(5):
+            board = GameBoard.objects.create(owner=self.user, title=f"b{i}")
+            Route.objects.create(owner=self.user, background=board, name=f"r{i}")
+        Route.objects.update(created=timezone.now())        # jednakowe created
+        ids = self.collect("/api/routes/?page_size=2")
+        self.assertEqual(ids, sorted(Route.objects.values_list("id", flat=True)))
+
+    def test_fields_skip_columns_in_sql(self):
+        GameBoard.objects.create(owner=self.user, title="b", dots=_dots({"a": [(0, 0), (1, 1)]}))
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get("/api/boards/?fields=id,title")
+        self.assertEqual(set(resp.data["results"][0]), {"id", "title"})
+        select = next(q["sql"] for q in queries.captured_queries if "routes_gameboard" in q["sql"])
+        self.assertNotIn('"dots"', select)
+
+    def test_route_summary_skips_points(self):
+        board = GameBoard.objects.create(owner=self.user, title="b")
+        route = Route.objects.create(owner=self.user, background=board, name="r")
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(f"/api/routes/{route.pk}/?summary=1")
+        self.assertNotIn("points", resp.data)
+        self.assertEqual(resp.data["name"], "r")
+        self.assertFalse(any("packed_points" in q["sql"] for q in queries.captured_queries))
+
+    def test_unknown_field_is_400(self):
+        resp = self.client.get("/api/boards/?fields=id,secret")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.board = GameBoard.objects.create(owner=self.user, title="b", dots=_dots({"a": [(0, 0), (1, 1)]}))
+
+    def test_board_etag_gives_304_with_one_query(self):
+        url = f"/api/boards/{self.board.pk}/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+        self.assertIn("Last-Modified", first)
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("dots", queries[0]["sql"])
+
+        self.board.title = "nowy"
+        self.board.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_board_if_modified_since(self):
+        first = self.client.get(f"/api/public-boards/{self.board.pk}/")
+        self.assertIn("max-age=60", first["Cache-Control"])
+        self.assertIn("public", first["Cache-Control"])
+        again = self.client.get(
+            f"/api/public-boards/{self.board.pk}/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+        )
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_field_selection_changes_etag(self):
+        url = f"/api/boards/{self.board.pk}/"
+        self.assertNotEqual(self.client.get(url)["ETag"], self.client.get(url + "?summary=1")["ETag"])
+
+    def test_route_version_counter_drives_etag(self):
+        route = Route.objects.create(owner=self.user, background=self.board, name="r")
+        self.assertEqual(route.version, 1)
+        self.client.force_authenticate(self.user)
+        url = f"/api/routes/{route.pk}/"
+        first = self.client.get(url)
+        self.assertIn("private", first["Cache-Control"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.client.post(f"/api/routes/{route.pk}/points/", {"x": 0, "y": 0}, format="json")
+        route.refresh_from_db()
+        self.assertEqual(route.version, 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_route_version_after_save_is_deferred(self):
+        route = Route.objects.create(owner=self.user, background=self.board, name="r")
+        seen = []
+
+        def receiver(sender, instance, created, **kwargs):
+            seen.append(instance.version)
+
+        post_save.connect(receiver, sender=Route)
+        self.addCleanup(post_save.disconnect, receiver, sender=Route)
+        route.name = "s"
+        with self.assertNumQueries(1):
+            route.save()
+        self.assertIsInstance(seen[0], CombinedExpression)    # F("version") + 1 – udokumentowane
+        self.assertIn("version", route.get_deferred_fields())
+        with self.assertNumQueries(1):                        # odczyt odroczonego pola
+            self.assertEqual(route.version, 2)
+
+    def test_route_etag_not_served_to_other_user(self):
+        route = Route.objects.create(owner=self.user, background=self.board, name="r")
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(f"/api/routes/{route.pk}/")["ETag"]
+        self.client.force_authenticate(User.objects.create_user("bob", password="pwd"))
+        resp = self.client.get(f"/api/routes/{route.pk}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BoardJSONCacheTests(APITestCase):
+    def setUp(self):
+        caches["boards"].clear()
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.board = GameBoard.objects.create(owner=self.user, title="b", dots=_dots({"a": [(0, 0), (1, 1)]}))
+        self.url = f"/api/public-boards/{self.board.pk}/"
+
+    def test_second_read_skips_select_and_serializer(self):
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(self.url)
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(len(queries), 1)                 # tylko walidator ETag
+        self.assertEqual(json.loads(again.content)["dots"], self.board.dots)
+
+    def test_save_and_delete_change_the_key(self):
+        self.client.get(self.url)
+        self.board.title = "nowa"
+        self.board.save()
+        self.assertEqual(json.loads(self.client.get(self.url).content)["title"], "nowa")
+        self.board.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_stale_entry_never_matches_after_write_elsewhere(self):
+        # zapis w innym workerze: sygnał nie dociera do tego cache'u
+        self.client.get(self.url)
+        GameBoard.objects.filter(pk=self.board.pk).update(title="gdzie indziej", modified=timezone.now())
+        self.assertEqual(json.loads(self.client.get(self.url).content)["title"], "gdzie indziej")
+
+    def test_waiters_reuse_the_winners_result(self):
+        cache = caches["boards"]
+        key = board_cache._key(self.board.pk, self.board.modified)
+        cache.add(f"{key}:lock", 1)                       # ktoś inny właśnie liczy
+        threading.Timer(0.05, lambda: cache.set(key, b'{"from": "winner"}')).start()
+        with mock.patch.object(board_cache, "_render") as render:
+            self.assertEqual(board_cache.board_json(self.board.pk), b'{"from": "winner"}')
+        render.assert_not_called()
+
+    def test_board_page_embeds_escaped_json(self):
+        self.board.title = "</script><b>"
+        self.board.save()
+        html = self.client.get(reverse("board_view", args=[self.board.pk])).content.decode()
+        self.assertIn('id="boardData"', html)
+        self.assertNotIn("</script><b>", html)
+        self.assertIn("\\u003C/script\\u003E", html)
+
+
+class BoardSolveAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.client.force_authenticate(self.user)
+
+    def test_solve_endpoint_is_public(self):
+        board = GameBoard.objects.create(owner=self.user, title="F", rows=5, cols=5, dots=FLOW_5X5)
+        self.client.force_authenticate(None)
+        resp = self.client.get(f"/api/boards/{board.pk}/solve/?fill=1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["status"], "solved")
+        self.assertTrue(resp.data["solvable"])
+        self.assertEqual(sum(len(p) for p in resp.data["paths"].values()), 25)
+
+    def test_unsolvable_board_accepted_by_default(self):
+        payload = {"title": "X", "rows": 2, "cols": 2, "dots": CROSSED_2X2}
+        resp = self.client.post("/api/boards/", payload, format="json")
+        self.assertEqual(resp.status_code, 201)
+        resp = self.client.get(f"/api/boards/{resp.data['id']}/solve/")
+        self.assertEqual(resp.data["status"], "unsolvable")
+
+    @override_settings(BOARD_REQUIRE_SOLVABLE=True)
+    def test_require_solvable_rejects_create_and_patch(self):
+        payload = {"title": "X", "rows": 2, "cols": 2, "dots": CROSSED_2X2}
+        resp = self.client.post("/api/boards/", payload, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("nie ma rozwiązania", resp.data["non_field_errors"][0])
+
+        # 3×3 – „a” obchodzi „b” dołem; po zmniejszeniu do 2 wierszy już nie
+        dots = _dots({"a": [(0, 0), (0, 2)], "b": [(0, 1), (1, 1)]})
+        board = GameBoard.objects.create(owner=self.user, title="X", rows=3, cols=3, dots=dots)
+        resp = self.client.patch(f"/api/boards/{board.pk}/", {"title": "Y"}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.patch(f"/api/boards/{board.pk}/", {"rows": 2}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_patch_shrinking_grid_rechecks_stored_dots(self):
+        dots = _dots({"a": [(0, 0), (4, 4)]})
+        board = GameBoard.objects.create(owner=self.user, title="X", rows=5, cols=5, dots=dots)
+        resp = self.client.patch(f"/api/boards/{board.pk}/", {"rows": 2}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        board.refresh_from_db()
+        self.assertEqual(board.rows, 5)
+
+    def test_malformed_stored_dots_give_invalid_not_500(self):
+        board = GameBoard.objects.create(owner=self.user, title="X", rows=2, cols=2,
+                                         dots=_dots({"a": [(0, 0)]}))
+        resp = self.client.get(f"/api/boards/{board.pk}/solve/")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["status"], "invalid")
+        self.assertIn("2 razy", resp.data["error"])
+        self.assertEqual(solver.solve(2, 2, [{"row": 5, "col": 0, "color": "a"}]).status, solver.INVALID)
+
+    def test_oversized_board_is_unknown_without_building_grid(self):
+        board = GameBoard.objects.create(owner=self.user, title="X", rows=1000, cols=1000,
+                                         dots=_dots({"a": [(0, 0), (999, 999)]}))
+        started = time.perf_counter()
+        resp = self.client.get(f"/api/boards/{board.pk}/solve/")
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(resp.data["status"], "unknown")
+        with mock.patch.object(solver, "MAX_CELLS", 10**6):
+            result = solver.solve(1000, 1000, board.dots, timeout=0.05)
+        self.assertEqual(result.status, "unknown")   # deadline przerwał budowę siatki
+
+
+class BoardSolutionAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.client.force_authenticate(self.user)
+        self.board = GameBoard.objects.create(owner=self.user, title="F", rows=5, cols=5, dots=FLOW_5X5)
+
+    def post(self, paths):
+        return self.client.post("/api/solutions/", {"board": self.board.pk, "paths": paths}, format="json")
+
+    def test_complete_solution_reports_full_coverage(self):
+        paths = solver.solve(5, 5, FLOW_5X5, fill=True).paths
+        r = self.post({color: [list(cell) for cell in cells] for color, cells in paths.items()})
+        self.assertEqual(r.status_code, 201, r.data)
+        self.assertTrue(r.data["complete"])
+        self.assertEqual(r.data["covered"], 25)
+        self.assertEqual(r.data["report"]["coverage"], 1.0)
+        self.assertEqual(self.post({}).status_code, 400)  # jedno rozwiązanie na planszę
+
+    def test_partial_solution_is_stored_with_missing_colours(self):
+        r = self.post({"R": [[0, 0], [4, 0], [4, 1]]})
+        self.assertEqual(r.status_code, 201)
+        self.assertFalse(r.data["complete"])
+        self.assertEqual(r.data["covered"], 6)
+        self.assertEqual(r.data["report"]["missing"], ["B", "G", "O", "Y"])
+
+        r = self.client.patch(f"/api/solutions/{r.data['id']}/", {"paths": {"R": [[0, 0], [2, 0]]}}, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["report"]["paths"], {"R": "building"})
+
+    def test_crossing_paths_are_rejected(self):
+        r = self.post({
+            "R": [[0, 0], [4, 0], [4, 1]],
+            "G": [[0, 2], [0, 1], [2, 1], [2, 0]],   # wchodzi na (2, 0) ścieżki R
+            "pink": [[0, 0]],
+        })
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("innego koloru", r.data["paths"]["G"])
+        self.assertIn("pink", r.data["paths"])
+        self.assertFalse(BoardSolution.objects.exists())
+
+    def test_one_route_per_user_and_board(self):
+        payload = {"name": "R", "background": self.board.pk}
+        self.assertEqual(self.client.post("/api/routes/", payload, format="json").status_code, 201)
+        r = self.client.post("/api/routes/", payload, format="json")
+        self.assertEqual(r.status_code, 400)
+        # inny gracz może mieć własną trasę na tej samej planszy
+        self.client.force_authenticate(User.objects.create_user("bob", password="pwd"))
+        self.assertEqual(self.client.post("/api/routes/", payload, format="json").status_code, 201)
+
+class RoutePointIncrementalAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pwd")
+        self.client.force_authenticate(self.user)
+        board = GameBoard.objects.create(
+            owner=self.user, title="B", rows=10, cols=10,
+            dots=_dots({"a": [(0, 0), (9, 9)], "b": [(5, 5), (6, 6)]}),
+        )
+        self.route = Route.objects.create(name="R", owner=self.user, background=board)
+        self.url = f"/api/routes/{self.route.pk}/points/bulk/"
+        self.client.put(self.url, [{"x": i, "y": 0} for i in range(5)], format="json")
+
+    def coords(self):
+        self.route.refresh_from_db()
+        return [(order, x) for order, (x, _) in enumerate(self.route.coords, start=1)]
+
+    def test_append_and_truncate(self):
+        r = self.client.patch(self.url, [
+            {"op": "truncate", "after": 3},
+            {"op": "append", "points": [{"x": 7, "y": 0}]},
+        ], format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["count"], 4)
+        self.assertEqual(self.coords(), [(1, 0), (2, 1), (3, 2), (4, 7)])
+
+    def test_replace_range_shifts_tail(self):
+        # (1, 0) → objazd (0, 1), (1, 1), (1, 0)
+        detour = [{"x": 0, "y": 1}, {"x": 1, "y": 1}, {"x": 1, "y": 0}]
+        grow = [{"op": "replace", "start": 2, "end": 3, "points": detour}]
+        self.client.patch(self.url, grow, format="json")
+        self.assertEqual(self.coords(), [(1, 0), (2, 0), (3, 1), (4, 1), (5, 2), (6, 3), (7, 4)])
+        shrink = [{"op": "replace", "start": 2, "end": 5, "points": []}]
+        self.client.patch(self.url, shrink, format="json")
+        self.assertEqual(self.coords(), [(1, 0), (2, 2), (3, 3), (4, 4)])
+
+    def test_patch_is_one_update_whatever_the_ops(self):
+        ops = [
+            {"op": "append", "points": [{"x": 4, "y": 2}, {"x": 7, "y": 2}]},
+            {"op": "replace", "start": 6, "end": 8, "points": [{"x": 4, "y": 3}]},
+        ]
+        # trasa w IsRouteOwner + SAVEPOINT + trasa FOR UPDATE + UPDATE + RELEASE
+        with self.assertNumQueries(5):
+            self.client.patch(self.url, ops, format="json")
+
+    def test_route_json_keeps_points_shape(self):
+        r = self.client.get(f"/api/routes/{self.route.pk}/")
+        self.assertEqual(r.data["points"][1], {"id": 2, "order": 2, "x": 1, "y": 0})
+
+    def test_invalid_range_rolls_back(self):
+        r = self.client.patch(self.url, [
+            {"op": "truncate", "after": 0},
+            {"op": "replace", "start": 1, "end": 9, "points": []},
+        ], format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(len(self.coords()), 5)
+
+    def test_missing_operands_are_rejected(self):
+        r = self.client.patch(self.url, [{"op": "replace", "start": 1}], format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("end", r.data[0])
+
+    def test_invalid_path_is_rejected_before_write(self):
+        cases = [
+            [{"op": "append", "points": [{"x": 5, "y": 1}]}],                  # ukos
+            [{"op": "append", "points": [{"x": 2, "y": 0}]}],                  # zawraca
+            [{"op": "append", "points": [{"x": 4, "y": 5}, {"x": 6, "y": 5}]}],  # obca kropka (5, 5)
+            [{"op": "truncate", "after": 0}, {"op": "append", "points": [{"x": 1, "y": 1}]}],
+        ]
+        for ops in cases:
+            with CaptureQueriesContext(connection) as queries:
+                r = self.client.patch(self.url, ops, format="json")
+            self.assertEqual(r.status_code, 400, ops)
+            self.assertIn("points", r.data)
+            self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE")])
+        self.assertEqual(len(self.coords()), 5)
+        r = self.client.put(self.url, [{"x": 0, "y": 0}, {"x": 0, "y": 9}, {"x": 9, "y": 9}, {"x": 9, "y": 8}], format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("Punkt 4", r.data["points"][0])
+
+    def test_status_reports_completion(self):
+        url = f"/api/routes/{self.route.pk}/status/"
+        r = self.client.get(url)
+        self.assertEqual(r.data, {"status": "building", "color": "a", "cells": 5, "points": 5})
+        self.client.patch(self.url, [{"op": "append", "points": [{"x": 9, "y": 0}, {"x": 9, "y": 9}]}], format="json")
+        with self.assertNumQueries(1):
+            r = self.client.get(url)
+        self.assertEqual(r.data, {"status": "finished", "color": "a", "cells": 19, "points": 7})
+        Route.objects.filter(pk=self.route.pk).update(packed_points=geometry.pack([(3, 3)]))
+        self.assertEqual(self.client.get(url).data["status"], "invalid")
+
+class QueryCountTests(TestCase):
+    """Liczba zapytań nie rośnie z liczbą plansz / tras."""
+    def setUp(self):
+        self.alice = User.objects.create_user("alice", password="pwd")
+        self.bob = User.objects.create_user("bob", password="pwd")
+        dots = _dots({"a": [(0, 0), (1, 1)]})
+        for i in range(6):
+            owner = self.alice if i % 2 else self.bob
+            board = GameBoard.objects.create(owner=owner, title=f"B{i}", rows=4, cols=4, dots=dots)
+            if i % 3 == 0:
+                Route.objects.create(name=f"R{i}", owner=self.alice, background=board)
+        self.route = Route.objects.filter(owner=self.alice).first()
+        self.api = APIClient()
+        self.api.force_authenticate(self.alice)
+
+    def test_board_list_anonymous(self):
+        # COUNT + strona plansz z autorami
+        with self.assertNumQueries(2):
+            r = self.client.get(reverse("board_list_all"))
+        self.assertEqual(len(r.context["boards"]), 6)
+        self.assertContains(r, "@bob")
+
+    def test_board_lists_logged_in(self):
+        self.client.force_login(self.alice)
+        # sesja + użytkownik + COUNT + strona (trasa gracza podzapytaniem)
+        with self.assertNumQueries(4):
+            r = self.client.get(reverse("board_list_all"))
+        routes = {b.pk: b.route_for_user for b in r.context["boards"]}
+        self.assertEqual(routes, {
+            b.pk: Route.objects.filter(owner=self.alice, background=b).values_list("pk", flat=True).first()
+            for b in GameBoard.objects.all()
+        })
+        with self.assertNumQueries(4):
+            r = self.client.get(reverse("board_list_mine"))
+        self.assertEqual(len(r.context["boards"]), 3)
+
+    @mock.patch("routes.views.BOARDS_PER_PAGE", 4)
+    def test_board_list_is_paginated(self):
+        r = self.client.get(reverse("board_list_all"), {"page": 2})
+        self.assertEqual(len(r.context["boards"]), 2)
+        self.assertContains(r, "?page=1")
+
+    def test_points_list_looks_route_up_once(self):
+        url = f"/api/routes/{self.route.pk}/points/"
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.api.get(url).status_code, 200)
+        route_selects = [q for q in ctx.captured_queries
+                         if 'FROM "routes_route"' in q["sql"] and q["sql"].startswith("SELECT")]
+        self.assertEqual(len(route_selects), 1)
+
+    def test_bulk_put_looks_route_up_once(self):
+        url = f"/api/routes/{self.route.pk}/points/bulk/"
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.api.put(url, [{"x": 1, "y": 1}, {"x": 2, "y": 1}], format="json")
+        self.assertEqual(r.status_code, 200)
+        route_selects = [q for q in ctx.captured_queries
+                         if 'FROM "routes_route"' in q["sql"] and q["sql"].startswith("SELECT")]
+        self.assertEqual(len(route_selects), 1)
+
+    def test_foreign_route_is_forbidden(self):
+        foreign = GameBoard.objects.filter(owner=self.bob).first()
+        route = Route.objects.create(name="X", owner=self.bob, background=foreign)
+        for method, url in [
+            ("get", f"/api/routes/{route.pk}/points/"),
+            ("put", f"/api/routes/{route.pk}/points/bulk/"),
+            ("patch", f"/api/routes/{route.pk}/points/bulk/"),
+            ("post", f"/api/routes/{route.pk}/points/"),
+        ]:
+            # ciało niepoprawne – obcy i tak dostaje 403, nie opis błędów walidacji
+            body = None if method == "get" else [{"op": "?"}]
+            r = getattr(self.api, method)(url, body, format="json")
+            self.assertEqual(r.status_code, 403, (method, url))
+
+
+###############################################################################
+# 4. SSE
+###############################################################################
+
+
+class AsyncSSEHubTests(SimpleTestCase):
+    def test_publish_from_thread_reaches_async_client_once(self):
+        async def scenario():
+            hub = sse._loop_hub()
+            sub = hub.add(sse.GLOBAL_TOPIC)
+            try:
+                await asyncio.to_thread(sse._sse, "ping", {})
+                events = await sub.take(1)
+                await asyncio.sleep(0.05)
+                return events, len(sub.pending)
+            finally:
+                hub.remove(sub)
+
+        with mock.patch.object(sse, "_local_log", sse._MemoryEventLog(10)):
+            events, left = asyncio.run(scenario())
+        self.assertEqual(len(events), 1)
+        self.assertIn(b"event: ping\n", events[0].frame)
+        self.assertEqual(left, 0)
+
+
+class SSEEventLogTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sse, "_local_log", sse._MemoryEventLog(3))
+        self.log = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_frames_carry_increasing_ids(self):
+        first, second = sse._sse("a", {}), sse._sse("b", {})
+        self.assertLess(sse._id_key(first), sse._id_key(second))
+        self.assertTrue(self.log.since(first, sse.GLOBAL_TOPIC)[0].startswith(f"id: {second}\n".encode()))
+
+    def test_resume_replays_only_missed_events(self):
+        seen = sse._sse("a", {})
+        sse._sse("b", {"n": 1})
+        last = sse._sse("c", {"n": 2})
+        backlog, horizon = sse._resume(seen, sse.GLOBAL_TOPIC)
+        self.assertEqual(len(backlog), 2)
+        self.assertIn(b"event: b\n", backlog[0])
+        self.assertIn(b"event: c\n", backlog[1])
+        self.assertEqual(horizon, (True, sse._id_key(last)))
+        self.assertTrue(sse._is_replayed(sse._Event(backlog[-1], local=True), horizon))
+
+    def test_fan_out_runs_outside_log_lock(self):
+        held = []
+        with mock.patch.object(sse, "_fan_out_local", lambda topic, event: held.append(self.log._lock.locked())):
+            sse._sse("a", {})
+        self.assertEqual(held, [False])
+
+    def test_resume_from_latest_is_empty(self):
+        last = sse._sse("a", {})
+        self.assertEqual(sse._resume(last, sse.GLOBAL_TOPIC), ([], (True, sse._id_key(last))))
+
+    def test_gap_larger_than_log_requests_resync(self):
+        seen = sse._sse("a", {})
+        for _ in range(4):
+            sse._sse("b", {})
+        self.assertEqual(sse._resume(seen, sse.GLOBAL_TOPIC), ([sse.RESYNC_FRAME], None))
+
+    def test_unknown_or_foreign_id_requests_resync(self):
+        sse._sse("a", {})
+        self.assertEqual(sse._resume("garbage", sse.GLOBAL_TOPIC)[0], [sse.RESYNC_FRAME])
+        self.assertEqual(sse._resume("1-1", sse.GLOBAL_TOPIC)[0], [sse.RESYNC_FRAME])
+
+
+class SSETopicTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sse, "_local_log", sse._MemoryEventLog(10))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def subscribe(self, topic):
+        sub = sse._subscribe(topic)
+        self.addCleanup(sse._unsubscribe, sub)
+        return sub
+
+    def test_board_subscriber_gets_only_its_board(self):
+        board_sub = self.subscribe("board:5")
+        everything_sub = self.subscribe(sse.GLOBAL_TOPIC)
+        sse._sse("boardUpdated", {"board_id": 5, "owner_username": "alice"})
+        sse._sse("boardUpdated", {"board_id": 6, "owner_username": "alice"})
+        events = board_sub.take(0)
+        self.assertEqual(len(events), 1)
+        self.assertIn(b'"board_id": 5', events[0].frame)
+        self.assertEqual(len(everything_sub.take(0)), 2)
+
+    def test_owner_topic(self):
+        sub = self.subscribe("owner:bob")
+        sse._sse("newPath", {"board_id": 1, "owner_username": "alice"})
+        sse._sse("newPath", {"board_id": 1, "owner_username": "bob"})
+        self.assertEqual(len(sub.take(0)), 1)
+
+    def test_replay_is_filtered_by_topic(self):
+        seen = sse._sse("a", {"board_id": 1})
+        sse._sse("b", {"board_id": 2})
+        sse._sse("c", {"board_id": 1})
+        backlog, _ = sse._resume(seen, "board:1")
+        self.assertEqual(len(backlog), 1)
+        self.assertIn(b"event: c\n", backlog[0])
+
+    def test_request_topic(self):
+        factory = RequestFactory()
+        self.assertEqual(sse._request_topic(factory.get("/")), sse.GLOBAL_TOPIC)
+        self.assertEqual(sse._request_topic(factory.get("/?board=7")), "board:7")
+        self.assertEqual(sse._request_topic(factory.get("/?owner=bob")), "owner:bob")
+        self.assertIsNone(sse._request_topic(factory.get("/?board=x")))
+
+
+class SSESlowConsumerTests(SimpleTestCase):
+    def event(self, n, entity=""):
+        return sse._Event(f"id: 1-{n}\ndata: {{}}\n\n".encode(), entity)
+
+    def fill(self, sub, entities):
+        for n, entity in enumerate(entities):
+            sub.offer(self.event(n, entity))
+
+    def test_frame_bytes_are_shared_not_copied(self):
+        a, b = sse._ThreadSubscriber("t"), sse._ThreadSubscriber("t")
+        event = self.event(1)
+        a.offer(event)
+        b.offer(event)
+        self.assertIs(a.take(0)[0].frame, b.take(0)[0].frame)
+
+    @mock.patch.object(sse, "CLIENT_QUEUE_SIZE", 3)
+    def test_drop_oldest(self):
+        sub = sse._ThreadSubscriber("t", policy="drop_oldest")
+        self.fill(sub, ["a", "b", "c", "d"])
+        self.assertEqual([e.entity for e in sub.take(0)], ["b", "c", "d"])
+        self.assertEqual(sub.dropped, 1)
+
+    @mock.patch.object(sse, "CLIENT_QUEUE_SIZE", 3)
+    def test_coalesce_replaces_same_entity(self):
+        sub = sse._ThreadSubscriber("t", policy="coalesce")
+        self.fill(sub, ["a", "b", "c", "b"])
+        events = sub.take(0)
+        self.assertEqual([e.entity for e in events], ["a", "c", "b"])
+        self.assertEqual(events[-1].key, (1, 3))
+        self.assertEqual(sub.dropped, 0)
+
+    @mock.patch.object(sse, "CLIENT_QUEUE_SIZE", 3)
+    def test_disconnect(self):
+        sub = sse._ThreadSubscriber("t", policy="disconnect")
+        before = sse.stats()["disconnected"]
+        self.fill(sub, ["a", "b", "c", "d"])
+        self.assertTrue(sub.overflowed)
+        self.assertEqual(sub.take(0), [])
+        self.assertEqual(sse.stats()["disconnected"], before + 1)
+
+
+class SSECoalescingTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sse, "_sse")
+        self.published = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_of_updates_becomes_one_event_with_latest_state(self):
+        coalescer = sse._Coalescer(60)
+        for rows in (5, 6, 7):
+            coalescer.submit("boardUpdated", {"board_id": 1, "rows": rows})
+        coalescer.flush()
+        self.published.assert_called_once_with("boardUpdated", {"board_id": 1, "rows": 7})
+
+    def test_create_absorbs_updates_and_delete_wins(self):
+        coalescer = sse._Coalescer(60)
+        coalescer.submit("newPath", {"path_id": 1, "board_id": 1})
+        coalescer.submit("pathUpdated", {"path_id": 1, "board_id": 1})
+        coalescer.submit("boardUpdated", {"board_id": 2})
+        coalescer.submit("boardDeleted", {"board_id": 2})
+        coalescer.flush()
+        self.assertEqual(
+            [c.args[0] for c in self.published.call_args_list], ["newPath", "boardDeleted"]
+        )
+
+    def test_window_elapses_in_background(self):
+        coalescer = sse._Coalescer(0.05)
+        coalescer.submit("boardUpdated", {"board_id": 1})
+        coalescer.submit("boardUpdated", {"board_id": 1})
+        for _ in range(50):
+            if self.published.called:
+                break
+            time.sleep(0.02)
+        self.published.assert_called_once()
+
+    def test_zero_window_publishes_immediately(self):
+        sse._Coalescer(0).submit("boardUpdated", {"board_id": 1})
+        self.published.assert_called_once()
+
+
+class SSEOnCommitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("carol", password="pwd")
+
+    def test_publishes_after_commit(self):
+        with mock.patch.object(sse._coalescer, "submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                GameBoard.objects.create(owner=self.user, title="T")
+        submit.assert_called_once_with("newBoard", mock.ANY)
+
+    def test_rolled_back_write_publishes_nothing(self):
+        with mock.patch.object(sse._coalescer, "submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    GameBoard.objects.create(owner=self.user, title="T")
+                    raise RuntimeError
+        submit.assert_not_called()
+
+
+class SSEPayloadQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("dave", password="pwd")
+
+    def delete_board_with_routes(self, n):
+        board = GameBoard.objects.create(owner=self.user, title=f"B{n}")
+        for i in range(n):
+            owner = User.objects.create_user(f"r{n}-{i}", password="pwd")
+            Route.objects.create(name=f"R{i}", owner=owner, background=board)
+        board = GameBoard.objects.get(pk=board.pk)  # bez załadowanego ownera
+        with mock.patch.object(sse, "_emit") as emit:
+            with CaptureQueriesContext(connection) as ctx:
+                board.delete()
+        return len(ctx.captured_queries), emit
+
+    def test_cascade_delete_costs_constant_queries_and_one_event(self):
+        few, _ = self.delete_board_with_routes(1)
+        many, emit = self.delete_board_with_routes(6)
+        self.assertEqual(few, many)
+        emit.assert_called_once()
+        event, payload = emit.call_args.args
+        self.assertEqual(event, "boardDeleted")
+        self.assertEqual(payload["owner_username"], "dave")
+        self.assertEqual(len(payload["deleted_path_ids"]), 6)
+
+    def test_saved_route_reuses_loaded_relations(self):
+        board = GameBoard.objects.create(owner=self.user, title="B")
+        route = Route(name="R", owner=self.user, background=board)
+        with mock.patch.object(sse, "_emit") as emit:
+            with self.assertNumQueries(1):  # sam INSERT
+                route.save()
+        self.assertEqual(emit.call_args.args[1]["board_title"], "B")
+        self.assertEqual(emit.call_args.args[1]["owner_username"], "dave")
+
+
+class SSERedisFailoverTests(SimpleTestCase):
+    def setUp(self):
+        self.link = sse._RedisLink("redis://localhost:1/0")
+        self.link.started = True
+        self.link.client, self.link.log = mock.Mock(), mock.Mock()
+        for name, value in (("_link", self.link), ("_local_log", sse._MemoryEventLog(10))):
+            patcher = mock.patch.object(sse, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_backoff_grows_and_is_capped(self):
+        with mock.patch("random.uniform", return_value=1.0):
+            self.assertEqual(sse._backoff(0), sse.RECONNECT_MIN)
+            self.assertEqual(sse._backoff(1), 2 * sse.RECONNECT_MIN)
+            self.assertEqual(sse._backoff(100), sse.RECONNECT_MAX)
+
+    def test_down_link_waits_before_next_ping(self):
+        self.link.client.ping.side_effect = redis.ConnectionError("refused")
+        self.assertFalse(self.link.usable())
+        self.assertFalse(self.link.usable())
+        self.link.client.ping.assert_called_once()
+        self.assertEqual(self.link.state()["status"], "down")
+
+        self.link._retry_at = 0
+        self.link.client.ping.side_effect = None
+        self.assertTrue(self.link.usable())
+        self.assertEqual(self.link.state()["mode"], "redis")
+
+    def test_publish_error_switches_to_local_fan_out(self):
+        self.link.healthy = True
+        sub = sse._subscribe(sse.GLOBAL_TOPIC)
+        self.addCleanup(sse._unsubscribe, sub)
+        self.link.log.publish.side_effect = redis.ConnectionError
+        sse._sse("ping", {})
+        self.assertFalse(self.link.healthy)
+        self.assertEqual(len(sub.take(0)), 1)
+
+    def test_local_events_after_failover_pass_redis_horizon(self):
+        self.link.healthy = True
+        self.link.log.since.return_value = []
+        sub = sse._subscribe(sse.GLOBAL_TOPIC)
+        self.addCleanup(sse._unsubscribe, sub)
+        _, horizon = sse._resume(f"{time.time_ns() // 1_000_000 + 1000}-0", sse.GLOBAL_TOPIC)
+        self.assertEqual(horizon[0], False)
+
+        self.link.log.publish.side_effect = redis.ConnectionError
+        sse._sse("ping", {})                  # Redis padł – dziennik lokalny
+        frames = list(sse._frames(sub.take(0), horizon))
+        self.assertEqual(len(frames), 1)
+        self.assertIn(b"event: ping\n", frames[0])
+
+    @mock.patch.object(sse, "LOCAL_FALLBACK", False)
+    def test_without_local_fallback_events_are_dropped(self):
+        self.link.client.ping.side_effect = redis.ConnectionError
+        sub = sse._subscribe(sse.GLOBAL_TOPIC)
+        self.addCleanup(sse._unsubscribe, sub)
+        self.assertIsNone(sse._sse("ping", {}))
+        self.assertEqual(sub.take(0), [])
+        self.assertEqual(sse.stats()["redis"]["mode"], "off")
+
+    def test_link_connects_only_on_first_use(self):
+        link = sse._RedisLink("redis://localhost:1/0")
+        self.assertEqual(link.state()["status"], "idle")
+        self.assertIsNone(link.client)
+        with mock.patch("redis.Redis.ping", side_effect=redis.ConnectionError) as ping:
+            self.assertFalse(link.usable())
+        ping.assert_called_once()
+        self.assertEqual(link.state()["status"], "down")
+
+    def test_health_endpoint_reports_degraded_worker(self):
+        request = RequestFactory().get("/sse/health/")
+        self.assertEqual(sse.sse_health(request).status_code, 503)
+        self.link.healthy = True
+        self.assertEqual(sse.sse_health(request).status_code, 200)
+
+    def entry(self, event_id, topics="global"):
+        return (event_id.encode(), {b"frame": b"event: x\ndata: {}\n\n", b"topics": topics.encode()})
+
+    def test_cursor_replays_gap_once(self):
+        cursor, delivered = sse._StreamCursor(), []
+        cursor.anchor([self.entry("5-0")])
+        entries = [self.entry("6-0"), self.entry("7-0", "global board:1")]
+        cursor.replay([self.entry("1-0")], entries, lambda t, e: delivered.append(t), [])
+        self.assertEqual(delivered, ["global", "global", "board:1"])
+        self.assertFalse(cursor.accept(sse._Event(b"id: 7-0\n")))
+        self.assertTrue(cursor.accept(sse._Event(b"id: 8-0\n")))
+
+    def test_cursor_requests_resync_when_gap_was_trimmed(self):
+        cursor, delivered = sse._StreamCursor(), []
+        cursor.anchor([self.entry("5-0")])
+        cursor.replay([self.entry("9-0")], [self.entry("9-0")], lambda t, e: delivered.append(e.frame), ["board:1"])
+        self.assertEqual(delivered[0], sse.RESYNC_FRAME)
+
+
+class SSEMetricsTests(SimpleTestCase):
+    def setUp(self):
+        link = sse._RedisLink("redis://localhost:1/0")
+        link.started, link.client = True, mock.Mock()
+        link.client.ping.side_effect = redis.ConnectionError
+        for name, value in (("_link", link), ("_local_log", sse._MemoryEventLog(10)),
+                            ("_delivery_latency", metrics.Histogram(sse.LATENCY_BUCKETS)),
+                            ("_listener_lag", metrics.Histogram(sse.LATENCY_BUCKETS))):
+            patcher = mock.patch.object(sse, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def subscribe(self, topic=sse.GLOBAL_TOPIC):
+        sub = sse._subscribe(topic)
+        self.addCleanup(sse._unsubscribe, sub)
+        return sub
+
+    def test_delivery_latency_from_publish_timestamp(self):
+        sub = self.subscribe()
+        sse._sse("ping", {})
+        events = sub.take(0)
+        self.assertIsNotNone(events[0].published)
+        with mock.patch("time.time", return_value=events[0].published + 0.2):
+            frames = list(sse._frames(events, None))
+        self.assertEqual(frames, [events[0].frame])
+        self.assertAlmostEqual(sse.stats()["delivery_latency_ms"]["p50"], 175, delta=80)
+
+    def test_redis_message_carries_publish_time(self):
+        event = sse._received(b"board:1 1700000000000\nid: 1-1\ndata: {}\n\n")
+        self.assertEqual((event.entity, event.published), ("board:1", 1_700_000_000.0))
+        self.assertEqual(sse._listener_lag.quantile(0.5), sse.LATENCY_BUCKETS[-1])
+        legacy = sse._decode_message(b"board:1\nid: 1-1\ndata: {}\n\n")
+        self.assertEqual((legacy.entity, legacy.published), ("board:1", None))
+
+    def test_queue_depth_percentiles(self):
+        for depth in (0, 0, 5):
+            sub = self.subscribe()
+            for n in range(depth):
+                sub.offer(sse._Event(f"id: 1-{n}\n".encode()))
+        current = sse.stats()
+        self.assertEqual(current["connections"], 3)
+        self.assertEqual(current["queue_depth"], {"p50": 0, "p90": 5, "p99": 5, "max": 5})
+
+    def test_resume_and_resync_counters(self):
+        before = sse.stats()
+        sse._resume("999-1", sse.GLOBAL_TOPIC)
+        after = sse.stats()
+        self.assertEqual(after["resumed"], before["resumed"] + 1)
+        self.assertEqual(after["resynced"], before["resynced"] + 1)
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0)
+    def test_exposed_on_metrics_endpoint(self):
+        self.subscribe()
+        text = metrics.REGISTRY.render()
+        self.assertIn("editor_sse_connections 1", text)
+        self.assertIn('editor_sse_client_queue_depth{quantile="0.99"} 0', text)
+        self.assertIn("editor_sse_delivery_latency_seconds_count 0", text)
+        self.assertIn("editor_sse_redis_up 0", text)
+
+    def test_reporter_entry_and_command(self):
+        entry = sse._reporter.entry()
+        self.assertTrue(entry["name"].startswith(f"{sse.STATS_KEY}:"))
+        report = json.loads(entry["value"])
+        with mock.patch.object(sse, "worker_stats", return_value=[report, report]):
+            out = io.StringIO()
+            call_command("sse_stats", stdout=out)
+        self.assertIn("Razem 2 workerów", out.getvalue())
+        with mock.patch.object(sse, "worker_stats", side_effect=redis.ConnectionError("refused")):
+            with self.assertRaisesMessage(CommandError, "Redis niedostępny"):
+                call_command("sse_stats")
+
+
+class SSEStartupTests(SimpleTestCase):
+    def test_ready_does_not_touch_redis_by_default(self):
+        with mock.patch.object(sse, "start") as start:
+            apps.get_app_config("routes").ready()
+        start.assert_not_called()
+
+    @override_settings(SSE_AUTOSTART=True, SSE_ASYNC=True)
+    def test_autostart_setting_starts_in_ready(self):
+        with mock.patch.object(sse, "start") as start:
+            apps.get_app_config("routes").ready()
+        start.assert_called_once_with(listener=False)
+
+
+###############################################################################
+# 5. Metrics
+###############################################################################
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_SAMPLE_RATE=1.0, METRICS_TOKEN="s3cret")
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.REGISTRY.clear()
+        self.addCleanup(metrics.REGISTRY.clear)
+        self.user = User.objects.create_user("alice", password="pwd")
+        GameBoard.objects.create(owner=self.user, title="B", rows=4, cols=4,
+                                 dots=_dots({"a": [(0, 0), (1, 1)]}))
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def scrape(self, **headers):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret", **headers)
+
+    def series(self, text, name, view):
+        prefix = f'editor_{name}{{view="{view}",method="GET",status="200"'
+        return [line for line in text.splitlines() if line.startswith(prefix)]
+
+    def test_records_latency_queries_serializer_and_size(self):
+        body = self.api.get("/api/boards/").content
+        text = self.scrape().content.decode()
+        self.assertIn('editor_http_requests_total{view="board-list",method="GET",status="200"} 1', text)
+        for name in ("http_request_duration_seconds", "db_queries_per_request",
+                     "db_query_duration_seconds", "serializer_duration_seconds"):
+            self.assertTrue(self.series(text, name + "_count", "board-list"), name)
+        queries = self.series(text, "db_queries_per_request_sum", "board-list")[0]
+        self.assertGreater(float(queries.rsplit(" ", 1)[1]), 0)
+        size = self.series(text, "http_response_size_bytes_sum", "board-list")[0]
+        self.assertEqual(float(size.rsplit(" ", 1)[1]), len(body))
+        self.assertNotIn('view="metrics"', text)    # scrape nie liczy sam siebie
+
+    def test_asgi_requests_record_queries(self):
+        async def fetch():
+            client = AsyncClient()
+            await sync_to_async(client.force_login)(self.user)
+            return await client.get("/api/boards/")
+
+        self.assertEqual(async_to_sync(fetch)().status_code, 200)
+        text = self.scrape().content.decode()
+        queries = self.series(text, "db_queries_per_request_sum", "board-list")[0]
+        self.assertGreater(float(queries.rsplit(" ", 1)[1]), 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_only_counted(self):
+        with mock.patch.object(metrics._Sample, "__call__") as measure:
+            self.api.get("/api/boards/")
+        measure.assert_not_called()
+        text = self.scrape().content.decode()
+        self.assertIn('editor_http_requests_total{view="board-list",method="GET",status="200"} 1', text)
+        self.assertFalse(self.series(text, "http_request_duration_seconds_count", "board-list"))
+
+    def test_scrape_requires_token_or_staff(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.scrape(HTTP_X_NOOP="1").status_code, 200)
+        self.assertTrue(self.scrape()["Content-Type"].startswith("text/plain; version=0.0.4"))
+        admin = User.objects.create_user("root", password="pwd", is_staff=True)
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.api.get("/api/boards/")
+        self.assertEqual(self.scrape().status_code, 404)
+        self.assertEqual(metrics.REGISTRY.render().count("editor_http_requests_total{"), 0)
+
+
+###############################################################################
+# 6. Synthetic data & benchmarks
+###############################################################################
+
+
+class SyntheticDataTests(TestCase):
+    def test_layout_is_valid_and_solved_by_its_paths(self):
+        rng = random.Random(3)
+        for size, colors in ((5, 3), (12, 8), (9, 20)):
+            dots, paths = synthetic.layout(size, size, colors, rng)
+            self.assertEqual(batch.check_dots(size, size, dots), [])
+            board = GameBoard(rows=size, cols=size, dots=dots)
+            state = validation.check_solution(validation.board_map(board), paths)
+            self.assertTrue(state.complete)
+            self.assertEqual(state.covered, size * size)
+
+    def test_seed_is_deterministic(self):
+        synthetic.seed(users=2, boards_per_user=3, routes_per_user=2, size=6, colors=4, seed=7)
+        first = list(GameBoard.objects.order_by("pk").values_list("dots", flat=True))
+        GameBoard.objects.all().delete()    # kaskadą również trasy
+        counts = synthetic.seed(users=2, boards_per_user=3, routes_per_user=2, size=6, colors=4,
+                                seed=7, prefix="again")
+        self.assertEqual(list(GameBoard.objects.order_by("pk").values_list("dots", flat=True)), first)
+        self.assertEqual(counts, {"users": 2, "boards": 6, "routes": 4})
+        self.assertEqual(Route.objects.count(), 4)
+
+    def test_benchmark_command_writes_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.json")
+            call_command(
+                "benchmark", "--in-place", "--users", "2", "--boards", "2", "--routes", "1",
+                "--size", "5", "--colors", "3", "--requests", "3", "--warmup", "1",
+                "--sse-clients", "3", "--sse-events", "5", "--output", path, stdout=io.StringIO(),
+            )
+            with open(path, encoding="utf-8") as fh:
+                result = json.load(fh)
+        self.assertEqual(result["seed"]["boards"], 4)
+        for row in result["endpoints"].values():
+            self.assertEqual(row["requests"], 3)
+            self.assertLess(row["status"], 400)
+        self.assertEqual(result["sse"]["delivered"], 15)
+
+    def test_generate_data_is_valid_and_independent_of_batches(self):
+        args = ["--boards", "30", "--routes", "40", "--users", "4", "--min-size", "3",
+                "--max-size", "9", "--seed", "5"]
+        call_command("generate_data", *args, "--batch-size", "7", stdout=io.StringIO())
+        self.assertEqual((GameBoard.objects.count(), Route.objects.count()), (30, 40))
+        for route in Route.objects.select_related("background"):
+            board = route.background
+            self.assertEqual(batch.check_dots(board.rows, board.cols, board.dots), [])
+            self.assertEqual(validation.check_route(validation.board_map(board), route.coords).status,
+                             validation.FINISHED)
+        boards = dict(GameBoard.objects.values_list("title", "dots"))
+
+        call_command("generate_data", *args, "--batch-size", "30", "--clear", "--no-signals",
+                     stdout=io.StringIO())
+        self.assertEqual(dict(GameBoard.objects.values_list("title", "dots")), boards)
+        self.assertEqual(Route.objects.count(), 40)
+
+    def test_generate_data_refuses_existing_prefix_and_parallel_sqlite(self):
+        call_command("generate_data", "--boards", "1", "--users", "1", stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, "--clear"):
+            call_command("generate_data", "--boards", "1", "--users", "1", stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, "SQLite"):
+            call_command("generate_data", "--workers", "2", "--clear", stdout=io.StringIO())
+
+    def test_muted_signals_restores_receivers(self):
+        receivers = post_save.receivers
+        with synthetic.muted_signals():
+            self.assertFalse(post_save.has_listeners(GameBoard))
+        self.assertEqual(post_save.receivers, receivers)
+        self.assertTrue(post_save.has_listeners(GameBoard))
@@ -1,7 +1,8 @@
 # routes/urls.py
 from django.urls import path
 from . import views
-from .sse import event_stream
+from .sse import event_stream, event_stream_async, sse_health, sse_stats
+from django.conf import settings
 from django.views.generic import RedirectView
 
 urlpatterns = [
@@ -25,5 +26,11 @@ urlpatterns = [
     path("boards/<int:pk>/route", views.route_edit, name="route_edit"),
     path("boards/<int:pk>/new", views.route_edit, name="route_new"),
 
-    path("sse/notifications/", event_stream, name="sse_notifications"),
+    path(
+        "sse/notifications/",
+        event_stream_async if settings.SSE_ASYNC else event_stream,
+        name="sse_notifications",
+    ),
+    path("sse/stats/", sse_stats, name="sse_stats"),
+    path("sse/health/", sse_health, name="sse_health"),
 ]
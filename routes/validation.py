@@ -0,0 +1,183 @@
+# routes/validation.py
+"""Walidacja ścieżki względem planszy – te same reguły co ``route-editor.ts``.
+
+Ścieżka to lista wierzchołków ``(x, y)`` = ``(row, col)``; kolejne
+wierzchołki łączy odcinek poziomy albo pionowy dowolnej długości.  Reguły:
+
+• pierwszy punkt leży na kropce – jej kolor jest kolorem ścieżki,
+• odcinki tylko ↑↓←→, każde pole co najwyżej raz (bez przecięć i zawracania),
+• żadnych kropek innego koloru na drodze,
+• dojście do drugiej kropki tego koloru kończy ścieżkę – musi to być
+  ostatni wierzchołek.
+
+Plansza jest sprowadzana do :class:`BoardMap` – maski bitowej pól z kropkami
+(bit ``row * cols + col``) i par kropek; mapę liczymy raz na układ planszy.
+Sprawdzenie idzie pole po polu wzdłuż odcinków z maską odwiedzonych pól
+w jednym ``int``, więc kosztuje O(długość ścieżki), niezależnie od
+rozmiaru planszy i liczby kropek.
+
+:func:`check_solution` sprawdza komplet ścieżek (po jednej na kolor) jednym
+przejściem po siatce: wszystkie ścieżki zajmują pola we wspólnej masce, więc
+kolizję dwóch kolorów widać przy pierwszym wspólnym polu – bez porównywania
+ścieżek parami.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence
+
+from .geometry import Point
+
+EMPTY = "empty"
+BUILDING = "building"
+FINISHED = "finished"
+
+
+class RouteError(ValueError):
+    """Naruszona reguła; ``index`` – numer (od 0) wierzchołka, który ją łamie."""
+
+    def __init__(self, message: str, index: int) -> None:
+        super().__init__(message)
+        self.index = index
+
+
+@dataclass(frozen=True)
+class BoardMap:
+    rows: int
+    cols: int
+    dots_mask: int
+    color_at: dict[int, str]   # pole kropki → kolor
+    partner: dict[int, int]    # pole kropki → pole drugiej kropki tego koloru
+
+
+@dataclass(frozen=True)
+class RouteState:
+    status: str                # EMPTY / BUILDING / FINISHED
+    color: str | None = None
+    cells: int = 0             # liczba pól pod ścieżką
+
+    def as_dict(self) -> dict:
+        return {"status": self.status, "color": self.color, "cells": self.cells}
+
+
+@lru_cache(maxsize=1024)
+def _build_map(rows: int, cols: int, dots: tuple[tuple[int, int, str], ...]) -> BoardMap:
+    mask, color_at, by_color = 0, {}, {}
+    for r, c, color in dots:
+        if 0 <= r < rows and 0 <= c < cols:
+            cell = r * cols + c
+            mask |= 1 << cell
+            color_at[cell] = color
+            by_color.setdefault(color, []).append(cell)
+    partner = {}
+    for cells in by_color.values():
+        if len(cells) == 2:
+            a, b = cells
+            partner[a], partner[b] = b, a
+    return BoardMap(rows, cols, mask, color_at, partner)
+
+
+def board_map(board) -> BoardMap:
+    """:class:`BoardMap` dla ``GameBoard`` (zapamiętana dla danego układu)."""
+    dots = tuple((d["row"], d["col"], d["color"]) for d in board.dots or [])
+    return _build_map(board.rows, board.cols, dots)
+
+
+def check_route(board: BoardMap, coords: Sequence[Point]) -> RouteState:
+    """Stan pełnej albo częściowej ścieżki; ``RouteError`` przy złamaniu reguły."""
+    return _walk(board, coords)[0]
+
+
+def _walk(board: BoardMap, coords: Sequence[Point], taken: int = 0) -> tuple[RouteState, int]:
+    """:func:`check_route` + maska pól ścieżki; ``taken`` – pola innych ścieżek."""
+    if not coords:
+        return RouteState(EMPTY), 0
+    rows, cols = board.rows, board.cols
+
+    def cell_of(index: int) -> int:
+        r, c = coords[index]
+        if not (0 <= r < rows and 0 <= c < cols):
+            raise RouteError("Punkt poza planszą.", index)
+        return r * cols + c
+
+    start = cell_of(0)
+    if start not in board.color_at:
+        raise RouteError("Ścieżka musi zaczynać się na kropce.", 0)
+    color, goal = board.color_at[start], board.partner.get(start)
+    visited, cells, finished = 1 << start, 1, False
+
+    for i in range(1, len(coords)):
+        if finished:
+            raise RouteError("Ścieżka jest już zakończona na kropce.", i)
+        end = cell_of(i)
+        (pr, pc), (r, c) = coords[i - 1], coords[i]
+        if (pr == r) == (pc == c):
+            raise RouteError("Odcinek musi być poziomy albo pionowy.", i)
+        step = (1 if c > pc else -1) if pr == r else (cols if r > pr else -cols)
+        cell = end - (abs(c - pc) + abs(r - pr)) * step
+        while cell != end:
+            cell += step
+            bit = 1 << cell
+            if visited & bit:
+                raise RouteError("Ścieżka przecina samą siebie.", i)
+            if taken & bit:
+                raise RouteError("Ścieżka przecina ścieżkę innego koloru.", i)
+            if board.dots_mask & bit:
+                if cell != goal:
+                    raise RouteError("Ścieżka przechodzi przez kropkę innego koloru.", i)
+                if cell != end:
+                    raise RouteError("Ścieżka musi kończyć się na kropce swojego koloru.", i)
+                finished = True
+            visited |= bit
+            cells += 1
+
+    return RouteState(FINISHED if finished else BUILDING, color, cells), visited
+
+
+@dataclass(frozen=True)
+class SolutionState:
+    paths: dict[str, RouteState]
+    errors: dict[str, str]     # kolor → opis pierwszego złamania reguły
+    missing: tuple[str, ...]   # kolory planszy bez ukończonej ścieżki
+    covered: int               # pola pod poprawnymi ścieżkami
+    cells: int                 # rows × cols
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors and not self.missing
+
+    def as_dict(self) -> dict:
+        return {
+            "complete": self.complete,
+            "paths": {color: state.status for color, state in self.paths.items()},
+            "errors": self.errors,
+            "missing": list(self.missing),
+            "covered": self.covered,
+            "cells": self.cells,
+            "coverage": round(self.covered / self.cells, 4) if self.cells else 0.0,
+        }
+
+
+def check_solution(board: BoardMap, paths: dict[str, Sequence[Point]]) -> SolutionState:
+    """Komplet ścieżek ``{kolor: [(x, y), …]}`` w jednym przejściu po siatce."""
+    colors = set(board.color_at.values())
+    taken, states, errors = 0, {}, {}
+    for color, coords in paths.items():
+        if color not in colors:
+            errors[color] = "Na planszy nie ma kropek tego koloru."
+            continue
+        try:
+            state, mask = _walk(board, coords, taken)
+            if coords and state.color != color:
+                raise RouteError("Ścieżka zaczyna się na kropce innego koloru.", 0)
+        except RouteError as exc:
+            errors[color] = f"Punkt {exc.index + 1}: {exc}"
+            continue
+        states[color] = state
+        taken |= mask
+    missing = tuple(sorted(
+        color for color in colors
+        if color not in errors and (color not in states or states[color].status != FINISHED)
+    ))
+    return SolutionState(states, errors, missing, taken.bit_count(), board.rows * board.cols)
@@ -1,59 +1,84 @@
+import json
+
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
+from django.core.paginator import Paginator
 from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from .forms import RouteCreateForm, PointForm, BoardForm
-from .models import Route, RoutePoint, GameBoard
+from .models import Route, GameBoard
+from .serializers import point_dicts
+from . import board_cache, validation
 
 PALETTE = [
     "#ef4444", "#f97316", "#eab308", "#22c55e", "#14b8a6",
     "#0ea5e9", "#6366f1", "#8b5cf6", "#ec4899", "#f43f5e",
 ]
+BOARDS_PER_PAGE = 50
 
 @login_required
 def point_add(request, pk):
     route = get_object_or_404(Route, pk=pk, owner=request.user)
     form = PointForm(request.POST)
     if form.is_valid():
-        point = form.save(commit=False)
-        point.route = route
-        point.order = route.points.count() + 1
-        point.save()
+        coords = [*route.coords, (form.cleaned_data["x"], form.cleaned_data["y"])]
+        try:
+            validation.check_route(validation.board_map(route.background), coords)
+        except validation.RouteError:
+            return redirect("route_detail", pk)
+        route.coords = coords
+        route.save(update_fields=["packed_points"])
     return redirect("route_detail", pk)
 
 @login_required
 def point_delete(request, pk, point_id):
     route = get_object_or_404(Route, pk=pk, owner=request.user)
-    RoutePoint.objects.filter(pk=point_id, route=route).delete()
+    coords = route.coords
+    if 1 <= point_id <= len(coords):          # point_id == order
+        del coords[point_id - 1]
+        try:
+            validation.check_route(validation.board_map(route.background), coords)
+        except validation.RouteError:
+            return redirect("route_detail", pk)
+        route.coords = coords
+        route.save(update_fields=["packed_points"])
     return redirect("route_detail", pk)
 
+def _board_page(request, boards):
+    """
+    Strona listy plansz w dwóch zapytaniach (COUNT + SELECT): autor JOIN-em,
+    ``route_for_user`` (id trasy gracza albo ``None``) podzapytaniem, bez ``dots``.
+    """
+    boards = (
+        boards.select_related("owner")
+        .only("id", "title", "modified", "owner__username")
+        .order_by("-modified", "id")
+    )
+    if request.user.is_authenticated:
+        boards = boards.annotate(route_for_user=Subquery(
+            Route.objects.filter(owner=request.user, background=OuterRef("pk")).values("pk")[:1]
+        ))
+    return Paginator(boards, BOARDS_PER_PAGE).get_page(request.GET.get("page"))
+
 @login_required
 def board_list_mine(request):
-    boards = GameBoard.objects.filter(owner=request.user)
-    # Pobierz trasy użytkownika do wszystkich plansz
-    user_routes = {r.background_id: r for r in Route.objects.filter(owner=request.user)}
-    for b in boards:
-        # Przypisz trasę użytkownika do planszy lub None
-        b.route_for_user = user_routes.get(b.id, None)
     return render(request, "routes/board_list.html",
-                  {"boards": boards, "mine": True})
+                  {"boards": _board_page(request, GameBoard.objects.filter(owner=request.user)),
+                   "mine": True})
 
 def board_list_all(request):
-    boards = GameBoard.objects.select_related("owner").all()
-    user = request.user if request.user.is_authenticated else None
-    if user:
-        user_routes = {r.background_id: r for r in Route.objects.filter(owner=user)}
-        for b in boards:
-            b.route_for_user = user_routes.get(b.id)
-    else:
-        for b in boards:
-            b.route_for_user = None
     return render(request, "routes/board_list.html",
-                  {"boards": boards, "user": request.user})
+                  {"boards": _board_page(request, GameBoard.objects.all()), "user": request.user})
 
 def board_view(request, pk):
-    board = get_object_or_404(GameBoard, pk=pk)
-    return render(request, "routes/board_view.html", {"board": board})
+    data = board_cache.board_json(pk)
+    if data is None:
+        raise Http404
+    # JSON wprost do <script type="application/json"> – jak json_script: bez „<”, „>”, „&”
+    embedded = data.decode().replace("<", "\\u003C").replace(">", "\\u003E").replace("&", "\\u0026")
+    return render(request, "routes/board_view.html", {"board": json.loads(data), "board_json": embedded})
 
 @login_required
 def board_edit(request, pk=None):
@@ -132,9 +157,7 @@ def route_detail(request, pk):
     route = get_object_or_404(Route, pk=pk, owner=request.user)
     point_form = PointForm()
 
-    points = list(
-        route.points.order_by("order").values("id", "x", "y")
-    )
+    points = point_dicts(route.coords)
 
     return render(
         request,
@@ -5,13 +5,20 @@ const container = document.getElementById("gridContainer")!;
 const boardIdAttr = container.dataset.boardId || null;
 let   boardId: string | null = boardIdAttr && boardIdAttr.length ? boardIdAttr : null;
 
-const res = await fetch(`/api/boards/${boardId}`);
-if (!res.ok) {
-  console.log(res)
-  console.error("Nie udało się pobrać planszy:", res.status);
+// Strona osadza JSON planszy (z cache serwera) – fetch tylko, gdy go brak.
+async function loadBoard() {
+  const embedded = document.getElementById("boardData")?.textContent;
+  if (embedded) return JSON.parse(embedded);
+
+  const res = await fetch(`/api/boards/${boardId}/`);
+  if (!res.ok) {
+    console.log(res)
+    console.error("Nie udało się pobrać planszy:", res.status);
+  }
+  return res.json();
 }
 
-const data = await res.json();
+const data = await loadBoard();
 console.log("🔹 Załadowano planszę:", data);
 
 const cellSize = calcCellSize(container, data.rows, data.cols);
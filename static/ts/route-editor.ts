@@ -53,6 +53,9 @@ const state: EditorState = {
 
 let stateBoard: { rows: number; cols: number; dots: Dot[] } = { rows: 0, cols: 0, dots: [] }
 
+/* punkty w bazie po ostatnim wczytaniu/zapisie – do zapisu przyrostowego */
+let savedPoints: { x: number; y: number }[] | null = null
+
 /* ═════════════  Pobieranie danych  ═════════════ */
 async function loadBoard() {
   const res = await fetch(`/api/boards/${boardId}/`)
@@ -75,6 +78,7 @@ async function loadRoute() {
     state.phase  = "finished"
     state.color  = findDot(state.points[0].row, state.points[0].col)?.color ?? null
   }
+  savedPoints = state.points.map(p => ({ x: p.row, y: p.col }))
 }
 
 /* ═════════════  Pomocnicze  ═════════════ */
@@ -160,11 +164,11 @@ function isSegmentValid(row: number, col: number): boolean {
     }
   }
 
-  // obce kropki na odcinku (bez końca)
+  // kropki na odcinku (bez końca) – obce blokują, własną wolno tylko zakończyć
+  // (te same reguły sprawdza serwer: routes/validation.py)
   const dir = sameRow ? "col" : "row"
   const [min,max] = sameRow ? [Math.min(last.col,col), Math.max(last.col,col)] : [Math.min(last.row,row), Math.max(last.row,row)]
   for (const dot of stateBoard.dots) {
-    if (dot.color === state.color) continue
     if (sameRow && dot.row === row && dot.col > min && dot.col < max) return false
     if (sameCol && dot.col === col && dot.row > min && dot.row < max) return false
   }
@@ -470,6 +474,19 @@ function getCSRFToken(): string {
   return document.cookie.match(/csrftoken=([^;]+)/)?.[1] ?? ""
 }
 
+/* Jedna operacja zastępująca wszystko po wspólnym prefiksie: dopisanie
+   segmentu → sam INSERT, cofnięcie → sam DELETE. */
+function diffPoints(saved: { x: number; y: number }[], current: { x: number; y: number }[]) {
+  let common = 0
+  while (common < saved.length && common < current.length
+         && saved[common].x === current[common].x && saved[common].y === current[common].y) {
+    common++
+  }
+  if (common === saved.length) return [{ op: "append", points: current.slice(common) }]
+  if (common === current.length) return [{ op: "truncate", after: common }]
+  return [{ op: "replace", start: common + 1, end: saved.length + 1, points: current.slice(common) }]
+}
+
 async function saveRoute() {
   if (state.phase !== "finished") {
     alert("Najpierw dokończ ścieżkę (połącz dwie kropki).")
@@ -501,14 +518,25 @@ async function saveRoute() {
     }
   }
 
-  // 2) PUT bulk punktów (preferowane) lub fallback: DELETE+POST
-  const bulkRes = await fetch(`/api/routes/${routeId}/points/bulk/`, {
-    method: "PUT",
-    headers,
-    body: JSON.stringify(state.points.map(p => ({ x: p.row, y: p.col })))
-  })
+  // 2) PATCH tylko zmienionego ogona; PUT całości dla nowej trasy lub gdy
+  //    PATCH się nie powiedzie (np. trasę zmieniono w innej karcie)
+  const points = state.points.map(p => ({ x: p.row, y: p.col }))
+  const bulkUrl = `/api/routes/${routeId}/points/bulk/`
+  let bulkRes: Response | null = null
+  if (savedPoints) {
+    bulkRes = await fetch(bulkUrl, {
+      method: "PATCH",
+      headers,
+      body: JSON.stringify(diffPoints(savedPoints, points))
+    })
+  }
+  if (!bulkRes || !bulkRes.ok) {
+    bulkRes = await fetch(bulkUrl, { method: "PUT", headers, body: JSON.stringify(points) })
+  }
   if (!bulkRes.ok) {
     console.log("Bulk failed", bulkRes.status, bulkRes.statusText);
+  } else {
+    savedPoints = points
   }
   // wizualny toast
   toast.style.opacity = "1"
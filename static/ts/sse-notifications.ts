@@ -15,14 +15,19 @@ interface NotificationPayload {
   path_id?: number;      // ID ścieżki
 
   owner_username?: string; // wykonawca akcji (alias primary)
+
+  count?: number;          // boardsImported – liczba nowych plansz
 }
 
 type EventName =
-  | "newBoard" | "boardUpdated" | "boardDeleted"
+  | "newBoard" | "boardUpdated" | "boardDeleted" | "boardsImported"
   | "newPath"  | "pathUpdated"  | "pathDeleted";
 
 const ENDPOINT = "/sse/notifications/";
 
+// ID ostatniego odebranego zdarzenia – po reconnect serwer dośle tylko brakujące.
+let lastEventId: string | null = null;
+
 // ───────── statyczny element toastu ─────────
 const toastEl = document.getElementById("notificationToast") as HTMLDivElement;
 if (!toastEl) {
@@ -84,24 +89,30 @@ const MAP: Record<EventName, { color: string; msg: (d: NotificationPayload) => s
   newBoard:      { color: "#27ae60", msg: (d) => `🆕 ${userName(d)} utworzył planszę: ${boardName(d)}` },
   boardUpdated:  { color: "#f39c12", msg: (d) => `✏️ ${userName(d)} edytował planszę: ${boardName(d)}` },
   boardDeleted:  { color: "#e74c3c", msg: (d) => `🗑️ ${userName(d)} usunął planszę: ${boardName(d)}` },
+  boardsImported: { color: "#16a085", msg: (d) => `📦 ${userName(d)} zaimportował plansze: ${d.count ?? 0}` },
   newPath:       { color: "#3498db", msg: (d) => `➕ ${userName(d)} dodał ścieżkę ${pathName(d)} na ${boardName(d)}` },
   pathUpdated:   { color: "#9b59b6", msg: (d) => `🔄 ${userName(d)} zaktualizował ścieżkę ${pathName(d)}` },
   pathDeleted:   { color: "#c0392b", msg: (d) => `❌ ${userName(d)} usunął ścieżkę ${pathName(d)}` },
 };
 
 function connect() {
-  const es = new EventSource(ENDPOINT, { withCredentials: true });
+  const src = lastEventId
+    ? `${ENDPOINT}?last_event_id=${encodeURIComponent(lastEventId)}`
+    : ENDPOINT;
+  const es = new EventSource(src, { withCredentials: true });
 
   (Object.keys(MAP) as EventName[]).forEach((evtName) => {
     es.addEventListener(evtName, (evt) => {
-      const data = JSON.parse((evt as MessageEvent).data) as NotificationPayload;
+      const msgEvt = evt as MessageEvent;
+      if (msgEvt.lastEventId) lastEventId = msgEvt.lastEventId;
+      const data = JSON.parse(msgEvt.data) as NotificationPayload;
       const { color, msg } = MAP[evtName];
       const url = boardUrl(data);
       showToast(msg(data), color, url);
       maybePushSystem(msg(data));
 
      if (
-        (evtName === "newBoard" || evtName === "boardDeleted") &&
+        (evtName === "newBoard" || evtName === "boardDeleted" || evtName === "boardsImported") &&
         window.location.pathname === "/boards/"
       ) {
         setTimeout(() => window.location.reload(), 1800); // 1.8 sekundy
@@ -109,6 +120,18 @@ function connect() {
     });
   });
 
+  // Luka większa niż dziennik serwera – jedyne wyjście to pełne odświeżenie.
+  es.addEventListener("resync", () => {
+    lastEventId = null;
+    if (window.location.pathname === "/boards/") window.location.reload();
+  });
+
+  // Nie nadążaliśmy – serwer zamyka strumień; wracamy od razu z lastEventId.
+  es.addEventListener("overflow", () => {
+    es.close();
+    connect();
+  });
+
   es.onerror = () => {
     es.close();
     setTimeout(connect, 5000);